@@ -0,0 +1,171 @@
+from __future__ import absolute_import
+from __future__ import division
+from __future__ import print_function
+from __future__ import unicode_literals
+
+import logging
+import time
+
+from builtins import object
+from collections import deque
+from twisted.internet.defer import Deferred, fail, succeed
+from typing import Any, Dict, Text
+
+logger = logging.getLogger(__name__)
+
+
+class AdmissionRejected(Exception):
+    """Raised when a request can not be admitted because too many requests
+    are already running and waiting.
+
+    Attributes:
+        message -- explanation of why the request was rejected
+        status_code -- http status code of the rejection
+        retry_after -- seconds after which the client should retry
+    """
+
+    def __init__(self, message, status_code, retry_after):
+        self.message = message
+        self.status_code = status_code
+        self.retry_after = retry_after
+
+    def __str__(self):
+        return self.message
+
+
+class AdmissionController(object):
+    """Limits the number of running and waiting requests of an endpoint.
+
+    A request first needs to `acquire` a slot and has to `release` it when
+    it is done. If all slots are taken, the request waits in a queue. If
+    the queue is full as well, the request is rejected right away. Limits
+    can be set for all requests and per project, a limit of `0` means
+    unlimited.
+
+    Requests exceeding the limits of their project are rejected with
+    `429 Too Many Requests`, requests exceeding the overall limits with
+    `503 Service Unavailable`."""
+
+    def __init__(self,
+                 max_concurrent=0,  # type: int
+                 max_queued=0,  # type: int
+                 max_concurrent_per_project=0,  # type: int
+                 max_queued_per_project=0,  # type: int
+                 retry_after=1  # type: int
+                 ):
+        # type: (...) -> None
+
+        self.max_concurrent = max_concurrent
+        self.max_queued = max_queued
+        self.max_concurrent_per_project = max_concurrent_per_project
+        self.max_queued_per_project = max_queued_per_project
+        self.retry_after = retry_after
+
+        self.running = 0
+        self.rejected = 0
+        self.admitted = 0
+        self.total_wait_time = 0.0
+        self.max_wait_time = 0.0
+        self._running_per_project = {}  # type: Dict[Text, int]
+        self._queued_per_project = {}  # type: Dict[Text, int]
+        self._queue = deque()  # [(project, deferred, time of enqueueing)]
+
+    @property
+    def queued(self):
+        # type: () -> int
+        return len(self._queue)
+
+    def _can_run(self, project):
+        return ((not self.max_concurrent or
+                 self.running < self.max_concurrent) and
+                (not self.max_concurrent_per_project or
+                 self._running_per_project.get(project, 0) <
+                 self.max_concurrent_per_project))
+
+    def _start(self, project, waited):
+        self.running += 1
+        self._running_per_project[project] = (
+            self._running_per_project.get(project, 0) + 1)
+        self.admitted += 1
+        self.total_wait_time += waited
+        self.max_wait_time = max(self.max_wait_time, waited)
+
+    def _reject(self, message, status_code):
+        self.rejected += 1
+        logger.warning("Rejected request: {}".format(message))
+        return fail(AdmissionRejected(message, status_code,
+                                      self.retry_after))
+
+    def acquire(self, project):
+        # type: (Text) -> Deferred
+        """Returns a deferred which fires once the request may run.
+
+        The deferred fails with `AdmissionRejected` if the request can
+        neither run nor wait."""
+
+        # requests of a project can only skip the queue if none of them is
+        # waiting already, otherwise they would overtake each other
+        if (self._can_run(project) and
+                not self._queued_per_project.get(project)):
+            self._start(project, 0.0)
+            return succeed(None)
+
+        if (self.max_queued_per_project and
+                self._queued_per_project.get(project, 0) >=
+                self.max_queued_per_project):
+            return self._reject("Too many requests for project '{}'."
+                                "".format(project), 429)
+        if self.max_queued and self.queued >= self.max_queued:
+            return self._reject("The server is overloaded.", 503)
+
+        d = Deferred()
+        self._queue.append((project, d, time.time()))
+        self._queued_per_project[project] = (
+            self._queued_per_project.get(project, 0) + 1)
+        return d
+
+    def release(self, project):
+        # type: (Text) -> None
+        """Frees the slot of a finished request and starts waiting ones."""
+
+        self.running -= 1
+        self._running_per_project[project] -= 1
+        if not self._running_per_project[project]:
+            del self._running_per_project[project]
+
+        started = []
+        for entry in list(self._queue):
+            waiting_project, d, enqueued = entry
+            if self._can_run(waiting_project):
+                self._queue.remove(entry)
+                self._queued_per_project[waiting_project] -= 1
+                if not self._queued_per_project[waiting_project]:
+                    del self._queued_per_project[waiting_project]
+                self._start(waiting_project, time.time() - enqueued)
+                started.append(d)
+            elif self.max_concurrent and self.running >= self.max_concurrent:
+                break
+
+        for d in started:
+            d.callback(None)
+
+    def as_dict(self):
+        # type: () -> Dict[Text, Any]
+        if self.admitted:
+            average_wait_time = self.total_wait_time / self.admitted
+        else:
+            average_wait_time = 0.0
+
+        return {"running": self.running,
+                "queued": self.queued,
+                "queued_per_project": dict(self._queued_per_project),
+                "admitted": self.admitted,
+                "rejected": self.rejected,
+                "average_wait_time": average_wait_time,
+                "max_wait_time": self.max_wait_time,
+                "limits": {
+                    "max_concurrent": self.max_concurrent,
+                    "max_queued": self.max_queued,
+                    "max_concurrent_per_project":
+                        self.max_concurrent_per_project,
+                    "max_queued_per_project": self.max_queued_per_project}}
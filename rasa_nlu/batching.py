@@ -0,0 +1,120 @@
+from __future__ import absolute_import
+from __future__ import division
+from __future__ import print_function
+from __future__ import unicode_literals
+
+import logging
+
+from builtins import object
+from twisted.internet.defer import Deferred, maybeDeferred
+from typing import Any, Callable, Dict, List, Text, Tuple
+
+from rasa_nlu.config import RasaNLUModelConfig
+
+logger = logging.getLogger(__name__)
+
+
+class MicroBatcher(object):
+    """Groups concurrent parse requests into batches.
+
+    Requests for the same project and model are collected and parsed
+    together using `parse_batch`, a function taking a list of requests and
+    returning the list of responses (or a deferred of it).
+
+    The batcher adapts to the load: if no batch of a project and model is
+    being parsed, a request is parsed right away (together with the
+    requests that arrived in the same reactor iteration). Otherwise the
+    requests are collected until `max_batch_size` requests are waiting,
+    `max_wait` milliseconds are over or the running batch is finished."""
+
+    def __init__(self,
+                 parse_batch,  # type: Callable[[List[Dict[Text, Any]]], Any]
+                 max_batch_size=32,  # type: int
+                 max_wait=5,  # type: int
+                 clock=None
+                 ):
+        # type: (...) -> None
+
+        if clock is None:
+            from twisted.internet import reactor
+            clock = reactor
+
+        self.parse_batch = parse_batch
+        self.max_batch_size = max(max_batch_size, 1)
+        self.max_wait = max_wait
+        self.clock = clock
+        self.batches = 0
+        self.requests = 0
+        self._pending = {}  # (project, model) -> [(request, deferred)]
+        self._timers = {}  # (project, model) -> delayed flush
+        self._running = {}  # (project, model) -> number of running batches
+
+    @staticmethod
+    def _batch_key(data):
+        # type: (Dict[Text, Any]) -> Tuple[Text, Text]
+        return (data.get("project", RasaNLUModelConfig.DEFAULT_PROJECT_NAME),
+                data.get("model"))
+
+    def parse(self, data):
+        # type: (Dict[Text, Any]) -> Deferred
+        """Adds a request to the next batch of its project and model.
+
+        Returns a deferred of the response to this request."""
+
+        key = self._batch_key(data)
+        result = Deferred()
+        pending = self._pending.setdefault(key, [])
+        pending.append((data, result))
+
+        if len(pending) >= self.max_batch_size:
+            self._flush(key)
+        elif key not in self._timers:
+            delay = self.max_wait if self._running.get(key) else 0
+            self._timers[key] = self.clock.callLater(delay / 1000.0,
+                                                     self._flush, key)
+        return result
+
+    def _flush(self, key):
+        # type: (Tuple[Text, Text]) -> None
+
+        timer = self._timers.pop(key, None)
+        if timer is not None and timer.active():
+            timer.cancel()
+
+        batch = self._pending.pop(key, [])
+        if not batch:
+            return
+
+        self.batches += 1
+        self.requests += len(batch)
+        self._running[key] = self._running.get(key, 0) + 1
+        logger.debug("Parsing batch of {} requests for project '{}' and "
+                     "model '{}'.".format(len(batch), key[0], key[1]))
+
+        def respond(responses):
+            for (_, deferred), response in zip(batch, responses):
+                deferred.callback(response)
+
+        def fail(failure):
+            for _, deferred in batch:
+                deferred.errback(failure)
+
+        def finished(_):
+            self._running[key] -= 1
+            if not self._running[key]:
+                del self._running[key]
+            # requests that waited for this batch don't need to wait any
+            # longer
+            if key in self._pending:
+                self._flush(key)
+
+        d = maybeDeferred(self.parse_batch, [data for data, _ in batch])
+        d.addCallbacks(respond, fail)
+        d.addBoth(finished)
+
+    def as_dict(self):
+        # type: () -> Dict[Text, Any]
+        return {"max_batch_size": self.max_batch_size,
+                "max_wait": self.max_wait,
+                "batches": self.batches,
+                "requests": self.requests}
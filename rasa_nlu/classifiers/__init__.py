@@ -3,6 +3,25 @@ from __future__ import division
 from __future__ import print_function
 from __future__ import unicode_literals
 
+import numpy as np
+from typing import Tuple
+
 # How many intents are at max put into the output intent
 # ranking, everything else will be cut off
 INTENT_RANKING_LENGTH = 10
+
+
+def top_k(scores, k):
+    # type: (np.ndarray, int) -> Tuple[np.ndarray, np.ndarray]
+    """Returns the ids and values of the `k` largest values of each row.
+
+    Only the selected values are sorted (in descending order)."""
+
+    k = min(k, scores.shape[1])
+    rows = np.arange(scores.shape[0])[:, np.newaxis]
+    if k < scores.shape[1]:
+        ids = np.argpartition(-scores, k - 1, axis=1)[:, :k]
+    else:
+        ids = np.tile(np.arange(scores.shape[1]), (scores.shape[0], 1))
+    ids = ids[rows, np.argsort(-scores[rows, ids], axis=1)]
+    return ids, scores[rows, ids]
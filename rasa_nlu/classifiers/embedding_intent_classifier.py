@@ -6,12 +6,15 @@ from __future__ import unicode_literals
 import io
 import logging
 import os
+import threading
 
 import typing
-from typing import List, Text, Any, Optional, Dict
+from six.moves.queue import Full, Queue
+from typing import List, Text, Any, Optional, Dict, Iterable, Tuple
 
-from rasa_nlu.classifiers import INTENT_RANKING_LENGTH
+from rasa_nlu.classifiers import INTENT_RANKING_LENGTH, top_k
 from rasa_nlu.components import Component
+from rasa_nlu.featurizers import stack_text_features, to_dense
 import numpy as np
 
 try:
@@ -34,6 +37,122 @@ except ImportError:
     tf = None
 
 
+def prefetch(iterable, buffer_size=2):
+    # type: (Iterable, int) -> Iterable
+    """Iterates over `iterable` in a background thread.
+
+    Up to `buffer_size` items are produced ahead of the consumer, so
+    producing the next item overlaps with processing the current one."""
+
+    items = Queue(maxsize=buffer_size)
+    stopped = threading.Event()
+    done = object()
+
+    def put(entry):
+        while not stopped.is_set():
+            try:
+                items.put(entry, timeout=0.1)
+                return True
+            except Full:
+                pass
+        return False
+
+    def produce():
+        try:
+            for item in iterable:
+                if not put((item, None)):
+                    return
+            put((done, None))
+        except Exception as e:
+            put((done, e))
+
+    producer = threading.Thread(target=produce)
+    producer.daemon = True
+    producer.start()
+
+    try:
+        while True:
+            item, error = items.get()
+            if item is done:
+                if error is not None:
+                    raise error
+                return
+            yield item
+    finally:
+        # the consumer might stop early, the producer has to stop as well
+        stopped.set()
+
+
+def numpy_embed(x, layers):
+    # type: (np.ndarray, List[Tuple[np.ndarray, np.ndarray]]) -> np.ndarray
+    """Forward pass of an embedding network with exported weights.
+
+    `layers` is a list of `(kernel, bias)` pairs, all layers except the last
+    one use a relu activation. Dropout is only applied during training."""
+
+    for kernel, bias in layers[:-1]:
+        x = np.maximum(x.dot(kernel) + bias, 0.)
+    kernel, bias = layers[-1]
+    return x.dot(kernel) + bias
+
+
+def sample_negatives(intent_ids, num_intents, num_neg):
+    # type: (np.ndarray, int, int) -> np.ndarray
+    """Samples `num_neg` wrong intents for each of the correct intents.
+
+    The negatives are sampled uniformly out of all intents except for the
+    correct one: sampling out of one intent less and shifting the ones at
+    or above the correct intent up by one."""
+
+    negs = np.random.randint(num_intents - 1, size=(len(intent_ids), num_neg))
+    negs += negs >= np.asarray(intent_ids)[:, np.newaxis]
+    return negs
+
+
+def warm_start_input_rows(kernel,  # type: np.ndarray
+                          old_kernel,  # type: np.ndarray
+                          bag_of_words_size,  # type: Optional[int]
+                          old_bag_of_words_size  # type: Optional[int]
+                          ):
+    # type: (...) -> np.ndarray
+    """Copies the rows of the previous first layer to the inputs they
+    belong to now.
+
+    The input starts with the bag of words of
+    `intent_featurizer_count_vectors`, in which known words keep their
+    index and new words are appended (see its `warm_start`). Features of
+    other featurizers follow the bag of words, they are moved by the
+    number of new words. Rows which can not be matched up keep the weights
+    of `kernel`."""
+
+    kernel = np.array(kernel)
+    if bag_of_words_size is None or old_bag_of_words_size is None:
+        # without a bag of words the features keep their position
+        if kernel.shape == old_kernel.shape:
+            return np.array(old_kernel)
+        logger.warning("Number of input features changed, can not reuse "
+                       "the weights of the first layer.")
+        return kernel
+
+    num_words = min(bag_of_words_size, old_bag_of_words_size)
+    kernel[:num_words] = old_kernel[:num_words]
+
+    num_other = kernel.shape[0] - bag_of_words_size
+    if num_other == old_kernel.shape[0] - old_bag_of_words_size:
+        kernel[bag_of_words_size:] = old_kernel[old_bag_of_words_size:]
+    else:
+        logger.warning("Number of features besides the bag of words "
+                       "changed, can not reuse their weights.")
+    return kernel
+
+
+def l2_normalize(x):
+    # type: (np.ndarray) -> np.ndarray
+    """Normalizes the last axis, using the epsilon of `tf.nn.l2_normalize`."""
+
+    return x / np.sqrt(np.maximum(np.sum(x * x, -1, keepdims=True), 1e-12))
+
+
 class EmbeddingIntentClassifier(Component):
     """Intent classifier using supervised embeddings.
 
@@ -80,9 +199,25 @@ class EmbeddingIntentClassifier(Component):
         "C_emb": 0.8,
         "droprate": 0.2,
 
+        # early stopping: fraction of the training data held out to
+        # evaluate the accuracy after every epoch, `0` disables it.
+        # training stops if the accuracy did not improve for
+        # `early_stopping_patience` epochs, the weights of the best epoch
+        # are then trained on all examples for one more epoch
+        "early_stopping_fraction": 0.0,
+        "early_stopping_patience": 10,
+
+        # number of epochs when continuing the training of a previous
+        # model in warm start mode
+        "warm_start_epochs": 50,
+
         # flag if tokenize intents
         "intent_tokenization_flag": False,
-        "intent_split_symbol": '_'
+        "intent_split_symbol": '_',
+
+        # export the trained weights as numpy arrays and classify
+        # with numpy instead of tensorflow after loading the model
+        "numpy_inference": False
     }
 
     def _load_nn_architecture_params(self):
@@ -92,6 +227,11 @@ class EmbeddingIntentClassifier(Component):
         self.hidden_layer_size_b = self.component_config['hidden_layer_size_b']
         self.batch_size = self.component_config['batch_size']
         self.epochs = self.component_config['epochs']
+        self.early_stopping_fraction = self.component_config[
+                                            'early_stopping_fraction']
+        self.early_stopping_patience = self.component_config[
+                                            'early_stopping_patience']
+        self.warm_start_epochs = self.component_config['warm_start_epochs']
 
     def _load_embedding_params(self):
         self.embed_dim = self.component_config['embed_dim']
@@ -164,7 +304,10 @@ class EmbeddingIntentClassifier(Component):
                  graph=None,  # type: Optional[tf.Graph]
                  intent_placeholder=None,  # type: Optional[tf.Tensor]
                  embedding_placeholder=None,  # type: Optional[tf.Tensor]
-                 similarity_op=None   # type: Optional[tf.Tensor]
+                 similarity_op=None,   # type: Optional[tf.Tensor]
+                 numpy_layers_a=None,  # type: Optional[List[Tuple]]
+                 numpy_layers_b=None,  # type: Optional[List[Tuple]]
+                 intent_embeddings=None  # type: Optional[np.ndarray]
                  ):
         # type: (...) -> None
         """Declare instant variables with default values"""
@@ -204,6 +347,22 @@ class EmbeddingIntentClassifier(Component):
         self.embedding_placeholder = embedding_placeholder
         self.similarity_op = similarity_op
 
+        # numpy inference instances
+        self.numpy_layers_a = numpy_layers_a
+        self.numpy_layers_b = numpy_layers_b
+        self.intent_embeddings = intent_embeddings
+
+        # number of input features created by
+        # `intent_featurizer_count_vectors`, the other features follow them
+        self.bag_of_words_size = self.component_config.get(
+                "bag_of_words_size")
+
+        # weights, intent labels and bag of words size of the previous model
+        # when warm starting
+        self._warm_start_weights = None
+        self._warm_start_labels = None
+        self._warm_start_bag_of_words_size = None
+
     @classmethod
     def required_packages(cls):
         # type: () -> List[Text]
@@ -260,8 +419,7 @@ class EmbeddingIntentClassifier(Component):
     def _prepare_data_for_training(self, training_data, intent_dict):
         """Prepare data for training"""
 
-        X = np.stack([e.get("text_features")
-                      for e in training_data.intent_examples])
+        X = stack_text_features(training_data.intent_examples)
 
         intents_for_X = np.array([intent_dict[e.get("intent")]
                                   for e in training_data.intent_examples])
@@ -364,69 +522,219 @@ class EmbeddingIntentClassifier(Component):
 
         batch_pos_b = batch_pos_b[:, np.newaxis, :]
 
-        # sample negatives
-        batch_neg_b = np.zeros((batch_pos_b.shape[0], self.num_neg,
-                                batch_pos_b.shape[-1]))
-        for b in range(batch_pos_b.shape[0]):
-            # create negative indexes out of possible ones
-            # except for correct index of b
-            negative_indexes = [i for i in range(
-                                    self.encoded_all_intents.shape[0])
-                                if i != intent_ids[b]]
-            negs = np.random.choice(negative_indexes, size=self.num_neg)
-
-            batch_neg_b[b] = self.encoded_all_intents[negs]
+        negs = sample_negatives(intent_ids,
+                                self.encoded_all_intents.shape[0],
+                                self.num_neg)
+        batch_neg_b = self.encoded_all_intents[negs]
 
         return np.concatenate([batch_pos_b, batch_neg_b], 1)
 
+    def _generate_batches(self, X, Y, intents_for_X):
+        """Yields the shuffled batches of one epoch"""
+
+        num_examples = X.shape[0]
+        indices = np.random.permutation(num_examples)
+        for start_idx in range(0, num_examples, self.batch_size):
+            batch_indices = indices[start_idx:start_idx + self.batch_size]
+            # sparse features are only converted batch by batch
+            batch_a = to_dense(X[batch_indices])
+            # add negatives
+            batch_b = self._create_batch_b(Y[batch_indices],
+                                           intents_for_X[batch_indices])
+            yield batch_a, batch_b
+
+    def _split_for_early_stopping(self, X, Y, helper_data):
+        """Hold out a part of the training data to evaluate on"""
+
+        intents_for_X, all_Y = helper_data
+        num_held_out = int(X.shape[0] * self.early_stopping_fraction)
+        if num_held_out < 1:
+            return (X, Y, helper_data), None
+
+        indices = np.random.permutation(X.shape[0])
+        train, held_out = indices[num_held_out:], indices[:num_held_out]
+        return ((X[train], Y[train], (intents_for_X[train], all_Y[train])),
+                (X[held_out], intents_for_X[held_out], all_Y[held_out]))
+
     def _train_tf(self, X, Y, helper_data,
                   sess, a_in, b_in, sim,
                   loss, is_training, train_op):
         """Train tf graph"""
         sess.run(tf.global_variables_initializer())
 
+        if self._warm_start_weights is not None:
+            self._load_warm_start_weights(sess)
+            self._warm_start_weights = None
+            epochs = self.warm_start_epochs
+        else:
+            epochs = self.epochs
+
+        all_data = (X, Y, helper_data[0])
+        (X, Y, helper_data), held_out = self._split_for_early_stopping(
+                                                X, Y, helper_data)
         intents_for_X, all_Y = helper_data
 
-        batches_per_epoch = (len(X) // self.batch_size +
-                             int(len(X) % self.batch_size > 0))
-        for ep in range(self.epochs):
-            indices = np.random.permutation(len(X))
-            sess_out = {}
-            for i in range(batches_per_epoch):
-                end_idx = (i + 1) * self.batch_size
-                start_idx = i * self.batch_size
-                batch_a = X[indices[start_idx:end_idx]]
-                batch_pos_b = Y[indices[start_idx:end_idx]]
-                intents_for_b = intents_for_X[indices[start_idx:end_idx]]
-                # add negatives
-                batch_b = self._create_batch_b(batch_pos_b, intents_for_b)
-
-                sess_out = sess.run({'loss': loss, 'train_op': train_op},
-                                    feed_dict={a_in: batch_a,
-                                               b_in: batch_b,
-                                               is_training: True})
+        model_variables = tf.trainable_variables()
+        best_weights = None
+        best_acc = -1.0
+        epochs_without_improvement = 0
+        for ep in range(epochs):
+            sess_out = self._train_epoch(X, Y, intents_for_X, sess,
+                                         a_in, b_in, loss, is_training,
+                                         train_op)
 
             if logger.isEnabledFor(logging.INFO) and (ep + 1) % 10 == 0:
                 self._output_training_stat(X, intents_for_X, all_Y,
                                            sess, a_in, b_in,
                                            sim, is_training,
-                                           ep, sess_out)
+                                           ep, epochs, sess_out)
+
+            if held_out is not None:
+                X_held_out, intents_held_out, all_Y_held_out = held_out
+                acc = self._accuracy(X_held_out, intents_held_out,
+                                     all_Y_held_out, sess, a_in, b_in,
+                                     sim, is_training)
+                if acc > best_acc:
+                    best_acc = acc
+                    best_weights = sess.run(model_variables)
+                    epochs_without_improvement = 0
+                else:
+                    epochs_without_improvement += 1
+
+                if epochs_without_improvement >= self.early_stopping_patience:
+                    logger.info("Stopping training after epoch {}, the "
+                                "held out accuracy did not improve for {} "
+                                "epochs (best: {:.3f})"
+                                "".format(ep + 1, epochs_without_improvement,
+                                          best_acc))
+                    break
+
+        if held_out is not None:
+            # continue from the epoch with the best held out accuracy and
+            # train on the held out examples as well in a final epoch
+            if epochs_without_improvement:
+                for variable, weights in zip(model_variables, best_weights):
+                    variable.load(weights, sess)
+            self._train_epoch(all_data[0], all_data[1], all_data[2], sess,
+                              a_in, b_in, loss, is_training, train_op)
+
+    def _train_epoch(self, X, Y, intents_for_X, sess, a_in, b_in, loss,
+                     is_training, train_op):
+        """Train on all batches of the data once, returns the output of
+        the last training step"""
+
+        sess_out = {}
+        # the next batch is built while the current one is trained on
+        for batch_a, batch_b in prefetch(
+                self._generate_batches(X, Y, intents_for_X)):
+            sess_out = sess.run({'loss': loss, 'train_op': train_op},
+                                feed_dict={a_in: batch_a,
+                                           b_in: batch_b,
+                                           is_training: True})
+        return sess_out
+
+    def _accuracy(self, X, intents_for_X, all_Y,
+                  sess, a_in, b_in, sim, is_training):
+        """Calculate the accuracy of the predicted intents"""
+
+        predicted_sim = np.concatenate([
+            sess.run(sim, feed_dict={a_in: to_dense(X[i:i + self.batch_size]),
+                                     b_in: all_Y[i:i + self.batch_size],
+                                     is_training: False})
+            for i in range(0, X.shape[0], self.batch_size)])
+
+        return np.mean(np.argmax(predicted_sim, -1) == intents_for_X)
 
     def _output_training_stat(self,
                               X, intents_for_X, all_Y,
                               sess, a_in, b_in, sim, is_training,
-                              ep, sess_out):
+                              ep, epochs, sess_out):
         """Output training statistics"""
 
-        train_sim = sess.run(sim, feed_dict={a_in: X,
-                                             b_in: all_Y,
-                                             is_training: False})
-
-        train_acc = np.mean(np.argmax(train_sim, -1) == intents_for_X)
+        train_acc = self._accuracy(X, intents_for_X, all_Y,
+                                   sess, a_in, b_in, sim, is_training)
         logger.info("epoch {} / {}: loss {}, train accuracy : {:.3f}"
-                    "".format((ep + 1), self.epochs,
+                    "".format((ep + 1), epochs,
                               sess_out.get('loss'), train_acc))
 
+    def _intent_labels(self):
+        # type: () -> List[Text]
+        """The intents or intent tokens encoded by `encoded_all_intents`"""
+
+        intents = [self.inv_intent_dict[idx]
+                   for idx in range(len(self.inv_intent_dict))]
+        if self.intent_tokenization_flag:
+            token_dict = self._create_intent_token_dict(
+                    intents, self.intent_split_symbol)
+            return sorted(token_dict, key=token_dict.get)
+        return intents
+
+    def warm_start(self, previous):
+        # type: (EmbeddingIntentClassifier) -> None
+        """Continue training from the weights of the previous model.
+
+        Training then runs for `warm_start_epochs` instead of `epochs`."""
+
+        if previous.session is not None:
+            self._warm_start_weights = previous._weights_as_numpy()
+        elif previous.numpy_layers_a is not None:
+            self._warm_start_weights = {'a': previous.numpy_layers_a,
+                                        'b': previous.numpy_layers_b}
+        else:
+            return
+        self._warm_start_labels = previous._intent_labels()
+        self._warm_start_bag_of_words_size = previous.bag_of_words_size
+
+    def _load_warm_start_weights(self, sess):
+        """Initialize the variables with the weights of the previous model.
+
+        The input rows of the first layers are matched up: known words
+        keep their index in the bag of words, the features following it
+        are moved by the number of new words (see `warm_start_input_rows`)
+        and intents are matched by name. Layers whose shape changed keep
+        their random initialization."""
+
+        variables = {v.name: v for v in tf.global_variables()}
+        old_label_ids = {label: idx
+                         for idx, label in enumerate(self._warm_start_labels)}
+        new_labels = self._intent_labels()
+
+        for name, num_layers in [('a', self.num_hidden_layers_a),
+                                 ('b', self.num_hidden_layers_b)]:
+            layer_names = self._layer_names(name, num_layers)
+            previous_layers = self._warm_start_weights[name]
+            if len(previous_layers) != len(layer_names):
+                logger.warning("Number of layers of network {} changed, "
+                               "can not reuse its weights.".format(name))
+                continue
+
+            for i, (layer_name, (old_kernel, old_bias)) in enumerate(
+                    zip(layer_names, previous_layers)):
+                kernel_var = variables[layer_name + '/kernel:0']
+                bias_var = variables[layer_name + '/bias:0']
+                kernel = sess.run(kernel_var)
+
+                if kernel.shape[1] != old_kernel.shape[1]:
+                    logger.warning("Size of layer {} changed, can not reuse "
+                                   "its weights.".format(layer_name))
+                    continue
+
+                if i > 0 and kernel.shape == old_kernel.shape:
+                    kernel = old_kernel
+                elif i == 0 and name == 'a':
+                    kernel = warm_start_input_rows(
+                            kernel, old_kernel, self.bag_of_words_size,
+                            self._warm_start_bag_of_words_size)
+                elif i == 0 and name == 'b':
+                    for idx, label in enumerate(new_labels):
+                        if label in old_label_ids:
+                            kernel[idx] = old_kernel[old_label_ids[label]]
+                else:
+                    continue
+
+                kernel_var.load(kernel, sess)
+                bias_var.load(old_bias, sess)
+
     def train(self, training_data, cfg=None, **kwargs):
         # type: (TrainingData, Optional[RasaNLUModelConfig], **Any) -> None
         """Train the embedding intent classifier on a data set."""
@@ -438,6 +746,8 @@ class EmbeddingIntentClassifier(Component):
                          "Skipping training of intent classifier.")
             return
 
+        # provided by `intent_featurizer_count_vectors`
+        self.bag_of_words_size = kwargs.get("bag_of_words_size")
         self.inv_intent_dict = {v: k for k, v in intent_dict.items()}
         self.encoded_all_intents = self._create_encoded_intents(
                                         intent_dict)
@@ -490,38 +800,61 @@ class EmbeddingIntentClassifier(Component):
 
         message_sim = sess.run(sim, feed_dict={a_in: X,
                                                b_in: all_Y})
-        message_sim = message_sim.flatten()  # sim is a matrix
 
-        intent_ids = message_sim.argsort()[::-1]
-        message_sim[::-1].sort()
+        # only the ranked intents need to be sorted
+        return top_k(message_sim, INTENT_RANKING_LENGTH)
+
+    def _calculate_message_sim_numpy(self, X):
+        """Calculate the similarities of the top ranked intents with numpy"""
 
-        # transform sim to python list for JSON serializing
-        message_sim = message_sim.tolist()
+        message_embed = numpy_embed(X, self.numpy_layers_a)
+        if self.similarity_type == 'cosine':
+            message_embed = l2_normalize(message_embed)
+        message_sim = message_embed.dot(self.intent_embeddings.T)
 
-        return intent_ids, message_sim
+        return top_k(message_sim, INTENT_RANKING_LENGTH)
 
     def process(self, message, **kwargs):
         # type: (Message, **Any) -> None
         """Return the most likely intent and its similarity to the input."""
 
-        intent = {"name": None, "confidence": 0.0}
-        intent_ranking = []
+        self.process_batch([message], **kwargs)
 
-        if self.session is None:
+    def process_batch(self, messages, **kwargs):
+        # type: (List[Message], **Any) -> None
+        """Classify a list of messages with a single `session.run`."""
+
+        if self.session is None and self.intent_embeddings is None:
             logger.error("There is no trained tf.session: "
                          "component is either not trained or "
                          "didn't receive enough training data")
 
-        else:
-            # get features (bag of words) for a message
-            X = message.get("text_features").reshape(1, -1)
+            for message in messages:
+                message.set("intent", {"name": None, "confidence": 0.0},
+                            add_to_output=True)
+                message.set("intent_ranking", [], add_to_output=True)
+            return
+
+        # get features (bag of words) for the messages
+        X = to_dense(stack_text_features(messages))
 
+        if self.intent_embeddings is not None:
+            batch_ids, batch_sim = self._calculate_message_sim_numpy(X)
+        else:
             # stack encoded_all_intents on top of each other
             # to create candidates for test examples
             all_Y = self._create_all_Y(X.shape[0])
 
             # load tf graph and session
-            intent_ids, message_sim = self._calculate_message_sim(X, all_Y)
+            batch_ids, batch_sim = self._calculate_message_sim(X, all_Y)
+
+        for message, intent_ids, message_sim in zip(messages,
+                                                    batch_ids, batch_sim):
+            intent = {"name": None, "confidence": 0.0}
+            intent_ranking = []
+
+            # transform sim to python list for JSON serializing
+            message_sim = message_sim.tolist()
 
             if intent_ids.size > 0:
                 intent = {"name": self.inv_intent_dict[intent_ids[0]],
@@ -533,8 +866,8 @@ class EmbeddingIntentClassifier(Component):
                                    "confidence": score}
                                   for intent_idx, score in ranking]
 
-        message.set("intent", intent, add_to_output=True)
-        message.set("intent_ranking", intent_ranking, add_to_output=True)
+            message.set("intent", intent, add_to_output=True)
+            message.set("intent_ranking", intent_ranking, add_to_output=True)
 
     @classmethod
     def load(cls,
@@ -547,6 +880,10 @@ class EmbeddingIntentClassifier(Component):
 
         meta = model_metadata.for_component(cls.name)
 
+        if (model_dir and meta.get("numpy_inference") and
+                meta.get("numpy_weights_file")):
+            return cls._load_numpy_inference(model_dir, meta)
+
         if model_dir and meta.get("classifier_file"):
             file_name = meta.get("classifier_file")
             checkpoint = os.path.join(model_dir, file_name)
@@ -590,6 +927,89 @@ class EmbeddingIntentClassifier(Component):
                            "".format(os.path.abspath(model_dir)))
             return EmbeddingIntentClassifier(component_config=meta)
 
+    @classmethod
+    def is_fork_safe(cls, component_meta):
+        # type: (Dict[Text, Any]) -> bool
+        # a tensorflow session does not survive a fork, numpy inference
+        # does not need one
+        return bool(component_meta.get("numpy_inference") and
+                    component_meta.get("numpy_weights_file"))
+
+    @classmethod
+    def _load_numpy_inference(cls, model_dir, meta):
+        # type: (Text, Dict[Text, Any]) -> EmbeddingIntentClassifier
+        """Load the exported weights instead of the tensorflow graph."""
+
+        component = EmbeddingIntentClassifier(component_config=meta)
+
+        weights_file = os.path.join(model_dir, meta["numpy_weights_file"])
+        with np.load(weights_file) as weights:
+            component.numpy_layers_a = cls._numpy_layers(
+                    weights, 'a', component.num_hidden_layers_a)
+            component.numpy_layers_b = cls._numpy_layers(
+                    weights, 'b', component.num_hidden_layers_b)
+
+        with io.open(os.path.join(
+                model_dir,
+                cls.name + "_inv_intent_dict.pkl"), 'rb') as f:
+            component.inv_intent_dict = pickle.load(f)
+        with io.open(os.path.join(
+                model_dir,
+                cls.name + "_encoded_all_intents.pkl"), 'rb') as f:
+            component.encoded_all_intents = pickle.load(f)
+
+        # the intent embeddings only need to be computed once
+        intent_embeddings = numpy_embed(component.encoded_all_intents,
+                                        component.numpy_layers_b)
+        if component.similarity_type == 'cosine':
+            intent_embeddings = l2_normalize(intent_embeddings)
+        component.intent_embeddings = intent_embeddings
+
+        return component
+
+    @staticmethod
+    def _numpy_layers(weights, name, num_layers):
+        return [(weights["{}_{}_kernel".format(name, i)],
+                 weights["{}_{}_bias".format(name, i)])
+                for i in range(num_layers + 1)]
+
+    @staticmethod
+    def _layer_names(name, num_layers):
+        """Names of the dense layers of the embedding network `name`"""
+
+        layer_names = ['hidden_layer_{}_{}'.format(name, i)
+                       for i in range(num_layers)]
+        layer_names.append('embed_layer_{}'.format(name))
+        return layer_names
+
+    def _weights_as_numpy(self):
+        # type: () -> Dict[Text, List[Tuple[np.ndarray, np.ndarray]]]
+        """Get the `(kernel, bias)` of every layer of both networks."""
+
+        with self.graph.as_default():
+            variables = {v.name: v for v in tf.global_variables()}
+
+        weights = {}
+        for name, num_layers in [('a', self.num_hidden_layers_a),
+                                 ('b', self.num_hidden_layers_b)]:
+            weights[name] = [
+                self.session.run((variables[layer_name + '/kernel:0'],
+                                  variables[layer_name + '/bias:0']))
+                for layer_name in self._layer_names(name, num_layers)]
+        return weights
+
+    def _export_numpy_weights(self, weights_file):
+        # type: (Text) -> None
+        """Save the weights of both embedding networks as numpy arrays."""
+
+        arrays = {}
+        for name, layers in self._weights_as_numpy().items():
+            for i, (kernel, bias) in enumerate(layers):
+                arrays["{}_{}_kernel".format(name, i)] = kernel
+                arrays["{}_{}_bias".format(name, i)] = bias
+
+        np.savez(weights_file, **arrays)
+
     def persist(self, model_dir):
         # type: (Text) -> Dict[Text, Any]
         """Persist this model into the passed directory.
@@ -631,4 +1051,13 @@ class EmbeddingIntentClassifier(Component):
                 self.name + "_encoded_all_intents.pkl"), 'wb') as f:
             pickle.dump(self.encoded_all_intents, f)
 
-        return {"classifier_file": self.name + ".ckpt"}
+        meta = {"classifier_file": self.name + ".ckpt",
+                "bag_of_words_size": self.bag_of_words_size}
+
+        if self.component_config["numpy_inference"]:
+            weights_file_name = self.name + "_weights.npz"
+            self._export_numpy_weights(os.path.join(model_dir,
+                                                    weights_file_name))
+            meta["numpy_weights_file"] = weights_file_name
+
+        return meta
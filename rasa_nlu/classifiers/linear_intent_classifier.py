@@ -0,0 +1,245 @@
+from __future__ import absolute_import
+from __future__ import division
+from __future__ import print_function
+from __future__ import unicode_literals
+
+import logging
+import os
+
+import typing
+from typing import Any, Dict, List, Optional, Text, Tuple
+
+import numpy as np
+
+from rasa_nlu import utils
+from rasa_nlu.classifiers import INTENT_RANKING_LENGTH, top_k
+from rasa_nlu.components import Component
+from rasa_nlu.config import RasaNLUModelConfig
+from rasa_nlu.featurizers import stack_text_features
+from rasa_nlu.model import Metadata
+from rasa_nlu.training_data import Message
+from rasa_nlu.training_data import TrainingData
+
+logger = logging.getLogger(__name__)
+
+if typing.TYPE_CHECKING:
+    import sklearn
+
+LINEAR_MODEL_FILE_NAME = "intent_classifier_linear.pkl"
+
+
+def softmax(scores):
+    # type: (np.ndarray) -> np.ndarray
+    """Turns the scores of each row into probabilities."""
+
+    exp = np.exp(scores - np.max(scores, axis=1, keepdims=True))
+    return exp / np.sum(exp, axis=1, keepdims=True)
+
+
+class LinearIntentClassifier(Component):
+    """Intent classifier using a multinomial logistic regression.
+
+    In contrast to `intent_classifier_sklearn`, the probabilities of a
+    logistic regression need no additional cross validated calibration and
+    sparse features (e.g. of `intent_featurizer_count_vectors`) are used as
+    they are. The regularization strength is selected by cross validation
+    along a warm started regularization path. Classifying messages is a
+    single matrix product with the learned weights."""
+
+    name = "intent_classifier_linear"
+
+    provides = ["intent", "intent_ranking"]
+
+    requires = ["text_features"]
+
+    defaults = {
+        # inverse regularization strengths - cross validation will select
+        # the best value
+        "C": [0.1, 1, 10, 100],
+
+        # We try to find a good number of cross folds to use during
+        # intent training, this specifies the max number of folds
+        "max_cross_validation_folds": 5,
+
+        # maximum number of iterations of the solver
+        "max_iterations": 200
+    }
+
+    def __init__(self,
+                 component_config=None,  # type: Dict[Text, Any]
+                 intents=None,  # type: Optional[np.ndarray]
+                 coef=None,  # type: Optional[np.ndarray]
+                 intercept=None,  # type: Optional[np.ndarray]
+                 C=None  # type: Optional[float]
+                 ):
+        # type: (...) -> None
+
+        super(LinearIntentClassifier, self).__init__(component_config)
+
+        # names of the intents, in the order of the rows of `coef`
+        self.intents = intents
+        self.coef = coef
+        self.intercept = intercept
+        # the regularization strength selected during training
+        self.C = C
+
+        # regularization strength of the previous model when warm starting
+        self._warm_start_C = None
+
+    @classmethod
+    def required_packages(cls):
+        # type: () -> List[Text]
+        return ["sklearn"]
+
+    def warm_start(self, previous):
+        # type: (LinearIntentClassifier) -> None
+        """Reuse the regularization strength selected for the previous
+        model instead of cross validating it again."""
+
+        self._warm_start_C = previous.C
+
+    def train(self, training_data, cfg, **kwargs):
+        # type: (TrainingData, RasaNLUModelConfig, **Any) -> None
+        """Train the intent classifier on a data set."""
+
+        num_threads = kwargs.get("num_threads", 1)
+
+        labels = [e.get("intent")
+                  for e in training_data.intent_examples]
+
+        if len(set(labels)) < 2:
+            logger.warn("Can not train an intent classifier. "
+                        "Need at least 2 different classes. "
+                        "Skipping training of intent classifier.")
+            return
+
+        self.intents, y = np.unique(labels, return_inverse=True)
+        X = stack_text_features(training_data.intent_examples)
+
+        clf = self._create_classifier(num_threads, y)
+        clf.fit(X, y)
+
+        if self._warm_start_C is not None:
+            self.C = self._warm_start_C
+        else:
+            self.C = float(clf.C_[0])
+            logger.info("Selected regularization strength C={}"
+                        "".format(self.C))
+        self.coef, self.intercept = self._multinomial_weights(clf)
+
+    def _num_cv_splits(self, y):
+        folds = self.component_config["max_cross_validation_folds"]
+        return max(2, min(folds, np.min(np.bincount(y)) // 5))
+
+    def _create_classifier(self, num_threads, y):
+        from sklearn.linear_model import LogisticRegression
+        from sklearn.linear_model import LogisticRegressionCV
+
+        max_iterations = self.component_config["max_iterations"]
+
+        # older versions of sklearn fit one classifier per intent by
+        # default, the probabilities are only a softmax of the scores for a
+        # multinomial model
+        extra_params = {}
+        if "multi_class" in LogisticRegression().get_params():
+            extra_params["multi_class"] = "multinomial"
+
+        if self._warm_start_C is not None:
+            return LogisticRegression(C=self._warm_start_C,
+                                      solver="lbfgs",
+                                      max_iter=max_iterations,
+                                      **extra_params)
+
+        # selecting C by the log loss favours well calibrated probabilities
+        return LogisticRegressionCV(Cs=self.component_config["C"],
+                                    cv=self._num_cv_splits(y),
+                                    scoring="neg_log_loss",
+                                    solver="lbfgs",
+                                    max_iter=max_iterations,
+                                    n_jobs=num_threads,
+                                    **extra_params)
+
+    @staticmethod
+    def _multinomial_weights(clf):
+        # type: (Any) -> Tuple[np.ndarray, np.ndarray]
+        """Returns weights with one row per intent.
+
+        The probabilities of the intents are the softmax of the scores."""
+
+        coef, intercept = clf.coef_, clf.intercept_
+        if coef.shape[0] > 1:
+            return coef, intercept
+
+        # models of two intents only have the weights of the second one
+        if getattr(clf, "multi_class", None) == "multinomial":
+            return (np.vstack([-coef, coef]),
+                    np.concatenate([-intercept, intercept]))
+        else:
+            return (np.vstack([np.zeros_like(coef), coef]),
+                    np.concatenate([np.zeros_like(intercept), intercept]))
+
+    def predict_prob(self, X):
+        # type: (Any) -> np.ndarray
+        """Returns the probabilities of all intents for each row of `X`.
+
+        `X` can be sparse, the scores are a single matrix product."""
+
+        scores = np.asarray(X.dot(self.coef.T)) + self.intercept
+        return softmax(scores)
+
+    def process(self, message, **kwargs):
+        # type: (Message, **Any) -> None
+        """Return the most likely intent and its probability for a message."""
+
+        self.process_batch([message], **kwargs)
+
+    def process_batch(self, messages, **kwargs):
+        # type: (List[Message], **Any) -> None
+        """Classify a list of messages at once."""
+
+        if self.coef is None:
+            # component is either not trained or didn't
+            # receive enough training data
+            for message in messages:
+                message.set("intent", None, add_to_output=True)
+                message.set("intent_ranking", [], add_to_output=True)
+            return
+
+        X = stack_text_features(messages)
+        batch_ids, batch_probs = top_k(self.predict_prob(X),
+                                       INTENT_RANKING_LENGTH)
+
+        for message, intent_ids, probs in zip(messages,
+                                              batch_ids, batch_probs):
+            intent_ranking = [{"name": self.intents[intent_id],
+                               "confidence": float(prob)}
+                              for intent_id, prob in zip(intent_ids, probs)]
+
+            message.set("intent", intent_ranking[0], add_to_output=True)
+            message.set("intent_ranking", intent_ranking, add_to_output=True)
+
+    @classmethod
+    def load(cls,
+             model_dir=None,  # type: Optional[Text]
+             model_metadata=None,  # type: Optional[Metadata]
+             cached_component=None,  # type: Optional[Component]
+             **kwargs  # type: **Any
+             ):
+        # type: (...) -> LinearIntentClassifier
+
+        meta = model_metadata.for_component(cls.name)
+        file_name = meta.get("classifier_file", LINEAR_MODEL_FILE_NAME)
+        classifier_file = os.path.join(model_dir, file_name)
+
+        if os.path.exists(classifier_file):
+            return utils.pycloud_unpickle(classifier_file)
+        else:
+            return cls(meta)
+
+    def persist(self, model_dir):
+        # type: (Text) -> Optional[Dict[Text, Any]]
+        """Persist this model into the passed directory."""
+
+        classifier_file = os.path.join(model_dir, LINEAR_MODEL_FILE_NAME)
+        utils.pycloud_pickle(classifier_file, self)
+        return {"classifier_file": LINEAR_MODEL_FILE_NAME}
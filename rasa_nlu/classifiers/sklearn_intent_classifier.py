@@ -21,6 +21,7 @@ from rasa_nlu import utils
 from rasa_nlu.classifiers import INTENT_RANKING_LENGTH
 from rasa_nlu.components import Component
 from rasa_nlu.config import RasaNLUModelConfig
+from rasa_nlu.featurizers import is_sparse, stack_text_features
 from rasa_nlu.model import Metadata
 from rasa_nlu.training_data import Message
 from rasa_nlu.training_data import TrainingData
@@ -84,6 +85,9 @@ class SklearnIntentClassifier(Component):
             self.le = LabelEncoder()
         self.clf = clf
 
+        # parameters selected for the previous model when warm starting
+        self._warm_start_params = None
+
         _sklearn_numpy_warning_fix()
 
     @classmethod
@@ -107,6 +111,18 @@ class SklearnIntentClassifier(Component):
 
         return self.le.inverse_transform(y)
 
+    def warm_start(self, previous):
+        # type: (SklearnIntentClassifier) -> None
+        """Reuse the svm parameters selected for the previous model.
+
+        The cross validation over all parameters is skipped."""
+
+        if previous.clf is not None:
+            params = getattr(previous.clf, "best_params_", None)
+            if params is None:
+                params = {"C": previous.clf.C, "kernel": previous.clf.kernel}
+            self._warm_start_params = params
+
     def train(self, training_data, cfg, **kwargs):
         # type: (TrainingData, RasaNLUModelConfig, **Any) -> None
         """Train the intent classifier on a data set."""
@@ -122,8 +138,7 @@ class SklearnIntentClassifier(Component):
                         "Skipping training of intent classifier.")
         else:
             y = self.transform_labels_str2num(labels)
-            X = np.stack([example.get("text_features")
-                          for example in training_data.intent_examples])
+            X = stack_text_features(training_data.intent_examples)
 
             self.clf = self._create_classifier(num_threads, y)
 
@@ -137,6 +152,13 @@ class SklearnIntentClassifier(Component):
         from sklearn.model_selection import GridSearchCV
         from sklearn.svm import SVC
 
+        if self._warm_start_params is not None:
+            logger.info("Using the svm parameters {} of the previous model"
+                        "".format(self._warm_start_params))
+            return SVC(probability=True,
+                       class_weight='balanced',
+                       **self._warm_start_params)
+
         C = self.component_config["C"]
         kernels = self.component_config["kernels"]
         # dirty str fix because sklearn is expecting
@@ -161,24 +183,31 @@ class SklearnIntentClassifier(Component):
         # type: (Message, **Any) -> None
         """Return the most likely intent and its probability for a message."""
 
+        self.process_batch([message], **kwargs)
+
+    def process_batch(self, messages, **kwargs):
+        # type: (List[Message], **Any) -> None
+        """Classify a list of messages with a single call to the classifier."""
+
         if not self.clf:
             # component is either not trained or didn't
             # receive enough training data
-            intent = None
-            intent_ranking = []
-        else:
-            X = message.get("text_features").reshape(1, -1)
-            intent_ids, probabilities = self.predict(X)
-            intents = self.transform_labels_num2str(intent_ids)
-            # `predict` returns a matrix as it is supposed
-            # to work for multiple examples as well, hence we need to flatten
-            intents, probabilities = intents.flatten(), probabilities.flatten()
-
-            if intents.size > 0 and probabilities.size > 0:
+            for message in messages:
+                message.set("intent", None, add_to_output=True)
+                message.set("intent_ranking", [], add_to_output=True)
+            return
+
+        X = stack_text_features(messages)
+        intent_ids, probabilities = self.predict(X)
+
+        for message, ids, probs in zip(messages, intent_ids, probabilities):
+            intents = self.transform_labels_num2str(ids)
+
+            if intents.size > 0 and probs.size > 0:
                 ranking = list(zip(list(intents),
-                                   list(probabilities)))[:INTENT_RANKING_LENGTH]
+                                   list(probs)))[:INTENT_RANKING_LENGTH]
 
-                intent = {"name": intents[0], "confidence": probabilities[0]}
+                intent = {"name": intents[0], "confidence": probs[0]}
 
                 intent_ranking = [{"name": intent_name, "confidence": score}
                                   for intent_name, score in ranking]
@@ -186,8 +215,8 @@ class SklearnIntentClassifier(Component):
                 intent = {"name": None, "confidence": 0.0}
                 intent_ranking = []
 
-        message.set("intent", intent, add_to_output=True)
-        message.set("intent_ranking", intent_ranking, add_to_output=True)
+            message.set("intent", intent, add_to_output=True)
+            message.set("intent_ranking", intent_ranking, add_to_output=True)
 
     def predict_prob(self, X):
         # type: (np.ndarray) -> np.ndarray
@@ -198,8 +227,16 @@ class SklearnIntentClassifier(Component):
         :param X: bow of input text
         :return: vector of probabilities containing one entry for each label"""
 
+        if is_sparse(X) and not self._fitted_on_sparse_features():
+            # models trained before the features were sparse
+            X = X.toarray()
         return self.clf.predict_proba(X)
 
+    def _fitted_on_sparse_features(self):
+        # type: () -> bool
+        estimator = getattr(self.clf, "best_estimator_", self.clf)
+        return getattr(estimator, "_sparse", True)
+
     def predict(self, X):
         # type: (np.ndarray) -> Tuple[np.ndarray, np.ndarray]
         """Given a bow vector of an input text, predict most probable label.
@@ -214,7 +251,8 @@ class SklearnIntentClassifier(Component):
         # sort the probabilities retrieving the indices of
         # the elements in sorted order
         sorted_indices = np.fliplr(np.argsort(pred_result, axis=1))
-        return sorted_indices, pred_result[:, sorted_indices]
+        rows = np.arange(pred_result.shape[0])[:, np.newaxis]
+        return sorted_indices, pred_result[rows, sorted_indices]
 
     @classmethod
     def load(cls,
@@ -255,6 +255,17 @@ class Component(object):
         (e.g. loading word vectors for the pipeline)."""
         pass
 
+    def warm_start(self, previous):
+        # type: (Component) -> None
+        """Reuse the state of a previously trained component.
+
+        This function is called before `train` if a model is retrained
+        in warm start mode. `previous` is the loaded component of the same
+        type from the old model. Components that can continue the
+        training of an old model (instead of training from scratch) take
+        over what they need from it, most components ignore it."""
+        pass
+
     def train(self, training_data, cfg, **kwargs):
         # type: (TrainingData, RasaNLUModelConfig, **Any) -> None
         """Train this component.
@@ -279,6 +290,19 @@ class Component(object):
         of components previous to this one."""
         pass
 
+    def process_batch(self, messages, **kwargs):
+        # type: (List[Message], **Any) -> None
+        """Process a list of incoming messages.
+
+        Has the same effect as calling `process` on every message. Most
+        components do not need to implement this method, but components
+        that can handle a whole batch at once (e.g. with a single call to
+        an underlying library) should override it to speed up bulk
+        processing during training and parsing."""
+
+        for message in messages:
+            self.process(message, **kwargs)
+
     def persist(self, model_dir):
         # type: (Text) -> Optional[Dict[Text, Any]]
         """Persist this component to disk for future loading."""
@@ -298,6 +322,18 @@ class Component(object):
 
         return None
 
+    @classmethod
+    def is_fork_safe(cls, component_meta):
+        # type: (Dict[Text, Any]) -> bool
+        """Whether a loaded instance of this component keeps working in
+        forked processes.
+
+        Components holding state that does not survive a fork (e.g. a
+        tensorflow session) should return `False`. Server workers load
+        such components after forking instead of sharing them."""
+
+        return True
+
     def __eq__(self, other):
         return self.__dict__ == other.__dict__
 
@@ -12,6 +12,7 @@ import datetime
 import os
 from builtins import object
 from concurrent.futures import ProcessPoolExecutor as ProcessPool
+from concurrent.futures import ThreadPoolExecutor as ThreadPool
 from future.utils import PY3
 from rasa_nlu.training_data import Message
 
@@ -20,13 +21,15 @@ from rasa_nlu.components import ComponentBuilder
 from rasa_nlu.config import RasaNLUModelConfig
 from rasa_nlu.evaluate import get_evaluation_metrics, clean_intent_labels
 from rasa_nlu.model import InvalidProjectError
-from rasa_nlu.project import Project
-from rasa_nlu.train import do_train_in_worker
+from rasa_nlu.project import Project, ParseCache, ModelResidency
+from rasa_nlu.train import do_train_job_in_worker
+from rasa_nlu.training_data import compiled
 from rasa_nlu.training_data.loading import load_data
-from twisted.internet import reactor
-from twisted.internet.defer import Deferred
+from rasa_nlu.training_jobs import TrainingScheduler, TrainingJob
+from twisted.internet import reactor, threads
+from twisted.internet.defer import Deferred, maybeDeferred, succeed
 from twisted.logger import jsonFileLogObserver, Logger
-from typing import Text, Dict, Any, Optional, List
+from typing import Text, Dict, Any, Optional, List, Tuple
 
 logger = logging.getLogger(__name__)
 
@@ -42,20 +45,12 @@ logger = logging.getLogger(__name__)
 # of wrapping them in `callFromThread`.
 DEFERRED_RUN_IN_REACTOR_THREAD = True
 
-
-class AlreadyTrainingError(Exception):
-    """Raised when a training is requested for a project that is
-       already training.
-
-    Attributes:
-        message -- explanation of why the request is invalid
-    """
-
-    def __init__(self):
-        self.message = 'The project is already being trained!'
-
-    def __str__(self):
-        return self.message
+# router of a parse worker process, created when the worker starts or by
+# the first request the worker receives (see `_get_worker_router`)
+_worker_router = None  # type: Optional[DataRouter]
+# models preloaded by the router of a parse worker process, `None` until
+# the worker preloaded its models
+_worker_preloaded = None  # type: Optional[List[Text]]
 
 
 def deferred_from_future(future):
@@ -92,25 +87,123 @@ class DataRouter(object):
                  response_log=None,
                  emulation_mode=None,
                  remote_storage=None,
-                 component_builder=None):
+                 component_builder=None,
+                 parse_cache_size=0,
+                 parse_cache_time_bucket=60,
+                 max_loaded_models=0,
+                 max_model_memory=0,
+                 parse_processes=0,
+                 max_train_queue=0,
+                 max_train_queue_per_project=0,
+                 training_data_cache_dir=None,
+                 training_data_cache_size=1024):
 
         self._training_processes = max(max_training_processes, 1)
         self.responses = self._create_query_logger(response_log)
         self.project_dir = config.make_path_absolute(project_dir)
         self.emulator = self._create_emulator(emulation_mode)
         self.remote_storage = remote_storage
+        # compiled training data of previous trainings and evaluations,
+        # the size limit is configured in MB
+        self.training_data_cache_dir = training_data_cache_dir
+        self.training_data_cache_size = training_data_cache_size
 
         if component_builder:
             self.component_builder = component_builder
         else:
             self.component_builder = ComponentBuilder(use_cache=True)
 
+        self.parse_cache = ParseCache(parse_cache_size,
+                                      parse_cache_time_bucket)
+        # the memory budget is configured in MB
+        self.residency = ModelResidency(max_loaded_models,
+                                        max_model_memory * 1024 * 1024)
         self.project_store = self._create_project_store(project_dir)
-        self.pool = ProcessPool(self._training_processes)
+        # the training processes and the scheduler are created on first use,
+        # so a router can be shared with forked server workers
+        # (see `rasa_nlu.server.run_forked_workers`)
+        self._pool = None  # type: Optional[ProcessPool]
+        self._training_scheduler = None  # type: Optional[TrainingScheduler]
+        self._max_train_queue = max_train_queue
+        self._max_train_queue_per_project = max_train_queue_per_project
+
+        # arguments used to create the routers of the parse workers
+        self._worker_config = {
+            "project_dir": project_dir,
+            "remote_storage": remote_storage,
+            "parse_cache_size": parse_cache_size,
+            "parse_cache_time_bucket": parse_cache_time_bucket,
+            "max_loaded_models": max_loaded_models,
+            "max_model_memory": max_model_memory,
+        }
+        self._parse_processes = parse_processes
+        self._parse_pool = None  # type: Optional[ProcessPool]
 
     def __del__(self):
         """Terminates workers pool processes"""
-        self.pool.shutdown()
+        self.shutdown()
+
+    def shutdown(self):
+        # type: () -> None
+        """Terminates the training and parse worker processes, waiting for
+        running trainings to finish."""
+
+        if self._pool is not None:
+            self._pool.shutdown()
+        if self._parse_pool is not None:
+            self._parse_pool.shutdown()
+
+    @property
+    def pool(self):
+        # type: () -> ProcessPool
+        """The training processes, created on first use."""
+
+        if self._pool is None:
+            self._pool = ProcessPool(self._training_processes)
+        return self._pool
+
+    @property
+    def training_scheduler(self):
+        # type: () -> TrainingScheduler
+        """The queue of training jobs, created on first use."""
+
+        if self._training_scheduler is None:
+            # trainings of the same project run one after another, as each
+            # of them might continue from the model trained before
+            self._training_scheduler = TrainingScheduler(
+                    self._run_training_job,
+                    max_running=self._training_processes,
+                    max_running_per_project=1,
+                    max_queued=self._max_train_queue,
+                    max_queued_per_project=self._max_train_queue_per_project)
+        return self._training_scheduler
+
+    @property
+    def uses_parse_workers(self):
+        # type: () -> bool
+        """Whether parse requests are handled by worker processes."""
+
+        return self._parse_processes > 0
+
+    @property
+    def parse_pool(self):
+        # type: () -> Optional[ProcessPool]
+        """The parse worker processes, created on first use.
+
+        Every worker creates its router and preloads its models (see
+        `preload`) when it starts, if the python version supports
+        initializing the workers of a pool. Otherwise it does so before it
+        handles its first request."""
+
+        if self._parse_pool is None and self.uses_parse_workers:
+            try:
+                self._parse_pool = ProcessPool(
+                        self._parse_processes,
+                        initializer=_get_worker_router,
+                        initargs=(self._worker_config,))
+            except TypeError:
+                self._parse_pool = ProcessPool(self._parse_processes)
+        return self._parse_pool
 
     @staticmethod
     def _create_query_logger(response_log):
@@ -161,13 +254,17 @@ class DataRouter(object):
             project_store[project] = Project(self.component_builder,
                                              project,
                                              self.project_dir,
-                                             self.remote_storage)
+                                             self.remote_storage,
+                                             self.parse_cache,
+                                             self.residency)
 
         if not project_store:
             default_model = RasaNLUModelConfig.DEFAULT_PROJECT_NAME
             project_store[default_model] = Project(
                     project_dir=self.project_dir,
-                    remote_storage=self.remote_storage)
+                    remote_storage=self.remote_storage,
+                    parse_cache=self.parse_cache,
+                    residency=self.residency)
         return project_store
 
     def _list_projects_in_cloud(self):
@@ -208,9 +305,10 @@ class DataRouter(object):
     def extract(self, data):
         return self.emulator.normalise_request_json(data)
 
-    def parse(self, data):
-        project = data.get("project", RasaNLUModelConfig.DEFAULT_PROJECT_NAME)
-        model = data.get("model")
+    def _ensure_project_loaded(self, project):
+        # type: (Text) -> None
+        """Adds a project to the project store if it exists on disk or in
+        the cloud but wasn't loaded yet."""
 
         if project not in self.project_store:
             projects = self._list_projects(self.project_dir)
@@ -225,23 +323,215 @@ class DataRouter(object):
                 try:
                     self.project_store[project] = Project(
                             self.component_builder, project,
-                            self.project_dir, self.remote_storage)
+                            self.project_dir, self.remote_storage,
+                            self.parse_cache, self.residency)
                 except Exception as e:
                     raise InvalidProjectError(
                         "Unable to load project '{}'. Error: {}".format(
                             project, e))
 
+    def _models_to_preload(self, preload):
+        # type: (Any) -> List[Tuple[Text, Optional[Text]]]
+        """Resolves a preload specification to (project, model) pairs.
+
+        A model of `None` stands for the latest model of the project."""
+
+        if preload == "all":
+            return [(name, model)
+                    for name, project in self.project_store.items()
+                    for model in project.as_dict()["available_models"]]
+        elif preload == "latest":
+            return [(name, None) for name in self.project_store]
+
+        to_preload = []
+        for spec in preload:
+            project, _, model = spec.partition("/")
+            if project not in self.project_store:
+                logger.warning("Can not preload '{}', the project does "
+                               "not exist.".format(spec))
+            else:
+                to_preload.append((project, model or None))
+        return to_preload
+
+    def preload(self, preload, warmup_utterances=None, num_threads=1,
+                fork_safe_only=False, exclude=None):
+        # type: (Any, Optional[List[Text]], int, bool, Optional[List[Text]]) -> List[Text]
+        """Loads and warms up models before the server accepts requests.
+
+        `preload` is either `"all"` (all models of all projects),
+        `"latest"` (the latest model of every project) or a list of
+        `project` / `project/model` names. Models are loaded in parallel
+        using `num_threads` threads. Returns the names of the loaded
+        models.
+
+        If parse requests are handled by worker processes, the models are
+        preloaded in the workers instead of this process. Every worker
+        preloads them exactly once before it handles any request.
+
+        With `fork_safe_only` models which can not be shared with forked
+        processes (see `Project.is_fork_safe`) are skipped, as are the
+        `project/model` names in `exclude` (e.g. unloaded models)."""
+
+        if self.uses_parse_workers:
+            self._worker_config["preload"] = {
+                "preload": preload,
+                "warmup_utterances": warmup_utterances,
+                "num_threads": num_threads}
+            # starts the workers, waiting for them is only a best effort
+            # to have all workers warmed up before the server starts, as
+            # the pool might hand several of the tasks to the same worker
+            futures = [self.parse_pool.submit(do_preload_in_worker,
+                                              self._worker_config)
+                       for _ in range(self._parse_processes)]
+            loaded = []
+            for future in futures:
+                loaded.extend(name
+                              for name in future.result()
+                              if name not in loaded)
+            return loaded
+
+        to_preload = self._models_to_preload(preload)
+        if fork_safe_only:
+            unsafe = [(project, model) for project, model in to_preload
+                      if not self.project_store[project].is_fork_safe(model)]
+            if unsafe:
+                logger.info("Not preloading {} models before forking, they "
+                            "can not be shared with forked processes: {}"
+                            "".format(len(unsafe), unsafe))
+            to_preload = [spec for spec in to_preload if spec not in unsafe]
+        if exclude:
+            to_preload = [
+                (project, model) for project, model in to_preload
+                if "{}/{}".format(project, model or self.project_store[
+                    project].resolve_model_name()) not in exclude]
+
+        def load(project, model):
+            model = self.project_store[project].warm_up(model,
+                                                        warmup_utterances)
+            return "{}/{}".format(project, model)
+
+        loaded = []
+        pool = ThreadPool(max(num_threads, 1))
+        try:
+            futures = [(project, model, pool.submit(load, project, model))
+                       for project, model in to_preload]
+            for project, model, future in futures:
+                try:
+                    loaded.append(future.result())
+                except Exception as e:
+                    logger.error("Failed to preload model '{}' of project "
+                                 "'{}'. {}".format(model, project, e))
+        finally:
+            pool.shutdown()
+
+        logger.info("Preloaded {} models: {}".format(len(loaded), loaded))
+        return loaded
+
+    def parse(self, data):
+        project = data.get("project", RasaNLUModelConfig.DEFAULT_PROJECT_NAME)
+        model = data.get("model")
+
+        self._ensure_project_loaded(project)
+
         time = data.get('time')
         response, used_model = self.project_store[project].parse(data['text'],
                                                                  time,
                                                                  model)
 
-        if self.responses:
-            self.responses.info('', user_input=response, project=project,
-                                model=used_model)
+        self._log_responses([response], project, used_model)
 
         return self.format_response(response)
 
+    def _log_responses(self, responses, project, model):
+        if self.responses:
+            for response in responses:
+                self.responses.info('', user_input=response, project=project,
+                                    model=model)
+
+    def _submit_to_parse_worker(self, data):
+        # type: (List[Dict[Text, Any]]) -> Deferred
+        """Sends the texts of the requests to a parse worker process.
+
+        Only the texts, times and the project and model names are sent to
+        the worker, which sends back the raw parse results. Logging and
+        formatting the results happens in this process."""
+
+        project = data[0].get("project",
+                              RasaNLUModelConfig.DEFAULT_PROJECT_NAME)
+
+        def resolve_model():
+            # the worker might not know about recently trained models yet.
+            # hence the model name gets resolved here, an unknown model name
+            # makes the worker refresh its list of models.
+            self._ensure_project_loaded(project)
+            return self.project_store[project].resolve_model_name(
+                    data[0].get("model"))
+
+        def submit(model):
+            future = self.parse_pool.submit(do_parse_in_worker,
+                                            self._worker_config,
+                                            project, model,
+                                            [d['text'] for d in data],
+                                            [d.get('time') for d in data])
+            return deferred_from_future(future)
+
+        def format_responses(result):
+            responses, used_model = result
+            self._log_responses(responses, project, used_model)
+            return [self.format_response(r) for r in responses]
+
+        # resolving the model might list the models in the remote storage,
+        # which must not block the reactor
+        if DEFERRED_RUN_IN_REACTOR_THREAD:
+            resolved = threads.deferToThread(resolve_model)
+        else:
+            resolved = maybeDeferred(resolve_model)
+        return resolved.addCallback(submit).addCallback(format_responses)
+
+    def parse_in_worker(self, data):
+        # type: (Dict[Text, Any]) -> Deferred
+        """Parses the request in a parse worker process.
+
+        Returns a deferred of the formatted response."""
+
+        return self._submit_to_parse_worker([data]).addCallback(
+                lambda responses: responses[0])
+
+    def parse_batch_in_worker(self, data):
+        # type: (List[Dict[Text, Any]]) -> Deferred
+        """Parses the requests (see `parse_batch`) in a parse worker process.
+
+        Returns a deferred of the formatted responses."""
+
+        if not data:
+            return succeed([])
+        return self._submit_to_parse_worker(data)
+
+    def parse_batch(self, data):
+        # type: (List[Dict[Text, Any]]) -> List[Any]
+        """Parses a list of requests that target the same project and model.
+
+        All texts are passed to the interpreter at once, which allows the
+        pipeline components to process them as a single batch."""
+
+        if not data:
+            return []
+
+        project = data[0].get("project",
+                              RasaNLUModelConfig.DEFAULT_PROJECT_NAME)
+        model = data[0].get("model")
+
+        self._ensure_project_loaded(project)
+
+        texts = [d['text'] for d in data]
+        times = [d.get('time') for d in data]
+        responses, used_model = self.project_store[project].parse_batch(
+                texts, times, model)
+
+        self._log_responses(responses, project, used_model)
+
+        return [self.format_response(response) for response in responses]
+
     @staticmethod
     def _list_projects(path):
         """List the projects in the path, ignoring hidden directories."""
@@ -252,14 +542,10 @@ class DataRouter(object):
         # type: (Optional[List[Message]], Text, Text) -> List[Dict[Text, Text]]
         """Parses a list of training examples to the project interpreter"""
 
-        predictions = []
-        for ex in examples:
-            logger.debug("Going to parse: {}".format(ex.as_dict()))
-            response, _ = self.project_store[project].parse(ex.text,
-                                                            None,
-                                                            model)
-            logger.debug("Received response: {}".format(response))
-            predictions.append(response)
+        logger.debug("Going to parse {} examples".format(len(examples)))
+        predictions, _ = self.project_store[project].parse_batch(
+                [ex.text for ex in examples], None, model)
+        logger.debug("Received {} responses".format(len(predictions)))
 
         return predictions
 
@@ -275,51 +561,123 @@ class DataRouter(object):
             "available_projects": {
                 name: project.as_dict()
                 for name, project in self.project_store.items()
-            }
+            },
+            "parse_cache": self.parse_cache.as_dict(),
+            "model_residency": self.residency.as_dict(),
+            "training_jobs": self.training_scheduler.as_dict()
         }
 
-    def start_train_process(self, data_file, project, train_config):
-        # type: (Text, Text, RasaNLUModelConfig) -> Deferred
-        """Start a model training."""
+    def start_train_process(self,
+                            data_file,  # type: Text
+                            project,  # type: Text
+                            train_config,  # type: RasaNLUModelConfig
+                            warm_start=False,  # type: bool
+                            priority=0  # type: int
+                            ):
+        # type: (...) -> Deferred
+        """Start a model training and wait for it to finish.
+
+        Returns a deferred of the name of the trained model."""
+
+        return self.submit_training_job(data_file, project, train_config,
+                                        warm_start, priority).wait()
+
+    def submit_training_job(self,
+                            data_file,  # type: Text
+                            project,  # type: Text
+                            train_config,  # type: RasaNLUModelConfig
+                            warm_start=False,  # type: bool
+                            priority=0  # type: int
+                            ):
+        # type: (...) -> TrainingJob
+        """Queue a model training.
+
+        With `warm_start` the training continues from the latest model of
+        the project at the time the training starts, if there is one. Jobs
+        with a higher `priority` are started first."""
 
         if not project:
             raise InvalidProjectError("Missing project name to train")
 
-        if project in self.project_store:
-            if self.project_store[project].status == 1:
-                raise AlreadyTrainingError
-            else:
-                self.project_store[project].status = 1
-        elif project not in self.project_store:
+        job = self.training_scheduler.submit(
+                project,
+                {"data_file": data_file,
+                 "train_config": train_config,
+                 "warm_start": warm_start},
+                priority)
+        return job
+
+    def training_job(self, job_id):
+        # type: (Text) -> Optional[TrainingJob]
+        return self.training_scheduler.get(job_id)
+
+    def cancel_training_job(self, job_id):
+        # type: (Text) -> Optional[TrainingJob]
+        """Cancel a queued training, running trainings are not stopped."""
+
+        return self.training_scheduler.cancel(job_id)
+
+    def _run_training_job(self, job):
+        # type: (TrainingJob) -> Deferred
+        """Trains the model of a job in one of the training processes."""
+
+        project = job.project
+        if project not in self.project_store:
             self.project_store[project] = Project(
                     self.component_builder, project,
-                    self.project_dir, self.remote_storage)
-            self.project_store[project].status = 1
+                    self.project_dir, self.remote_storage,
+                    self.parse_cache, self.residency)
+        self.project_store[project].status = 1
 
-        def training_callback(model_path):
+        def training_callback(result):
+            model_path, peak_rss = result
             model_dir = os.path.basename(os.path.normpath(model_path))
             self.project_store[project].update(model_dir)
-            return model_dir
+            return model_dir, peak_rss
 
         def training_errback(failure):
             logger.warn(failure)
-            target_project = self.project_store.get(
-                failure.value.failed_target_project)
-            if target_project:
-                target_project.status = 0
+            self.project_store[project].status = 0
             return failure
 
-        logger.debug("New training queued")
+        if job.arguments["warm_start"]:
+            warm_start_from = self.project_store[project].latest_model_dir()
+        else:
+            warm_start_from = None
 
-        result = self.pool.submit(do_train_in_worker,
-                                  train_config,
-                                  data_file,
+        result = self.pool.submit(do_train_job_in_worker,
+                                  job.arguments["train_config"],
+                                  job.arguments["data_file"],
                                   path=self.project_dir,
-                                  project=project)
+                                  project=project,
+                                  warm_start_from=warm_start_from,
+                                  training_data_cache_dir=(
+                                      self.training_data_cache_dir))
         result = deferred_from_future(result)
-        result.addCallback(training_callback)
-        result.addErrback(training_errback)
+        result.addCallbacks(training_callback, training_errback)
+        result.addBoth(self._prune_training_data_cache)
+        return result
 
+    def _prune_training_data_cache(self, result=None):
+        """Removes the least recently used compiled training data if the
+        cache dir exceeds its size limit.
+
+        Passes on `result`, so it can be used as a callback."""
+
+        if (self.training_data_cache_dir and
+                self.training_data_cache_size > 0 and
+                os.path.isdir(self.training_data_cache_dir)):
+            try:
+                removed = compiled.prune_cache_dir(
+                        self.training_data_cache_dir,
+                        self.training_data_cache_size * 1024 * 1024)
+                if removed:
+                    logger.debug("Removed {} compiled training data files "
+                                 "from the cache".format(removed))
+            except Exception as e:
+                logger.warning("Failed to prune the training data cache "
+                               "'{}': {}".format(self.training_data_cache_dir,
+                                                 e))
         return result
 
     def evaluate(self, data, project=None, model=None):
@@ -329,7 +687,9 @@ class DataRouter(object):
         project = project or RasaNLUModelConfig.DEFAULT_PROJECT_NAME
         model = model or None
         file_name = utils.create_temporary_file(data, "_training_data")
-        test_data = load_data(file_name)
+        test_data = load_data(file_name,
+                              cache_dir=self.training_data_cache_dir)
+        self._prune_training_data_cache()
 
         if project not in self.project_store:
             raise InvalidProjectError("Project {} could not "
@@ -377,7 +737,69 @@ class DataRouter(object):
 
         try:
             unloaded_model = self.project_store[project].unload(model)
-            return unloaded_model
         except KeyError:
             raise InvalidProjectError("Failed to unload model {} "
                                       "for project {}.".format(model, project))
+
+        if self.uses_parse_workers:
+            self._restart_parse_workers("{}/{}".format(project,
+                                                       unloaded_model))
+        return unloaded_model
+
+    def _restart_parse_workers(self, unloaded_model):
+        # type: (Text) -> None
+        """Replaces the parse workers, as each of them holds its own copy
+        of the unloaded model.
+
+        The new workers start with the next parse request and don't
+        preload the unloaded model again."""
+
+        preload = self._worker_config.get("preload")
+        if preload is not None:
+            preload["exclude"] = (preload.get("exclude") or []) + [
+                unloaded_model]
+
+        if self._parse_pool is not None:
+            # requests handed to the old workers are still answered
+            self._parse_pool.shutdown(wait=False)
+            self._parse_pool = None
+
+
+def _get_worker_router(router_config):
+    # type: (Dict[Text, Any]) -> DataRouter
+    """Returns the router of a parse worker process.
+
+    If the config contains preload settings (see `DataRouter.preload`),
+    the worker preloads its models once, before it handles requests."""
+
+    global _worker_router, _worker_preloaded
+
+    if _worker_router is None:
+        _worker_router = DataRouter(**{key: value
+                                       for key, value in router_config.items()
+                                       if key != "preload"})
+    if _worker_preloaded is None and router_config.get("preload"):
+        _worker_preloaded = _worker_router.preload(**router_config["preload"])
+    return _worker_router
+
+
+def do_preload_in_worker(router_config):
+    # type: (Dict[Text, Any]) -> List[Text]
+    """Preloads models inside of a parse worker process.
+
+    Returns the models the worker preloaded."""
+
+    _get_worker_router(router_config)
+    return _worker_preloaded or []
+
+
+def do_parse_in_worker(router_config, project, model, texts, times):
+    # type: (Dict[Text, Any], Text, Text, List[Text], List[Any]) -> Tuple[List[Dict[Text, Any]], Text]
+    """Parses texts inside of a parse worker process.
+
+    The worker keeps its own router (and therefore its own loaded
+    interpreters) for the lifetime of the process."""
+
+    router = _get_worker_router(router_config)
+    router._ensure_project_loaded(project)
+    return router.project_store[project].parse_batch(texts, times, model)
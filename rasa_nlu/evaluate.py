@@ -57,6 +57,11 @@ def create_argument_parser():
     parser.add_argument('-f', '--folds', required=False, default=10,
                         help="number of CV folds (crossvalidation only)")
 
+    parser.add_argument('--cache_training_data', action='store_true',
+                        help="compile the parsed data into a binary file "
+                             "next to it and reuse it while the data does "
+                             "not change")
+
     utils.add_logging_option_arguments(parser, default=logging.INFO)
 
     return parser
@@ -155,7 +160,8 @@ def drop_intents_below_freq(td, cutoff=5):
                      for ex in td.intent_examples
                      if td.examples_per_intent[ex.get("intent")] >= cutoff]
 
-    return TrainingData(keep_examples, td.entity_synonyms, td.regex_features)
+    return TrainingData(keep_examples, td.entity_synonyms, td.regex_features,
+                        td.lookup_tables)
 
 
 def evaluate_intents(targets, predictions):  # pragma: no cover
@@ -496,13 +502,15 @@ def remove_duckling_entities(entity_predictions):
 
 
 def run_evaluation(data_path, model_path,
-                   component_builder=None):  # pragma: no cover
+                   component_builder=None,
+                   use_cache=False):  # pragma: no cover
     """Evaluate intent classification and entity extraction."""
 
     # get the metadata config from the package data
     interpreter = Interpreter.load(model_path, component_builder)
     test_data = training_data.load_data(data_path,
-                                        interpreter.model_metadata.language)
+                                        interpreter.model_metadata.language,
+                                        use_cache=use_cache)
     extractors = get_entity_extractors(interpreter)
     entity_predictions, tokens = get_entity_predictions(interpreter,
                                                         test_data)
@@ -537,10 +545,12 @@ def generate_folds(n, td):
         test = [x[i] for i in test_index]
         yield (TrainingData(training_examples=train,
                             entity_synonyms=td.entity_synonyms,
-                            regex_features=td.regex_features),
+                            regex_features=td.regex_features,
+                            lookup_tables=td.lookup_tables),
                TrainingData(training_examples=test,
                             entity_synonyms=td.entity_synonyms,
-                            regex_features=td.regex_features))
+                            regex_features=td.regex_features,
+                            lookup_tables=td.lookup_tables))
 
 
 def combine_intent_result(results, interpreter, data):
@@ -699,7 +709,9 @@ if __name__ == '__main__':  # pragma: no cover
                          "you need to specify a model configuration.")
 
         nlu_config = config.load(cmdline_args.config)
-        data = training_data.load_data(cmdline_args.data)
+        data = training_data.load_data(
+                cmdline_args.data,
+                use_cache=cmdline_args.cache_training_data)
         data = drop_intents_below_freq(data, cutoff=5)
         results, entity_results = run_cv_evaluation(
                 data, int(cmdline_args.folds), nlu_config)
@@ -715,6 +727,7 @@ if __name__ == '__main__':  # pragma: no cover
             return_entity_results(entity_results.test, "test")
 
     elif cmdline_args.mode == "evaluation":
-        run_evaluation(cmdline_args.data, cmdline_args.model)
+        run_evaluation(cmdline_args.data, cmdline_args.model,
+                       use_cache=cmdline_args.cache_training_data)
 
     logger.info("Finished evaluation")
@@ -55,7 +55,15 @@ class CRFEntityExtractor(EntityExtractor):
         "L1_c": 1,
 
         # weight of the L2 regularization
-        "L2_c": 1e-3
+        "L2_c": 1e-3,
+
+        # `max_iterations`, `L1_c` and `L2_c` can also be lists of values,
+        # then the best combination is selected by cross validation.
+        # "grid" tries all combinations, "random" samples
+        # `search_candidates` of them
+        "search": "grid",
+        "search_candidates": 10,
+        "max_cross_validation_folds": 5
     }
 
     function_dict = {
@@ -78,8 +86,11 @@ class CRFEntityExtractor(EntityExtractor):
         super(CRFEntityExtractor, self).__init__(component_config)
 
         self.ent_tagger = ent_tagger
+        # results of the hyperparameter search, if there was one
+        self.search_report = None
 
         self._validate_configuration()
+        self._feature_templates = self._create_feature_templates()
 
     def _validate_configuration(self):
         if len(self.component_config.get("features", [])) % 2 != 1:
@@ -96,6 +107,7 @@ class CRFEntityExtractor(EntityExtractor):
         self.component_config = config.for_component(self.name, self.defaults)
 
         self._validate_configuration()
+        self._feature_templates = self._create_feature_templates()
 
         # checks whether there is at least one
         # example with an entity annotation
@@ -110,7 +122,7 @@ class CRFEntityExtractor(EntityExtractor):
             # without annotations
             dataset = self._create_dataset(filtered_entity_examples)
 
-            self._train_model(dataset)
+            self._train_model(dataset, kwargs.get("num_threads", 1))
 
     def _create_dataset(self, examples):
         # type: (List[Message]) -> List[List[Tuple[Text, Text, Text, Text]]]
@@ -328,23 +340,43 @@ class CRFEntityExtractor(EntityExtractor):
 
             joblib.dump(self.ent_tagger, model_file_name)
 
+        if self.search_report:
+            return {"classifier_file": CRF_MODEL_FILE_NAME,
+                    "search_report": self.search_report}
         return {"classifier_file": CRF_MODEL_FILE_NAME}
 
+    def _create_feature_templates(self):
+        # type: () -> List[Tuple[int, List[Tuple[Text, Text]]]]
+        """Creates the feature names for each position of the window.
+
+        Returns a list of `(offset, [(feature name, feature)])` with the
+        offset of the word relative to the current word, e.g. word
+        before(-1), current word(0), next word(+1)."""
+
+        configured_features = self.component_config["features"]
+        half_span = len(configured_features) // 2
+        return [(f_i, [("{}:{}".format(f_i, feature), feature)
+                       for feature in configured_features[f_i + half_span]])
+                for f_i in range(- half_span, half_span + 1)]
+
     def _sentence_to_features(self, sentence):
         # type: (List[Tuple[Text, Text, Text, Text]]) -> List[Dict[Text, Any]]
         """Convert a word into discrete features in self.crf_features,
         including word before and word after."""
 
-        configured_features = self.component_config["features"]
+        # every feature is computed once per word, even if it is used for
+        # several positions of the window
+        used_features = {feature
+                         for _, names in self._feature_templates
+                         for _, feature in names}
+        values = {feature: [self.function_dict[feature](word)
+                            for word in sentence]
+                  for feature in used_features}
+
         sentence_features = []
         for word_idx in range(len(sentence)):
-            # word before(-1), current word(0), next word(+1)
-            feature_span = len(configured_features)
-            half_span = feature_span // 2
-            feature_range = range(- half_span, half_span + 1)
-            prefixes = [str(i) for i in feature_range]
             word_features = {}
-            for f_i in feature_range:
+            for f_i, names in self._feature_templates:
                 if word_idx + f_i >= len(sentence):
                     word_features['EOS'] = True
                     # End Of Sentence
@@ -352,14 +384,9 @@ class CRFEntityExtractor(EntityExtractor):
                     word_features['BOS'] = True
                     # Beginning Of Sentence
                 else:
-                    word = sentence[word_idx + f_i]
-                    f_i_from_zero = f_i + half_span
-                    prefix = prefixes[f_i_from_zero]
-                    features = configured_features[f_i_from_zero]
-                    for feature in features:
+                    for name, feature in names:
                         # append each feature to a feature vector
-                        value = self.function_dict[feature](word)
-                        word_features[prefix + ":" + feature] = value
+                        word_features[name] = values[feature][word_idx + f_i]
             sentence_features.append(word_features)
         return sentence_features
 
@@ -395,16 +422,8 @@ class CRFEntityExtractor(EntityExtractor):
         return self._from_text_to_crf(message, ents)
 
     @staticmethod
-    def __pattern_of_token(message, i):
-        if message.get("tokens"):
-            return message.get("tokens")[i].get("pattern")
-        else:
-            return None
-
-    @staticmethod
-    def __tag_of_token(token):
-        import spacy
-        if spacy.about.__version__ > "2" and token._.has("tag"):
+    def __tag_of_token(token, custom_tags):
+        if custom_tags and token._.has("tag"):
             return token._.get("tag")
         else:
             return token.tag_
@@ -412,31 +431,111 @@ class CRFEntityExtractor(EntityExtractor):
     def _from_text_to_crf(self, message, entities=None):
         # type: (Message, List[Text]) -> List[Tuple[Text, Text, Text, Text]]
         """Takes a sentence and switches it to crfsuite format."""
+        import spacy
+
+        custom_tags = spacy.about.__version__ > "2"
+        tokens = message.get("tokens")
 
         crf_format = []
         for i, token in enumerate(message.get("spacy_doc")):
-            pattern = self.__pattern_of_token(message, i)
+            pattern = tokens[i].get("pattern") if tokens else None
             entity = entities[i] if entities else "N/A"
-            tag = self.__tag_of_token(token)
+            tag = self.__tag_of_token(token, custom_tags)
             crf_format.append((token.text, tag, entity, pattern))
         return crf_format
 
-    def _train_model(self, df_train):
-        # type: (List[List[Tuple[Text, Text, Text, Text]]]) -> None
+    def _search_space(self):
+        # type: () -> Dict[Text, List[Any]]
+        """Returns the crf parameters with their candidate values."""
+
+        space = {}
+        for param, key in [("c1", "L1_c"), ("c2", "L2_c"),
+                           ("max_iterations", "max_iterations")]:
+            value = self.component_config[key]
+            space[param] = value if isinstance(value, list) else [value]
+        return space
+
+    def _train_model(self, df_train, num_threads=1):
+        # type: (List[List[Tuple[Text, Text, Text, Text]]], int) -> None
         """Train the crf tagger based on the training data."""
         import sklearn_crfsuite
 
+        # features are extracted once and shared by all search candidates
         X_train = [self._sentence_to_features(sent) for sent in df_train]
         y_train = [self._sentence_to_labels(sent) for sent in df_train]
-        self.ent_tagger = sklearn_crfsuite.CRF(
+
+        space = self._search_space()
+        crf = sklearn_crfsuite.CRF(
                 algorithm='lbfgs',
                 # coefficient for L1 penalty
-                c1=self.component_config["L1_c"],
+                c1=space["c1"][0],
                 # coefficient for L2 penalty
-                c2=self.component_config["L2_c"],
+                c2=space["c2"][0],
                 # stop earlier
-                max_iterations=self.component_config["max_iterations"],
+                max_iterations=space["max_iterations"][0],
                 # include transitions that are possible, but not observed
                 all_possible_transitions=True
         )
-        self.ent_tagger.fit(X_train, y_train)
+
+        cv_splits = min(self.component_config["max_cross_validation_folds"],
+                        len(X_train))
+        num_candidates = 1
+        for values in space.values():
+            num_candidates *= len(values)
+        if num_candidates > 1 and cv_splits >= 2:
+            search = self._create_search(crf, space, y_train,
+                                         num_threads, cv_splits)
+            search.fit(X_train, y_train)
+            self.ent_tagger = search.best_estimator_
+            self.search_report = self._search_report(search)
+            logger.info("Best crf parameters: {} (f1 score: {:.3f})"
+                        "".format(search.best_params_, search.best_score_))
+        else:
+            self.ent_tagger = crf
+            self.ent_tagger.fit(X_train, y_train)
+
+    def _create_search(self, crf, space, y_train, num_threads, cv_splits):
+        from sklearn.metrics import make_scorer
+        from sklearn.model_selection import GridSearchCV, RandomizedSearchCV
+        from sklearn_crfsuite import metrics
+
+        # the frequent `O` label would dominate the score
+        labels = sorted({label
+                         for labels in y_train
+                         for label in labels} - {"O"})
+        scorer = make_scorer(metrics.flat_f1_score,
+                             average='weighted', labels=labels)
+
+        if self.component_config["search"] == "random":
+            return RandomizedSearchCV(
+                    crf,
+                    param_distributions=space,
+                    n_iter=self.component_config["search_candidates"],
+                    n_jobs=num_threads,
+                    cv=cv_splits,
+                    scoring=scorer,
+                    random_state=2018,
+                    verbose=1)
+        else:
+            return GridSearchCV(crf,
+                                param_grid=space,
+                                n_jobs=num_threads,
+                                cv=cv_splits,
+                                scoring=scorer,
+                                verbose=1)
+
+    @staticmethod
+    def _search_report(search):
+        # type: (Any) -> Dict[Text, Any]
+        """Summarises the scores of the search candidates."""
+
+        results = search.cv_results_
+        candidates = [{"params": params,
+                       "mean_score": float(mean),
+                       "std_score": float(std)}
+                      for params, mean, std in zip(results["params"],
+                                                   results["mean_test_score"],
+                                                   results["std_test_score"])]
+        return {"best_params": search.best_params_,
+                "best_score": float(search.best_score_),
+                "candidates": candidates}
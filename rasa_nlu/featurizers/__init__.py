@@ -8,13 +8,59 @@ import numpy as np
 from rasa_nlu.components import Component
 
 
+def is_sparse(features):
+    """Checks if the features are a `scipy.sparse` matrix.
+
+    Scipy is only required by the featurizers creating sparse features,
+    if it is not installed the features can't be sparse."""
+
+    try:
+        import scipy.sparse
+        return scipy.sparse.issparse(features)
+    except ImportError:
+        return False
+
+
+def stack_text_features(messages):
+    """Stacks the text features of the messages, one row per message.
+
+    The result is a sparse (csr) matrix if any of the features is sparse,
+    otherwise a dense array."""
+
+    features = [message.get("text_features") for message in messages]
+
+    if any(is_sparse(f) for f in features):
+        import scipy.sparse
+        return scipy.sparse.vstack([scipy.sparse.csr_matrix(f.reshape(1, -1))
+                                    if not is_sparse(f) else f
+                                    for f in features], format="csr")
+    else:
+        return np.vstack([f.reshape(1, -1) for f in features])
+
+
+def to_dense(features):
+    """Converts sparse features to a dense array, dense ones are kept."""
+
+    if is_sparse(features):
+        return features.toarray()
+    else:
+        return features
+
+
 class Featurizer(Component):
 
     @staticmethod
     def _combine_with_existing_text_features(message,
                                              additional_features):
-        if message.get("text_features") is not None:
-            return np.hstack((message.get("text_features"),
-                              additional_features))
-        else:
+        existing_features = message.get("text_features")
+        if existing_features is None:
             return additional_features
+        elif is_sparse(existing_features) or is_sparse(additional_features):
+            # keep sparse features sparse, dense ones are usually small
+            import scipy.sparse
+            return scipy.sparse.hstack(
+                    [f if is_sparse(f) else np.reshape(f, (1, -1))
+                     for f in (existing_features, additional_features)],
+                    format="csr")
+        else:
+            return np.hstack((existing_features, additional_features))
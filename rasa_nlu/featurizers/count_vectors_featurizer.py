@@ -101,6 +101,9 @@ class CountVectorsFeaturizer(Featurizer):
         # declare class instance for CountVect
         self.vect = None
 
+        # vocabulary of the previous model when warm starting
+        self._previous_vocabulary = None
+
         # preprocessor
         self.preprocessor = lambda s: re.sub(r'\b[0-9]+\b', 'NUMBER', s)
 
@@ -109,8 +112,19 @@ class CountVectorsFeaturizer(Featurizer):
         # type: () -> List[Text]
         return ["sklearn"]
 
+    def warm_start(self, previous):
+        # type: (CountVectorsFeaturizer) -> None
+        """Keep the vocabulary of the previous model.
+
+        Words keep their index, so classifiers can continue training on
+        the features. Words that are new in the training data are added
+        after the known ones."""
+
+        if previous.vect is not None:
+            self._previous_vocabulary = previous.vect.vocabulary_
+
     def train(self, training_data, cfg=None, **kwargs):
-        # type: (TrainingData, RasaNLUModelConfig, **Any) -> None
+        # type: (TrainingData, RasaNLUModelConfig, **Any) -> Optional[Dict]
         """Take parameters from config and
             construct a new count vectorizer using the sklearn framework."""
         from sklearn.feature_extraction.text import CountVectorizer
@@ -130,24 +144,49 @@ class CountVectorsFeaturizer(Featurizer):
                    for example in training_data.intent_examples]
 
         try:
-            X = self.vect.fit_transform(lem_exs).toarray()
+            # the bag of words stays sparse, a dense bag would need
+            # memory for every word of the vocabulary
+            X = self.vect.fit_transform(lem_exs).tocsr()
         except ValueError:
             self.vect = None
             return
 
+        if self._previous_vocabulary is not None:
+            vocabulary = dict(self._previous_vocabulary)
+            for word in sorted(self.vect.vocabulary_,
+                               key=self.vect.vocabulary_.get):
+                if word not in vocabulary:
+                    vocabulary[word] = len(vocabulary)
+            self.vect.vocabulary_ = vocabulary
+            self._previous_vocabulary = None
+            X = self.vect.transform(lem_exs).tocsr()
+
         for i, example in enumerate(training_data.intent_examples):
             # create bag for each example
             example.set("text_features", X[i])
 
+        # lets classifiers find the features of other featurizers, which
+        # are appended to the bag of words
+        return {"bag_of_words_size": len(self.vect.vocabulary_)}
+
     def process(self, message, **kwargs):
         # type: (Message, **Any) -> None
+
+        self.process_batch([message], **kwargs)
+
+    def process_batch(self, messages, **kwargs):
+        # type: (List[Message], **Any) -> None
+        """Creates the bag of words of all messages with one `transform`."""
+
         if self.vect is None:
             logger.error("There is no trained CountVectorizer: "
                          "component is either not trained or "
                          "didn't receive enough training data")
         else:
-            bag = self.vect.transform([self._lemmatize(message)]).toarray()
-            message.set("text_features", bag)
+            lem_exs = [self._lemmatize(message) for message in messages]
+            X = self.vect.transform(lem_exs).tocsr()
+            for i, message in enumerate(messages):
+                message.set("text_features", X[i])
 
     @staticmethod
     def _lemmatize(message):
@@ -18,7 +18,7 @@ from typing import Any, Dict, List, Optional, Text
 
 from rasa_nlu import utils
 from rasa_nlu.config import RasaNLUModelConfig
-from rasa_nlu.featurizers import Featurizer
+from rasa_nlu.featurizers import Featurizer, is_sparse, stack_text_features
 from rasa_nlu.training_data import Message
 from rasa_nlu.training_data import TrainingData
 
@@ -318,14 +318,14 @@ class NGramFeaturizer(Featurizer):
     @staticmethod
     def _collect_features(examples):
         if examples:
-            collected_features = [e.get("text_features")
-                                  for e in examples
-                                  if e.get("text_features") is not None]
+            featurized = [e
+                          for e in examples
+                          if e.get("text_features") is not None]
         else:
-            collected_features = []
+            featurized = []
 
-        if collected_features:
-            return np.stack(collected_features)
+        if featurized:
+            return stack_text_features(featurized)
         else:
             return None
 
@@ -333,7 +333,11 @@ class NGramFeaturizer(Featurizer):
         ngrams_to_use = self._ngrams_to_use(max_ngrams)
         extras = np.array(self._ngrams_in_sentences(examples,
                                                     ngrams_to_use))
-        if existing_features is not None:
+        if existing_features is not None and is_sparse(existing_features):
+            import scipy.sparse
+            return scipy.sparse.hstack((existing_features, extras),
+                                       format="csr")
+        elif existing_features is not None:
             return np.hstack((existing_features, extras))
         else:
             return extras
@@ -5,17 +5,18 @@ from __future__ import unicode_literals
 
 import logging
 import os
-import re
-import warnings
 
 import typing
-from typing import Any, Dict, List, Optional, Text
+from typing import Any, Dict, List, Optional, Text, Tuple
 
 from rasa_nlu import utils
 from rasa_nlu.config import RasaNLUModelConfig
 from rasa_nlu.featurizers import Featurizer
 from rasa_nlu.training_data import Message
 from rasa_nlu.training_data import TrainingData
+from rasa_nlu.training_data.util import lookup_table_elements
+from rasa_nlu.utils.pattern_matching import (
+    LookupIndex, PatternMatcher, TokenIndex)
 
 import numpy as np
 
@@ -27,6 +28,13 @@ if typing.TYPE_CHECKING:
 
 REGEX_FEATURIZER_FILE_NAME = "regex_featurizer.json"
 
+LOOKUP_INDEX_DIR_NAME = "regex_featurizer_lookup"
+
+
+def _is_word_character(c):
+    # type: (Text) -> bool
+    return c.isalnum() or c == "_"
+
 
 class RegexFeaturizer(Featurizer):
     name = "intent_entity_featurizer_regex"
@@ -35,16 +43,37 @@ class RegexFeaturizer(Featurizer):
 
     requires = ["tokens"]
 
-    def __init__(self, component_config=None, known_patterns=None):
+    def __init__(self,
+                 component_config=None,
+                 known_patterns=None,
+                 lookup_tables=None,
+                 lookup_index=None):
         super(RegexFeaturizer, self).__init__(component_config)
 
         self.known_patterns = known_patterns if known_patterns else []
+        # names of the lookup tables, their elements are in the index
+        self.lookup_tables = lookup_tables if lookup_tables else []
+        self.lookup_index = lookup_index
+        self._matcher = None
+
+    def _pattern_matcher(self):
+        # type: () -> PatternMatcher
+        """Returns the matcher for the known patterns, compiling it once."""
+
+        if self._matcher is None:
+            self._matcher = PatternMatcher([p["pattern"]
+                                            for p in self.known_patterns])
+        return self._matcher
 
     def train(self, training_data, config, **kwargs):
         # type: (TrainingData, RasaNLUModelConfig, **Any) -> None
 
         for example in training_data.regex_features:
             self.known_patterns.append(example)
+        self._matcher = None
+
+        if training_data.lookup_tables:
+            self._build_lookup_index(training_data.lookup_tables)
 
         for example in training_data.training_examples:
             updated = self._text_features_with_regex(example)
@@ -56,6 +85,36 @@ class RegexFeaturizer(Featurizer):
         updated = self._text_features_with_regex(message)
         message.set("text_features", updated)
 
+    def _build_lookup_index(self, lookup_tables):
+        # type: (List[Dict[Text, Any]]) -> None
+        """Indexes the elements of the lookup tables.
+
+        Elements are matched case insensitive, hence they are lowercased."""
+
+        self.lookup_tables = [t["name"] for t in lookup_tables]
+        self.lookup_index = LookupIndex.build(
+                [(e.lower() for e in lookup_table_elements(t))
+                 for t in lookup_tables])
+        logger.info("Indexed {} lookup tables with {} elements."
+                    "".format(len(self.lookup_tables),
+                              len(self.lookup_index.string_lengths)))
+
+    def _lookup_matches(self, text):
+        # type: (Text) -> List[Tuple[int, int, int]]
+        """Finds the lookup table elements occurring as words in the text."""
+
+        lowered = text.lower()
+        if len(lowered) != len(text):
+            # lowercasing changed the offsets, fall back to exact matching
+            lowered = text
+
+        matches = []
+        for table_id, start, end in self.lookup_index.iter_matches(lowered):
+            if ((start == 0 or not _is_word_character(text[start - 1])) and
+                    (end == len(text) or not _is_word_character(text[end]))):
+                matches.append((table_id, start, end))
+        return matches
+
     def _text_features_with_regex(self, message):
         if self.known_patterns is not None:
             extras = self.features_for_patterns(message)
@@ -71,16 +130,29 @@ class RegexFeaturizer(Featurizer):
         message is tokenized, the function will mark the matching regex on
         the tokens that are part of the match."""
 
+        spans = self._pattern_matcher().search(message.text)
+        token_index = TokenIndex(message.get("tokens", []))
+
         found = []
-        for i, exp in enumerate(self.known_patterns):
-            match = re.search(exp["pattern"], message.text)
-            if match is not None:
-                for t in message.get("tokens", []):
-                    if t.offset < match.end() and t.end > match.start():
-                        t.set("pattern", i)
+        for i, span in enumerate(spans):
+            if span is not None:
+                for t in token_index.overlapping(*span):
+                    t.set("pattern", i)
                 found.append(1.0)
             else:
                 found.append(0.0)
+
+        if self.lookup_index is not None:
+            # lookup tables are numbered after the patterns, every
+            # occurrence of an element marks its tokens
+            lookup_found = [0.0] * len(self.lookup_tables)
+            matches = sorted(self._lookup_matches(message.text))
+            for table_id, start, end in matches:
+                for t in token_index.overlapping(start, end):
+                    t.set("pattern", len(self.known_patterns) + table_id)
+                lookup_found[table_id] = 1.0
+            found.extend(lookup_found)
+
         return np.array(found)
 
     @classmethod
@@ -98,9 +170,20 @@ class RegexFeaturizer(Featurizer):
 
         if os.path.exists(regex_file):
             known_patterns = utils.read_json_file(regex_file)
-            return RegexFeaturizer(meta, known_patterns=known_patterns)
         else:
-            return RegexFeaturizer(meta)
+            known_patterns = None
+
+        index_dir_name = meta.get("lookup_index")
+        if index_dir_name:
+            index_dir = os.path.join(model_dir, index_dir_name)
+            lookup_index = LookupIndex.load(index_dir, mmap=True)
+        else:
+            lookup_index = None
+
+        return RegexFeaturizer(meta,
+                               known_patterns=known_patterns,
+                               lookup_tables=meta.get("lookup_tables"),
+                               lookup_index=lookup_index)
 
     def persist(self, model_dir):
         # type: (Text) -> Optional[Dict[Text, Any]]
@@ -112,4 +195,11 @@ class RegexFeaturizer(Featurizer):
             regex_file = os.path.join(model_dir, REGEX_FEATURIZER_FILE_NAME)
             utils.write_json_to_file(regex_file, self.known_patterns, indent=4)
 
+        if self.lookup_index is not None:
+            index_dir = os.path.join(model_dir, LOOKUP_INDEX_DIR_NAME)
+            self.lookup_index.persist(index_dir)
+            return {"regex_file": REGEX_FEATURIZER_FILE_NAME,
+                    "lookup_index": LOOKUP_INDEX_DIR_NAME,
+                    "lookup_tables": self.lookup_tables}
+
         return {"regex_file": REGEX_FEATURIZER_FILE_NAME}
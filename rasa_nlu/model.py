@@ -3,10 +3,11 @@ from __future__ import division
 from __future__ import print_function
 from __future__ import unicode_literals
 
-import copy
 import datetime
 import logging
 import os
+import shutil
+import uuid
 
 from builtins import object
 from typing import Any
@@ -162,6 +163,28 @@ class Trainer(object):
 
         return pipeline
 
+    def warm_start(self, model_dir, component_builder=None):
+        # type: (Text, Optional[ComponentBuilder]) -> None
+        """Initializes the pipeline from a previously trained model.
+
+        Every component gets the chance to reuse the state of the component
+        of the old model at the same position of the pipeline. If the
+        pipelines differ, the components are trained from scratch."""
+
+        previous = Interpreter.load(model_dir, component_builder,
+                                    self.skip_validation)
+        previous_names = [c.name for c in previous.pipeline]
+        if previous_names != [c.name for c in self.pipeline]:
+            logger.warning("Can not warm start from model '{}', its "
+                           "pipeline differs. Training from scratch."
+                           "".format(model_dir))
+            return
+
+        logger.info("Warm starting from model '{}'".format(model_dir))
+        for component, previous_component in zip(self.pipeline,
+                                                 previous.pipeline):
+            component.warm_start(previous_component)
+
     def train(self, data, **kwargs):
         # type: (TrainingData) -> Interpreter
         """Trains the underlying pipeline using the provided training data."""
@@ -179,8 +202,9 @@ class Trainer(object):
         if not self.skip_validation:
             components.validate_arguments(self.pipeline, context)
 
-        # data gets modified internally during the training - hence the copy
-        working_data = copy.deepcopy(data)
+        # components set attributes of the examples during the training,
+        # the overlay keeps them out of the passed data
+        working_data = data.overlay()
 
         for i, component in enumerate(self.pipeline):
             logger.info("Starting to train component {}"
@@ -217,21 +241,35 @@ class Trainer(object):
 
         path = config.make_path_absolute(path)
         dir_name = os.path.join(path, project_name, model_name)
+        # the model is written to a hidden directory and moved in place once
+        # it is complete, servers (e.g. other worker processes) looking for
+        # new models never see a partially written one
+        tmp_dir_name = os.path.join(path, project_name, ".{}.{}".format(
+                model_name, uuid.uuid4().hex))
 
-        create_dir(dir_name)
-
-        if self.training_data:
-            metadata.update(self.training_data.persist(dir_name))
-
-        for component in self.pipeline:
-            update = component.persist(dir_name)
-            component_meta = component.component_config
-            if update:
-                component_meta.update(update)
-            component_meta["class"] = utils.module_path_from_object(component)
-            metadata["pipeline"].append(component_meta)
-
-        Metadata(metadata, dir_name).persist(dir_name)
+        create_dir(tmp_dir_name)
+        try:
+            if self.training_data:
+                metadata.update(self.training_data.persist(tmp_dir_name))
+
+            for component in self.pipeline:
+                update = component.persist(tmp_dir_name)
+                component_meta = component.component_config
+                if update:
+                    component_meta.update(update)
+                component_meta["class"] = utils.module_path_from_object(
+                        component)
+                metadata["pipeline"].append(component_meta)
+
+            Metadata(metadata, dir_name).persist(tmp_dir_name)
+
+            if os.path.isdir(dir_name):
+                # a model with a fixed name gets replaced
+                shutil.rmtree(dir_name)
+            os.rename(tmp_dir_name, dir_name)
+        except Exception:
+            shutil.rmtree(tmp_dir_name, ignore_errors=True)
+            raise
 
         if persistor is not None:
             persistor.persist(dir_name, model_name, project_name)
@@ -343,3 +381,38 @@ class Interpreter(object):
         output.update(message.as_dict(
                 only_output_properties=only_output_properties))
         return output
+
+    def parse_batch(self, texts, times=None, only_output_properties=True):
+        # type: (List[Text], Optional[List[Any]], bool) -> List[Dict[Text, Any]]
+        """Parse a list of texts, running each component once per batch.
+
+        The results are returned in the same order as the passed texts."""
+
+        if times is None:
+            times = [None] * len(texts)
+
+        outputs = [None] * len(texts)
+        messages = []
+        indices = []
+        for i, (text, time) in enumerate(zip(texts, times)):
+            if not text:
+                # see `parse` - empty texts are not passed to the pipeline
+                output = self.default_output_attributes()
+                output["text"] = ""
+                outputs[i] = output
+            else:
+                messages.append(Message(text,
+                                        self.default_output_attributes(),
+                                        time=time))
+                indices.append(i)
+
+        if messages:
+            for component in self.pipeline:
+                component.process_batch(messages, **self.context)
+
+        for i, message in zip(indices, messages):
+            output = self.default_output_attributes()
+            output.update(message.as_dict(
+                    only_output_properties=only_output_properties))
+            outputs[i] = output
+        return outputs
@@ -3,17 +3,21 @@ from __future__ import division
 from __future__ import print_function
 from __future__ import unicode_literals
 
+import copy
 import datetime
 import glob
 
 import os
 import logging
+import time as time_module
 
 from builtins import object
+from collections import OrderedDict, deque
+from concurrent.futures import Future
 from threading import Lock
 
 from rasa_nlu import utils
-from typing import Text, List
+from typing import Text, List, Optional, Any, Dict, Tuple
 
 from rasa_nlu.classifiers.keyword_intent_classifier import \
     KeywordIntentClassifier
@@ -26,20 +30,240 @@ MODEL_NAME_PREFIX = "model_"
 FALLBACK_MODEL_NAME = "fallback"
 
 
+class ParseCache(object):
+    """Size bounded LRU cache for parse responses.
+
+    Responses are stored per project, model, text and time bucket. The time
+    bucket makes sure time dependent results (e.g. extracted dates) are
+    not reused for longer than `time_bucket` seconds. A `max_size` of `0`
+    disables the cache."""
+
+    def __init__(self, max_size=0, time_bucket=60):
+        # type: (int, int) -> None
+
+        self.max_size = max_size
+        self.time_bucket = time_bucket
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()
+        self._lock = Lock()
+
+    @property
+    def enabled(self):
+        return self.max_size > 0
+
+    def _bucket(self, reference_time):
+        if reference_time is None:
+            seconds = time_module.time()
+        else:
+            try:
+                # reference times are passed as milliseconds since epoch
+                seconds = int(reference_time) / 1000.0
+            except (TypeError, ValueError):
+                return reference_time
+
+        if self.time_bucket:
+            return int(seconds // self.time_bucket)
+        else:
+            return seconds
+
+    def key(self, project, model, text, reference_time=None):
+        # type: (Text, Text, Text, Any) -> Tuple
+        """Creates the key under which a parse response gets stored.
+
+        The text is used as is, any change to it (e.g. lower casing) could
+        change the response (e.g. entity values or offsets)."""
+
+        return project, model, text, self._bucket(reference_time)
+
+    def get(self, key):
+        # type: (Tuple) -> Optional[Dict[Text, Any]]
+        """Returns a copy of the stored response or `None` on a miss."""
+
+        if not self.enabled:
+            return None
+
+        with self._lock:
+            response = self._entries.pop(key, None)
+            if response is None:
+                self.misses += 1
+                return None
+            else:
+                # re-insert to mark the entry as most recently used
+                self._entries[key] = response
+                self.hits += 1
+        return copy.deepcopy(response)
+
+    def put(self, key, response):
+        # type: (Tuple, Dict[Text, Any]) -> None
+
+        if not self.enabled:
+            return
+
+        response = copy.deepcopy(response)
+        with self._lock:
+            self._entries.pop(key, None)
+            self._entries[key] = response
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+
+    def invalidate(self, project, model=None):
+        # type: (Text, Optional[Text]) -> None
+        """Removes all responses of a project (or one of its models)."""
+
+        with self._lock:
+            stale = [key
+                     for key in self._entries
+                     if key[0] == project and (model is None or
+                                               key[1] == model)]
+            for key in stale:
+                del self._entries[key]
+
+    def as_dict(self):
+        return {"enabled": self.enabled,
+                "max_size": self.max_size,
+                "size": len(self._entries),
+                "hits": self.hits,
+                "misses": self.misses}
+
+
+def estimate_model_footprint(model_dir):
+    # type: (Optional[Text]) -> int
+    """Estimates the memory used by a loaded model in bytes.
+
+    The estimate is the size of the persisted model files, most components
+    (pickled sklearn models, tensorflow checkpoints) use roughly that
+    much memory once they are loaded."""
+
+    if not model_dir or not os.path.isdir(model_dir):
+        return 0
+    return sum(os.path.getsize(f) for f in utils.list_files(model_dir))
+
+
+class ModelResidency(object):
+    """Keeps the number and memory of loaded models within a budget.
+
+    Models are tracked across all projects of a server. Once a budget is
+    exceeded, the least recently used models get unloaded. A budget of
+    `0` means unlimited, if both budgets are unlimited nothing is tracked."""
+
+    # number of recently evicted models reported in the status
+    MAX_EVICTED_HISTORY = 20
+
+    def __init__(self, max_models=0, max_memory=0):
+        # type: (int, int) -> None
+
+        self.max_models = max_models
+        self.max_memory = max_memory
+        self.evictions = 0
+        self._entries = OrderedDict()  # (project, model) -> (Project, bytes)
+        self._evicted = deque(maxlen=self.MAX_EVICTED_HISTORY)
+        self._lock = Lock()
+
+    @property
+    def enabled(self):
+        return self.max_models > 0 or self.max_memory > 0
+
+    @property
+    def memory(self):
+        return sum(footprint for _, footprint in self._entries.values())
+
+    def _over_budget(self):
+        return ((self.max_models and len(self._entries) > self.max_models) or
+                (self.max_memory and self.memory > self.max_memory))
+
+    def used(self, project, model_name):
+        # type: (Project, Text) -> None
+        """Marks a model as most recently used."""
+
+        if not self.enabled:
+            return
+
+        with self._lock:
+            key = (project.name, model_name)
+            entry = self._entries.pop(key, None)
+            if entry is not None:
+                self._entries[key] = entry
+
+    def loaded(self, project, model_name, footprint):
+        # type: (Project, Text, int) -> None
+        """Registers a loaded model and evicts models exceeding the budget.
+
+        The model that just got loaded is never evicted."""
+
+        if not self.enabled:
+            return
+
+        key = (project.name, model_name)
+        to_evict = []
+        with self._lock:
+            self._entries.pop(key, None)
+            self._entries[key] = (project, footprint)
+            while self._over_budget() and len(self._entries) > 1:
+                evicted_key, (evicted_project, _) = next(
+                        (k, v) for k, v in self._entries.items() if k != key)
+                del self._entries[evicted_key]
+                to_evict.append((evicted_project, evicted_key[1]))
+                self._evicted.append({"project": evicted_key[0],
+                                      "model": evicted_key[1]})
+                self.evictions += 1
+
+        for evicted_project, evicted_model in to_evict:
+            logger.info("Unloading model '{}' of project '{}' to stay within "
+                        "the model memory budget."
+                        "".format(evicted_model, evicted_project.name))
+            evicted_project.evict(evicted_model)
+
+    def removed(self, project, model_name):
+        # type: (Project, Text) -> None
+        """Stops tracking a model that got unloaded or replaced."""
+
+        if not self.enabled:
+            return
+
+        with self._lock:
+            self._entries.pop((project.name, model_name), None)
+
+    def as_dict(self):
+        with self._lock:
+            resident = [{"project": project_name,
+                         "model": model_name,
+                         "footprint": footprint}
+                        for (project_name, model_name), (_, footprint)
+                        in self._entries.items()]
+            return {"enabled": self.enabled,
+                    "max_models": self.max_models,
+                    "max_memory": self.max_memory,
+                    "memory": self.memory,
+                    "resident": resident,
+                    "evictions": self.evictions,
+                    "recently_evicted": list(self._evicted)}
+
+
 class Project(object):
     def __init__(self,
                  component_builder=None,
                  project=None,
                  project_dir=None,
-                 remote_storage=None):
+                 remote_storage=None,
+                 parse_cache=None,
+                 residency=None):
         self._component_builder = component_builder
+        self._parse_cache = parse_cache if parse_cache else ParseCache()
+        self._residency = residency if residency else ModelResidency()
+        # `_models` is never modified in place. Every change creates a new
+        # dict which replaces the old one, so readers can use the dict
+        # they got without any locking (copy-on-write snapshot).
         self._models = {}
+        # models that are currently being loaded: model name -> Future
+        self._loading = {}
+        # only serializes writers, readers never acquire this lock
+        self._lock = Lock()
         self.status = 0
-        self._reader_lock = Lock()
-        self._loader_lock = Lock()
-        self._writer_lock = Lock()
-        self._readers_count = 0
         self._path = None
+        # modification time of the project directory at the last search
+        # for models, see `_models_changed_on_disk`
+        self._path_mtime = None
         self._project = project
         self.remote_storage = remote_storage
 
@@ -47,32 +271,30 @@ class Project(object):
             self._path = os.path.join(project_dir, project)
         self._search_for_models()
 
-    def _begin_read(self):
-        # Readers-writer lock basic double mutex implementation
-        self._reader_lock.acquire()
-        self._readers_count += 1
-        if self._readers_count == 1:
-            self._writer_lock.acquire()
-        self._reader_lock.release()
-
-    def _end_read(self):
-        self._reader_lock.acquire()
-        self._readers_count -= 1
-        if self._readers_count == 0:
-            self._writer_lock.release()
-        self._reader_lock.release()
+    @property
+    def name(self):
+        # type: () -> Optional[Text]
+        return self._project
+
+    def _swap_models(self, updates):
+        # type: (Dict[Text, Optional[Interpreter]]) -> None
+        """Replaces the model table with a copy containing the updates.
+
+        Needs to be called while holding `self._lock`."""
+
+        models = dict(self._models)
+        models.update(updates)
+        self._models = models
 
     def _load_local_model(self, requested_model_name=None):
         if requested_model_name is None:  # user want latest model
-            # NOTE: for better parse performance, currently although
-            # user may want latest model by set requested_model_name
-            # explicitly to None, we are not refresh model list
-            # from local and cloud which is pretty slow.
-            # User can specific requested_model_name to the latest model name,
-            # then model will be cached, this is a kind of workaround to
-            # refresh latest project model.
-            # BTW if refresh function is wanted, maybe add implement code to
-            # `_latest_project_model()` is a good choice.
+            # NOTE: for better parse performance, the model list is not
+            # refreshed from the cloud, which is pretty slow. Models trained
+            # by other processes (e.g. the training process of forked
+            # server workers) are noticed by the cheap check of the
+            # project directory.
+            if self._models_changed_on_disk():
+                self._search_for_models()
 
             logger.debug("No model specified. Using default")
             return self._latest_project_model()
@@ -107,39 +329,150 @@ class Project(object):
         logger.warn("Invalid model requested. Using default")
         return self._latest_project_model()
 
-    def parse(self, text, time=None, requested_model_name=None):
-        self._begin_read()
+    def resolve_model_name(self, requested_model_name=None):
+        # type: (Optional[Text]) -> Text
+        """Returns the name of the model used to parse with the requested
+        model, e.g. the latest model if no model is requested."""
 
-        model_name = self._dynamic_load_model(requested_model_name)
+        return self._dynamic_load_model(requested_model_name)
+
+    def _ensure_model_loaded(self, model_name):
+        # type: (Text) -> Interpreter
+        """Returns the interpreter of the model, loading it if necessary.
+
+        Every model is loaded by exactly one thread. Concurrent requests
+        for the same model wait for that load, requests for other models
+        are not blocked by it."""
+
+        interpreter = self._models.get(model_name)
+        if interpreter is not None:
+            self._residency.used(self, model_name)
+            return interpreter
+
+        with self._lock:
+            interpreter = self._models.get(model_name)
+            if interpreter is not None:
+                return interpreter
+
+            future = self._loading.get(model_name)
+            is_loader = future is None
+            if is_loader:
+                future = Future()
+                self._loading[model_name] = future
+
+        if not is_loader:
+            return future.result()
 
-        self._loader_lock.acquire()
         try:
-            if not self._models.get(model_name):
-                interpreter = self._interpreter_for_model(model_name)
-                self._models[model_name] = interpreter
-        finally:
-            self._loader_lock.release()
+            interpreter = self._interpreter_for_model(model_name)
+        except Exception as e:
+            with self._lock:
+                if self._loading.get(model_name) is future:
+                    del self._loading[model_name]
+            future.set_exception(e)
+            raise
+
+        with self._lock:
+            # if the model got updated while we were loading it, the
+            # loaded interpreter is outdated and must not be stored
+            is_current = self._loading.get(model_name) is future
+            if is_current:
+                del self._loading[model_name]
+                self._swap_models({model_name: interpreter})
+        future.set_result(interpreter)
+
+        if is_current and self._residency.enabled:
+            model_dir = (interpreter.model_metadata.model_dir
+                         if interpreter.model_metadata else None)
+            self._residency.loaded(self, model_name,
+                                   estimate_model_footprint(model_dir))
+        return interpreter
+
+    def warm_up(self, requested_model_name=None, utterances=None):
+        # type: (Optional[Text], Optional[List[Text]]) -> Text
+        """Loads a model and parses the utterances to warm it up.
+
+        The utterances bypass the parse cache, the point of parsing them is
+        to run every component once (e.g. to initialize tensorflow graphs)
+        before the first real request arrives."""
 
-        response = self._models[model_name].parse(text, time)
+        model_name = self._dynamic_load_model(requested_model_name)
+        interpreter = self._ensure_model_loaded(model_name)
 
-        self._end_read()
+        for text in utterances or []:
+            interpreter.parse(text)
+        return model_name
+
+    def parse(self, text, time=None, requested_model_name=None):
+        model_name = self._dynamic_load_model(requested_model_name)
+
+        cache_key = self._parse_cache.key(self._project, model_name,
+                                          text, time)
+        response = self._parse_cache.get(cache_key)
+        if response is None:
+            interpreter = self._ensure_model_loaded(model_name)
+
+            response = interpreter.parse(text, time)
+            self._parse_cache.put(cache_key, response)
 
         return response, model_name
 
+    def parse_batch(self, texts, times=None, requested_model_name=None):
+        # type: (List[Text], Optional[List[Any]], Optional[Text]) -> Tuple[List[Dict[Text, Any]], Text]
+        """Parse a list of texts using the same model for all of them.
+
+        Only texts without a cached response are passed to the model."""
+
+        if times is None:
+            times = [None] * len(texts)
+
+        model_name = self._dynamic_load_model(requested_model_name)
+
+        cache_keys = [self._parse_cache.key(self._project, model_name,
+                                            text, time)
+                      for text, time in zip(texts, times)]
+        responses = [self._parse_cache.get(key) for key in cache_keys]
+        missing = [i for i, r in enumerate(responses) if r is None]
+
+        if missing:
+            interpreter = self._ensure_model_loaded(model_name)
+
+            parsed = interpreter.parse_batch([texts[i] for i in missing],
+                                             [times[i] for i in missing])
+            for i, response in zip(missing, parsed):
+                responses[i] = response
+                self._parse_cache.put(cache_keys[i], response)
+
+        return responses, model_name
+
     def update(self, model_name):
-        self._writer_lock.acquire()
-        self._models[model_name] = None
-        self._writer_lock.release()
+        with self._lock:
+            self._swap_models({model_name: None})
+            # a running load would store an outdated interpreter
+            self._loading.pop(model_name, None)
+            self._parse_cache.invalidate(self._project, model_name)
+        self._residency.removed(self, model_name)
         self.status = 0
 
     def unload(self, model_name):
-        self._writer_lock.acquire()
-        try:
-            del self._models[model_name]
-            self._models[model_name] = None
-            return model_name
-        finally:
-            self._writer_lock.release()
+        with self._lock:
+            if model_name not in self._models:
+                raise KeyError(model_name)
+            self._swap_models({model_name: None})
+            self._loading.pop(model_name, None)
+            self._parse_cache.invalidate(self._project, model_name)
+        self._residency.removed(self, model_name)
+        return model_name
+
+    def evict(self, model_name):
+        # type: (Text) -> None
+        """Unloads a model to free memory, it is loaded again on demand.
+
+        In contrast to `unload`, cached parse responses stay valid."""
+
+        with self._lock:
+            if self._models.get(model_name) is not None:
+                self._swap_models({model_name: None})
 
     def _latest_project_model(self):
         """Retrieves the latest trained model for an project"""
@@ -154,6 +487,22 @@ class Project(object):
         else:
             return FALLBACK_MODEL_NAME
 
+    def latest_model_dir(self):
+        # type: () -> Optional[Text]
+        """Returns the directory of the latest trained model on disk.
+
+        Returns `None` if the project has no trained model yet."""
+
+        self._search_for_models()
+        model_name = self._latest_project_model()
+        if model_name == FALLBACK_MODEL_NAME or not self._path:
+            return None
+
+        model_dir = os.path.join(self._path, model_name)
+        if os.path.isdir(model_dir):
+            return model_dir
+        return None
+
     def _fallback_model(self):
         meta = Metadata({"pipeline": [{
             "name": "intent_classifier_keyword",
@@ -161,16 +510,42 @@ class Project(object):
         }]}, "")
         return Interpreter.create(meta, self._component_builder)
 
+    def _directory_mtime(self):
+        # type: () -> Optional[float]
+        try:
+            return os.stat(self._path).st_mtime if self._path else None
+        except OSError:
+            return None  # the project has no directory (yet)
+
+    def _models_changed_on_disk(self):
+        # type: () -> bool
+        """Whether models were added to or removed from the project
+        directory since the last search for models.
+
+        Trainings write a model to a hidden directory and rename it once
+        it is complete, which changes the modification time."""
+
+        return self._directory_mtime() != self._path_mtime
+
     def _search_for_models(self):
+        # taken before listing, so changes made while listing are noticed
+        # by the next check
+        self._path_mtime = self._directory_mtime()
         model_names = (self._list_models_in_dir(self._path) +
                        self._list_models_in_cloud())
         if not model_names:
             if FALLBACK_MODEL_NAME not in self._models:
-                self._models[FALLBACK_MODEL_NAME] = self._fallback_model()
+                fallback = self._fallback_model()
+                with self._lock:
+                    if FALLBACK_MODEL_NAME not in self._models:
+                        self._swap_models({FALLBACK_MODEL_NAME: fallback})
         else:
-            for model in set(model_names):
-                if model not in self._models:
-                    self._models[model] = None
+            with self._lock:
+                new_models = {model: None
+                              for model in set(model_names)
+                              if model not in self._models}
+                if new_models:
+                    self._swap_models(new_models)
 
     def _interpreter_for_model(self, model_name):
         metadata = self._read_model_metadata(model_name)
@@ -192,6 +567,36 @@ class Project(object):
 
             return Metadata.load(path)
 
+    def is_fork_safe(self, requested_model_name=None):
+        # type: (Optional[Text]) -> bool
+        """Whether the model can be loaded before the server forks its
+        workers (see `Component.is_fork_safe`).
+
+        Models which are not on disk yet (e.g. in cloud storage) are treated
+        as unsafe, as their pipeline is unknown."""
+
+        from rasa_nlu import registry
+
+        if requested_model_name is None:
+            self._search_for_models()
+            model_name = self._latest_project_model()
+        else:
+            model_name = requested_model_name
+        if model_name == FALLBACK_MODEL_NAME:
+            return True
+
+        if not os.path.isabs(model_name) and self._path:
+            path = os.path.join(self._path, model_name)
+        else:
+            path = model_name
+        if not os.path.isdir(path):
+            return False
+
+        metadata = Metadata.load(path)
+        return all(registry.get_component_class(component["name"])
+                   .is_fork_safe(component)
+                   for component in metadata.get("pipeline", []))
+
     def as_dict(self):
         return {'status': 'training' if self.status else 'ready',
                 'available_models': list(self._models.keys()),
@@ -4,27 +4,48 @@ from __future__ import print_function
 from __future__ import unicode_literals
 
 import argparse
+import errno
+import gc
+import glob
 import logging
+import os
+import shutil
+import signal
+import socket
+import sys
+import tempfile
+import time
 from functools import wraps
+from io import BytesIO
 
 import simplejson
 import six
 from builtins import str
 from klein import Klein
 from twisted.internet import reactor, threads
-from twisted.internet.defer import inlineCallbacks, returnValue
+from twisted.internet.defer import DeferredList, inlineCallbacks, \
+    returnValue
+from twisted.internet.error import ConnectError
+from typing import Any, Dict, Optional, Text
 
 from rasa_nlu import utils, config
+from rasa_nlu.admission import AdmissionController, AdmissionRejected
+from rasa_nlu.batching import MicroBatcher
 from rasa_nlu.config import RasaNLUModelConfig
-from rasa_nlu.data_router import (
-    DataRouter, InvalidProjectError,
-    AlreadyTrainingError)
+from rasa_nlu.data_router import DataRouter, InvalidProjectError
 from rasa_nlu.train import TrainingException
+from rasa_nlu.training_jobs import TrainingJob, TrainingJobCancelled
 from rasa_nlu.utils import json_to_string
 from rasa_nlu.version import __version__
 
 logger = logging.getLogger(__name__)
 
+# unix sockets of the processes of a forked server, see `run_forked_workers`
+TRAINING_SOCKET = "training.sock"
+WORKER_SOCKET_PATTERN = "worker-*.sock"
+# marks requests forwarded by another worker of a forked server
+FORWARDED_HEADER = b'X-Rasa-NLU-Forwarded'
+
 
 def create_argument_parser():
     parser = argparse.ArgumentParser(description='parse incoming text')
@@ -66,6 +87,118 @@ def create_argument_parser():
                         default=1,
                         help='Number of parallel threads to use for '
                              'handling parse requests.')
+    parser.add_argument('--workers',
+                        type=int,
+                        default=1,
+                        help='Number of forked server processes sharing the '
+                             'port. Models are loaded once before forking, '
+                             'the workers share their memory (copy on '
+                             'write). Trainings run in a separate process '
+                             'shared by all workers. Can not be combined '
+                             'with `--parse_processes`.')
+    parser.add_argument('--parse_processes',
+                        type=int,
+                        default=0,
+                        help='Number of worker processes used to handle '
+                             'parse requests. Every worker loads its own '
+                             'models. If set to 0, parse requests are '
+                             'handled by threads of the server process.')
+    parser.add_argument('--max_parse_requests',
+                        type=int,
+                        default=0,
+                        help='Maximum number of parse requests handled at '
+                             'the same time. Set to 0 for no limit.')
+    parser.add_argument('--max_parse_requests_per_project',
+                        type=int,
+                        default=0,
+                        help='Maximum number of parse requests of a project '
+                             'handled at the same time. Set to 0 for no '
+                             'limit.')
+    parser.add_argument('--max_parse_queue',
+                        type=int,
+                        default=0,
+                        help='Maximum number of parse requests waiting to be '
+                             'handled. Further requests are rejected with '
+                             '503. Set to 0 for no limit.')
+    parser.add_argument('--max_parse_queue_per_project',
+                        type=int,
+                        default=0,
+                        help='Maximum number of parse requests of a project '
+                             'waiting to be handled. Further requests are '
+                             'rejected with 429. Set to 0 for no limit.')
+    parser.add_argument('--max_train_queue',
+                        type=int,
+                        default=0,
+                        help='Maximum number of training requests waiting '
+                             'for a free training process. Further requests '
+                             'are rejected with 503. Set to 0 for no limit.')
+    parser.add_argument('--max_train_queue_per_project',
+                        type=int,
+                        default=0,
+                        help='Maximum number of training requests of a '
+                             'project waiting for a free training process. '
+                             'Further requests are rejected with 429. Set to '
+                             '0 for no limit.')
+    parser.add_argument('--training_data_cache_dir',
+                        default=None,
+                        help='Directory to store compiled training data in. '
+                             'Trainings and evaluations on data which was '
+                             'sent before load it from there instead of '
+                             'parsing it again.')
+    parser.add_argument('--training_data_cache_size',
+                        type=int,
+                        default=1024,
+                        help='Maximum size of the training data cache dir in '
+                             'MB. The least recently used data is removed '
+                             'first. Set to 0 for no limit.')
+    parser.add_argument('--max_batch_size',
+                        type=int,
+                        default=0,
+                        help='Maximum number of concurrent parse requests '
+                             'for the same model which are parsed together '
+                             'as one batch. Set to 0 to disable batching.')
+    parser.add_argument('--max_batch_wait',
+                        type=int,
+                        default=5,
+                        help='Maximum time in milliseconds a parse request '
+                             'waits for other requests to batch with.')
+    parser.add_argument('--parse_cache_size',
+                        type=int,
+                        default=0,
+                        help='Number of parse responses kept in memory to '
+                             'answer repeated queries without running the '
+                             'model again. Set to 0 to disable the cache.')
+    parser.add_argument('--parse_cache_time_bucket',
+                        type=int,
+                        default=60,
+                        help='Number of seconds a cached parse response can '
+                             'be reused for. Time dependent entities (e.g. '
+                             'dates) might be off by up to this value.')
+    parser.add_argument('--max_loaded_models',
+                        type=int,
+                        default=0,
+                        help='Maximum number of models kept in memory across '
+                             'all projects. The least recently used model '
+                             'gets unloaded if more models are loaded. '
+                             'Set to 0 for no limit.')
+    parser.add_argument('--max_model_memory',
+                        type=int,
+                        default=0,
+                        help='Memory budget in MB for loaded models across '
+                             'all projects. The footprint of a model is '
+                             'estimated from the size of its files. '
+                             'Set to 0 for no limit.')
+    parser.add_argument('--preload',
+                        nargs='+',
+                        help='Models to load before the server starts. Use '
+                             '`all` for every model, `latest` for the '
+                             'latest model of every project or a list of '
+                             '`project` or `project/model` names.')
+    parser.add_argument('--warmup_utterances',
+                        nargs='*',
+                        default=['hello'],
+                        help='Utterances parsed by every preloaded model '
+                             'before the server starts accepting requests.')
     parser.add_argument('--response_log',
                         help='Directory where logs will be saved '
                              '(containing queries and responses).'
@@ -84,6 +217,18 @@ def create_argument_parser():
     return parser
 
 
+def validate_worker_arguments(parser, cmdline_args):
+    """Exits with an error if the worker options can not be combined."""
+
+    if cmdline_args.workers < 1:
+        parser.error("--workers has to be at least 1")
+    if cmdline_args.workers > 1 and cmdline_args.parse_processes > 0:
+        # every forked worker would start its own pool of parse processes
+        # from a process that already runs threads
+        parser.error("--workers and --parse_processes can not be combined, "
+                     "use one of them to parse on multiple cores")
+
+
 def check_cors(f):
     """Wraps a request handler with CORS headers checking."""
 
@@ -154,11 +299,147 @@ def dump_to_data_file(data):
     return utils.create_temporary_file(data_string, "_training_data")
 
 
+def remove_data_file(data_file):
+    """Removes the training data of a job which never runs."""
+
+    try:
+        os.remove(data_file)
+    except OSError:
+        pass  # already removed, e.g. by an earlier cancellation
+
+
 def is_yaml_request(request):
     return "yml" in next(
             iter(request.requestHeaders.getRawHeaders("Content-Type", [])), "")
 
 
+class ProcessProxy(object):
+    """Forwards requests to another process of a forked server.
+
+    Forked server workers (see `run_forked_workers`) parse on their own,
+    but all of them hand their trainings to the same process. Hence, every
+    worker knows every training job and the limits on concurrent and
+    queued trainings hold for the whole server. Requests which change the
+    state of every worker (e.g. unloading a model) are sent to the other
+    workers as well."""
+
+    def __init__(self, socket_path):
+        from twisted.web.client import Agent
+
+        self.socket_path = socket_path
+        self._agent = Agent.usingEndpointFactory(reactor, self)
+
+    def endpointForURI(self, uri):
+        from twisted.internet.endpoints import UNIXClientEndpoint
+
+        # every request goes to the unix socket of the process
+        return UNIXClientEndpoint(reactor, self.socket_path)
+
+    @inlineCallbacks
+    def request(self, method, uri, body=None, content_type=None,
+                forwarded=False):
+        """Sends a request to the process.
+
+        `forwarded` marks requests the receiving worker must not forward
+        to other workers again. Returns a deferred of the status code, the
+        `Retry-After` header and the body of the response."""
+
+        from twisted.web.client import FileBodyProducer, readBody
+        from twisted.web.http_headers import Headers
+
+        headers = Headers()
+        if content_type:
+            headers.setRawHeaders(b'Content-Type', [content_type])
+        if forwarded:
+            headers.setRawHeaders(FORWARDED_HEADER, [b'true'])
+        producer = FileBodyProducer(BytesIO(body)) if body else None
+
+        response = yield self._agent.request(method,
+                                             b'http://training' + uri,
+                                             headers, producer)
+        content = yield readBody(response)
+        retry_after = response.headers.getRawHeaders(b'Retry-After', [None])
+        returnValue((response.code, retry_after[0], content))
+
+    @inlineCallbacks
+    def forward(self, request):
+        """Answers a request with the response of the process."""
+
+        from twisted.web.client import ResponseFailed, ResponseNeverReceived
+
+        content_type = request.requestHeaders.getRawHeaders(b'Content-Type',
+                                                            [None])[0]
+        try:
+            code, retry_after, content = yield self.request(
+                    request.method, request.uri, request.content.read(),
+                    content_type)
+        except (ConnectError, ResponseFailed, ResponseNeverReceived) as e:
+            logger.warning("Failed to reach the process listening on "
+                           "'{}'. {}".format(self.socket_path, e))
+            request.setResponseCode(503)
+            request.setHeader('Retry-After', '1')
+            returnValue(json_to_string({"error": "The training process is "
+                                                 "not available."}))
+
+        request.setResponseCode(code)
+        if retry_after is not None:
+            request.setHeader(b'Retry-After', retry_after)
+        returnValue(content)
+
+    @inlineCallbacks
+    def status(self, uri):
+        """Returns the status of the training process, `None` if it is not
+        available."""
+
+        try:
+            code, _, content = yield self.request(b'GET', uri)
+        except Exception as e:
+            logger.warning("Failed to reach the training process. "
+                           "{}".format(e))
+            returnValue(None)
+        if code != 200:
+            returnValue(None)
+        returnValue(simplejson.loads(content.decode('utf-8', 'strict')))
+
+
+class WorkerPeers(object):
+    """The other workers of a forked server (see `run_forked_workers`).
+
+    Every worker listens on a unix socket in the socket directory of the
+    server, the master removes the sockets of stopped workers."""
+
+    def __init__(self, socket_dir, own_socket):
+        self.socket_dir = socket_dir
+        self.own_socket = own_socket
+
+    def sockets(self):
+        return [path
+                for path in glob.glob(os.path.join(self.socket_dir,
+                                                   WORKER_SOCKET_PATTERN))
+                if path != self.own_socket]
+
+    @inlineCallbacks
+    def broadcast(self, request):
+        """Sends a request to all other workers.
+
+        Returns a deferred of the number of workers which failed to handle
+        the request."""
+
+        requests = [ProcessProxy(path).request(request.method, request.uri,
+                                               forwarded=True)
+                    for path in self.sockets()]
+        results = yield DeferredList(requests, consumeErrors=True)
+
+        failed = 0
+        for success, result in results:
+            if not success or result[0] != 200:
+                failed += 1
+                logger.warning("A worker failed to handle a forwarded "
+                               "request. {}".format(
+                                       result if not success else result[2]))
+        returnValue(failed)
+
+
 class RasaNLU(object):
     """Class representing Rasa NLU http server"""
 
@@ -172,7 +453,10 @@ class RasaNLU(object):
                  token=None,
                  cors_origins=None,
                  testing=False,
-                 default_config_path=None):
+                 default_config_path=None,
+                 max_batch_size=0,
+                 max_batch_wait=5,
+                 parse_admission=None):
 
         self._configure_logging(loglevel, logfile)
 
@@ -183,8 +467,24 @@ class RasaNLU(object):
         self._testing = testing
         self.cors_origins = cors_origins if cors_origins else ["*"]
         self.access_token = token
+        # set in forked workers, which leave the trainings to the training
+        # process (see `run_forked_workers`)
+        self.training_proxy = None  # type: Optional[ProcessProxy]
+        self.worker_peers = None  # type: Optional[WorkerPeers]
         reactor.suggestThreadPoolSize(num_threads * 5)
 
+        # limits the number of running and waiting requests, by default
+        # requests are not limited. Trainings are limited by the training
+        # scheduler of the data router.
+        self._parse_admission = parse_admission or AdmissionController()
+
+        if max_batch_size > 1:
+            self._batcher = MicroBatcher(self._parse_batch,
+                                         max_batch_size,
+                                         max_batch_wait)
+        else:
+            self._batcher = None
+
     @staticmethod
     def _load_default_config(path):
         if path:
@@ -192,6 +492,20 @@ class RasaNLU(object):
         else:
             return {}
 
+    @staticmethod
+    def _reject(request, rejection):
+        request.setResponseCode(rejection.status_code)
+        request.setHeader('Retry-After', str(rejection.retry_after))
+        return json_to_string({"error": "{}".format(rejection)})
+
+    def _parse_batch(self, data):
+        if self.data_router.uses_parse_workers:
+            return self.data_router.parse_batch_in_worker(data)
+        elif self._testing:
+            return self.data_router.parse_batch(data)
+        else:
+            return threads.deferToThread(self.data_router.parse_batch, data)
+
     @staticmethod
     def _configure_logging(loglevel, logfile):
         logging.basicConfig(filename=logfile,
@@ -226,10 +540,22 @@ class RasaNLU(object):
             returnValue(dumped)
         else:
             data = self.data_router.extract(request_params)
+            project = data.get("project",
+                               RasaNLUModelConfig.DEFAULT_PROJECT_NAME)
+            try:
+                yield self._parse_admission.acquire(project)
+            except AdmissionRejected as e:
+                returnValue(self._reject(request, e))
+
             try:
                 request.setResponseCode(200)
-                response = yield (self.data_router.parse(data) if self._testing
-                                  else threads.deferToThread(self.data_router.parse, data))
+                if self._batcher is not None:
+                    response = yield self._batcher.parse(data)
+                elif self.data_router.uses_parse_workers:
+                    response = yield self.data_router.parse_in_worker(data)
+                else:
+                    response = yield (self.data_router.parse(data) if self._testing
+                                      else threads.deferToThread(self.data_router.parse, data))
                 returnValue(json_to_string(response))
             except InvalidProjectError as e:
                 request.setResponseCode(404)
@@ -238,6 +564,50 @@ class RasaNLU(object):
                 request.setResponseCode(500)
                 logger.exception(e)
                 returnValue(json_to_string({"error": "{}".format(e)}))
+            finally:
+                self._parse_admission.release(project)
+
+    @app.route("/parse/batch", methods=['POST', 'OPTIONS'])
+    @requires_auth
+    @check_cors
+    @inlineCallbacks
+    def parse_batch(self, request):
+        request.setHeader('Content-Type', 'application/json')
+        request_params = simplejson.loads(
+                request.content.read().decode('utf-8', 'strict'))
+
+        if 'query' in request_params:
+            request_params['q'] = request_params.pop('query')
+
+        if not isinstance(request_params.get('q'), list):
+            request.setResponseCode(404)
+            dumped = json_to_string(
+                    {"error": "Invalid parse parameter specified, 'q' needs "
+                              "to be a list of texts"})
+            returnValue(dumped)
+        else:
+            data = [self.data_router.extract(dict(request_params, q=text))
+                    for text in request_params['q']]
+            project = request_params.get(
+                    "project", RasaNLUModelConfig.DEFAULT_PROJECT_NAME)
+            try:
+                yield self._parse_admission.acquire(project)
+            except AdmissionRejected as e:
+                returnValue(self._reject(request, e))
+
+            try:
+                request.setResponseCode(200)
+                response = yield self._parse_batch(data)
+                returnValue(json_to_string(response))
+            except InvalidProjectError as e:
+                request.setResponseCode(404)
+                returnValue(json_to_string({"error": "{}".format(e)}))
+            except Exception as e:
+                request.setResponseCode(500)
+                logger.exception(e)
+                returnValue(json_to_string({"error": "{}".format(e)}))
+            finally:
+                self._parse_admission.release(project)
 
     @app.route("/version", methods=['GET', 'OPTIONS'])
     @requires_auth
@@ -264,16 +634,57 @@ class RasaNLU(object):
     @app.route("/status", methods=['GET', 'OPTIONS'])
     @requires_auth
     @check_cors
+    @inlineCallbacks
     def status(self, request):
         request.setHeader('Content-Type', 'application/json')
-        return json_to_string(self.data_router.get_status())
+        status = self.data_router.get_status()
+        if self.training_proxy is not None:
+            training_status = yield self.training_proxy.status(request.uri)
+            self._merge_training_status(status, training_status)
+        if self._batcher is not None:
+            status["batching"] = self._batcher.as_dict()
+        status["admission"] = {"parse": self._parse_admission.as_dict()}
+        returnValue(json_to_string(status))
+
+    @staticmethod
+    def _merge_training_status(status, training_status):
+        """Replaces the training state of a worker's status by the one of
+        the training process."""
+
+        if training_status is None:
+            status["training_jobs"] = {"error": "The training process is "
+                                                "not available."}
+            return
+
+        status["training_jobs"] = training_status["training_jobs"]
+        projects = status["available_projects"]
+        for name, project in training_status["available_projects"].items():
+            projects.setdefault(name, project)["status"] = project["status"]
 
     @app.route("/train", methods=['POST', 'OPTIONS'])
     @requires_auth
     @check_cors
     @inlineCallbacks
     def train(self, request):
+        if self.training_proxy is not None:
+            response = yield self.training_proxy.forward(request)
+            returnValue(response)
+
         project = parameter_or_default(request, "project", default=None)
+        warm_start = parameter_or_default(request, "warm_start",
+                                          default="false").lower() == "true"
+        run_async = parameter_or_default(request, "async",
+                                         default="false").lower() == "true"
+
+        request.setHeader('Content-Type', 'application/json')
+
+        try:
+            priority = int(parameter_or_default(request, "priority",
+                                                default=0))
+        except ValueError:
+            request.setResponseCode(400)
+            returnValue(json_to_string({"error": "The priority has to be "
+                                                 "an integer."}))
 
         request_content = request.content.read().decode('utf-8', 'strict')
 
@@ -291,24 +702,71 @@ class RasaNLU(object):
 
         data_file = dump_to_data_file(data)
 
-        request.setHeader('Content-Type', 'application/json')
+        try:
+            job = self.data_router.submit_training_job(
+                    data_file, project, RasaNLUModelConfig(model_config),
+                    warm_start, priority)
+        except AdmissionRejected as e:
+            remove_data_file(data_file)
+            returnValue(self._reject(request, e))
+        except InvalidProjectError as e:
+            remove_data_file(data_file)
+            request.setResponseCode(404)
+            returnValue(json_to_string({"error": "{}".format(e)}))
+
+        if run_async:
+            # the client polls `/train/<job_id>` for the result
+            request.setResponseCode(202)
+            returnValue(json_to_string(job.as_dict()))
 
         try:
             request.setResponseCode(200)
-            response = yield self.data_router.start_train_process(
-                    data_file, project, RasaNLUModelConfig(model_config))
+            response = yield job.wait()
             returnValue(json_to_string({'info': 'new model trained: {}'
-                                                ''.format(response)}))
-        except AlreadyTrainingError as e:
-            request.setResponseCode(403)
-            returnValue(json_to_string({"error": "{}".format(e)}))
-        except InvalidProjectError as e:
-            request.setResponseCode(404)
+                                                ''.format(response),
+                                        'job_id': job.job_id}))
+        except TrainingJobCancelled as e:
+            request.setResponseCode(409)
             returnValue(json_to_string({"error": "{}".format(e)}))
         except TrainingException as e:
             request.setResponseCode(500)
             returnValue(json_to_string({"error": "{}".format(e)}))
 
+    @app.route("/train/<job_id>", methods=['GET', 'OPTIONS'])
+    @requires_auth
+    @check_cors
+    def training_job(self, request, job_id):
+        request.setHeader('Content-Type', 'application/json')
+        if self.training_proxy is not None:
+            return self.training_proxy.forward(request)
+
+        job = self.data_router.training_job(job_id)
+        if job is None:
+            request.setResponseCode(404)
+            return json_to_string({"error": "Training job '{}' could not be "
+                                            "found.".format(job_id)})
+        return json_to_string(job.as_dict())
+
+    @app.route("/train/<job_id>", methods=['DELETE'])
+    @requires_auth
+    @check_cors
+    def cancel_training_job(self, request, job_id):
+        request.setHeader('Content-Type', 'application/json')
+        if self.training_proxy is not None:
+            return self.training_proxy.forward(request)
+
+        job = self.data_router.cancel_training_job(job_id)
+        if job is None:
+            request.setResponseCode(404)
+            return json_to_string({"error": "Training job '{}' could not be "
+                                            "found.".format(job_id)})
+        if job.status != TrainingJob.CANCELLED:
+            request.setResponseCode(409)
+            return json_to_string({"error": "Training job '{}' is already "
+                                            "{}.".format(job_id, job.status)})
+        remove_data_file(job.arguments["data_file"])
+        return json_to_string(job.as_dict())
+
     @app.route("/evaluate", methods=['POST', 'OPTIONS'])
     @requires_auth
     @check_cors
@@ -335,6 +793,7 @@ class RasaNLU(object):
     @app.route("/models", methods=['DELETE', 'OPTIONS'])
     @requires_auth
     @check_cors
+    @inlineCallbacks
     def unload_model(self, request):
         params = {
             key.decode('utf-8', 'strict'): value[0].decode('utf-8', 'strict')
@@ -342,22 +801,206 @@ class RasaNLU(object):
         }
 
         request.setHeader('Content-Type', 'application/json')
+        if (self.worker_peers is not None and
+                not request.requestHeaders.hasHeader(FORWARDED_HEADER)):
+            # every forked worker holds its own copy of the model
+            yield self.worker_peers.broadcast(request)
+
         try:
             request.setResponseCode(200)
             response = self.data_router.unload_model(
                 params.get('project', RasaNLUModelConfig.DEFAULT_PROJECT_NAME),
                 params.get('model')
             )
-            return simplejson.dumps(response)
+            returnValue(simplejson.dumps(response))
         except Exception as e:
             request.setResponseCode(500)
             logger.exception(e)
-            return simplejson.dumps({"error": "{}".format(e)})
+            returnValue(simplejson.dumps({"error": "{}".format(e)}))
+
+
+def _install_worker_reactor():
+    """Replaces the reactor inherited from the master by a new one.
+
+    The reactor gets created when twisted is imported. Its poller and waker
+    are file descriptors a forked worker would share with the master and
+    all other workers."""
+
+    global reactor
+    from twisted.internet.main import installReactor
+    from rasa_nlu import data_router
+
+    del sys.modules["twisted.internet.reactor"]
+    reactor = type(reactor)()
+    installReactor(reactor)
+    data_router.reactor = reactor
+
+
+def _reset_signal_handlers():
+    # a forked process inherits the handlers of the master, which stop
+    # all workers
+    signal.signal(signal.SIGTERM, signal.SIG_DFL)
+    signal.signal(signal.SIGINT, signal.SIG_DFL)
+
+
+def _worker_socket(socket_dir, pid):
+    # type: (Text, int) -> Text
+    return os.path.join(socket_dir,
+                        WORKER_SOCKET_PATTERN.replace("*", str(pid)))
+
+
+def _run_worker(rasa, listening_socket, num_threads, socket_dir,
+                preload=None):
+    # type: (RasaNLU, socket.socket, int, Text, Optional[Dict[Text, Any]]) -> None
+    from twisted.web.server import Site
+
+    _reset_signal_handlers()
+    _install_worker_reactor()
+    own_socket = _worker_socket(socket_dir, os.getpid())
+    rasa.training_proxy = ProcessProxy(os.path.join(socket_dir,
+                                                    TRAINING_SOCKET))
+    rasa.worker_peers = WorkerPeers(socket_dir, own_socket)
+    if preload:
+        # loads the models the master did not share with the workers
+        rasa.data_router.preload(**preload)
+
+    reactor.suggestThreadPoolSize(num_threads * 5)
+    site = Site(rasa.app.resource())
+    reactor.adoptStreamPort(listening_socket.fileno(), socket.AF_INET, site)
+    # requests forwarded by the other workers
+    reactor.listenUNIX(own_socket, site)
+    # `adoptStreamPort` uses a copy of the file descriptor
+    listening_socket.close()
+    logger.info("Started worker {}".format(os.getpid()))
+    reactor.run()
+    rasa.data_router.shutdown()
+
+
+def _run_trainer(rasa, listening_socket, num_threads, socket_dir):
+    # type: (RasaNLU, socket.socket, int, Text) -> None
+    from twisted.web.server import Site
+
+    _reset_signal_handlers()
+    # the trainer only answers the workers
+    listening_socket.close()
+    _install_worker_reactor()
+    training_socket = os.path.join(socket_dir, TRAINING_SOCKET)
+    if os.path.exists(training_socket):
+        # left behind by a previous training process
+        os.remove(training_socket)
+
+    reactor.suggestThreadPoolSize(num_threads * 5)
+    reactor.listenUNIX(training_socket, Site(rasa.app.resource()))
+    logger.info("Started training process {}".format(os.getpid()))
+    reactor.run()
+    rasa.data_router.shutdown()
+
+
+def run_forked_workers(rasa, port, num_workers, num_threads=1, preload=None):
+    # type: (RasaNLU, int, int, int, Optional[Dict[Text, Any]]) -> None
+    """Serves the app from `num_workers` forked processes.
+
+    The models loaded so far (e.g. using `DataRouter.preload` with
+    `fork_safe_only`) are shared copy on write by all workers. Each worker
+    loads the models of `preload` which are not loaded yet (i.e. the
+    arguments of `DataRouter.preload`) before it accepts requests.
+
+    All trainings run in one additional forked process, the workers forward
+    the training requests to it. Unloading a model is forwarded to all other
+    workers. The master process creates no threads or
+    pools, it only restarts stopped workers and forwards termination
+    signals to them."""
+
+    listening_socket = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+    listening_socket.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+    listening_socket.bind(('0.0.0.0', port))
+    listening_socket.listen(128)
+    listening_socket.setblocking(False)
+
+    socket_dir = tempfile.mkdtemp(prefix="rasa_nlu_")
+
+    if hasattr(gc, "freeze"):
+        # The garbage collector writes to the header of every object it
+        # visits, which would copy the shared memory pages into each
+        # worker. Frozen objects are ignored by the collector.
+        gc.collect()
+        gc.freeze()
+
+    def start(role):
+        pid = os.fork()
+        if pid == 0:
+            exit_code = 0
+            try:
+                if role == "trainer":
+                    _run_trainer(rasa, listening_socket, num_threads,
+                                 socket_dir)
+                else:
+                    _run_worker(rasa, listening_socket, num_threads,
+                                socket_dir, preload)
+            except BaseException:
+                logger.exception("The {} process failed.".format(role))
+                exit_code = 1
+            finally:
+                os._exit(exit_code)
+        return pid, role, time.time()
+
+    children = {}
+    for role in ["trainer"] + ["worker"] * num_workers:
+        pid, role, started = start(role)
+        children[pid] = (role, started)
+
+    stopping = []
+
+    def stop_children(signum, frame):
+        stopping.append(signum)
+        for child in list(children):
+            try:
+                os.kill(child, signal.SIGTERM)
+            except OSError:
+                pass  # child already stopped
+
+    signal.signal(signal.SIGTERM, stop_children)
+    signal.signal(signal.SIGINT, stop_children)
+
+    try:
+        while children:
+            try:
+                pid, _ = os.wait()
+            except OSError as e:
+                if e.errno == errno.EINTR:
+                    continue
+                break
+
+            if pid not in children:
+                continue
+            role, started = children.pop(pid)
+            if role == "worker":
+                # the other workers must not forward requests to it anymore
+                try:
+                    os.remove(_worker_socket(socket_dir, pid))
+                except OSError:
+                    pass  # the worker did not start listening
+            if stopping:
+                continue
+
+            logger.warning("The {} process {} stopped, starting a new one."
+                           "".format(role, pid))
+            if time.time() - started < 1:
+                # don't restart a crashing process over and over again
+                time.sleep(1)
+            if not stopping:
+                pid, role, started = start(role)
+                children[pid] = (role, started)
+    finally:
+        listening_socket.close()
+        shutil.rmtree(socket_dir, ignore_errors=True)
 
 
 if __name__ == '__main__':
     # Running as standalone python application
-    cmdline_args = create_argument_parser().parse_args()
+    parser = create_argument_parser()
+    cmdline_args = parser.parse_args()
+    validate_worker_arguments(parser, cmdline_args)
 
     utils.configure_colored_logging(cmdline_args.loglevel)
 
@@ -365,7 +1008,20 @@ if __name__ == '__main__':
                         cmdline_args.max_training_processes,
                         cmdline_args.response_log,
                         cmdline_args.emulate,
-                        cmdline_args.storage)
+                        cmdline_args.storage,
+                        parse_cache_size=cmdline_args.parse_cache_size,
+                        parse_cache_time_bucket=(
+                            cmdline_args.parse_cache_time_bucket),
+                        max_loaded_models=cmdline_args.max_loaded_models,
+                        max_model_memory=cmdline_args.max_model_memory,
+                        parse_processes=cmdline_args.parse_processes,
+                        max_train_queue=cmdline_args.max_train_queue,
+                        max_train_queue_per_project=(
+                            cmdline_args.max_train_queue_per_project),
+                        training_data_cache_dir=(
+                            cmdline_args.training_data_cache_dir),
+                        training_data_cache_size=(
+                            cmdline_args.training_data_cache_size))
     rasa = RasaNLU(
             router,
             cmdline_args.loglevel,
@@ -373,8 +1029,38 @@ if __name__ == '__main__':
             cmdline_args.num_threads,
             cmdline_args.token,
             cmdline_args.cors,
-            default_config_path=cmdline_args.config
+            default_config_path=cmdline_args.config,
+            max_batch_size=cmdline_args.max_batch_size,
+            max_batch_wait=cmdline_args.max_batch_wait,
+            parse_admission=AdmissionController(
+                    cmdline_args.max_parse_requests,
+                    cmdline_args.max_parse_queue,
+                    cmdline_args.max_parse_requests_per_project,
+                    cmdline_args.max_parse_queue_per_project)
     )
 
+    if cmdline_args.workers > 1 and not cmdline_args.preload:
+        # without preloading, every worker would load its own models
+        logger.info("Preloading the latest model of every project to "
+                    "share it between the workers.")
+        cmdline_args.preload = ['latest']
+
+    preload_args = None
+    if cmdline_args.preload:
+        if cmdline_args.preload in [['all'], ['latest']]:
+            preload = cmdline_args.preload[0]
+        else:
+            preload = cmdline_args.preload
+        preload_args = {"preload": preload,
+                        "warmup_utterances": cmdline_args.warmup_utterances,
+                        "num_threads": cmdline_args.num_threads}
+        # models which don't survive a fork are loaded by every worker
+        router.preload(fork_safe_only=cmdline_args.workers > 1,
+                       **preload_args)
+
     logger.info('Started http server on port %s' % cmdline_args.port)
-    rasa.app.run('0.0.0.0', cmdline_args.port)
+    if cmdline_args.workers > 1:
+        run_forked_workers(rasa, cmdline_args.port, cmdline_args.workers,
+                           cmdline_args.num_threads, preload_args)
+    else:
+        rasa.app.run('0.0.0.0', cmdline_args.port)
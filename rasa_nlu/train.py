@@ -47,7 +47,9 @@ def create_argument_parser():
     parser.add_argument('-t', '--num_threads',
                         default=None,
                         type=int,
-                        help="Number of threads to use during model training")
+                        help="Number of threads to use during model training "
+                             "and of processes parsing multiple training "
+                             "data files")
 
     parser.add_argument('--project',
                         default=None,
@@ -58,6 +60,20 @@ def create_argument_parser():
                              "in the specified directory instead of creating "
                              "a folder like 'model_20171020-160213'")
 
+    parser.add_argument('--warm_start_from',
+                        default=None,
+                        help="Directory of a previously trained model. Its "
+                             "components are reused to speed up the "
+                             "training, e.g. after small changes of the "
+                             "training data.")
+
+    parser.add_argument('--cache_training_data',
+                        action='store_true',
+                        help="Compile the parsed training data into a binary "
+                             "file next to it. Later trainings on unchanged "
+                             "data load this file instead of parsing the "
+                             "data again.")
+
     parser.add_argument('--storage',
                         help='Set the remote location where models are stored. '
                              'E.g. on AWS. If nothing is configured, the '
@@ -102,22 +118,47 @@ def do_train_in_worker(config,  # type: RasaNLUModelConfig
                        project=None,  # type: Optional[Text]
                        fixed_model_name=None,  # type: Optional[Text]
                        storage=None,  # type: Text
-                       component_builder=None
+                       component_builder=None,
                        # type: Optional[ComponentBuilder]
+                       warm_start_from=None,  # type: Optional[Text]
+                       training_data_cache_dir=None  # type: Optional[Text]
                        ):
     # type: (...) -> Text
     """Loads the trainer and the data and runs the training in a worker."""
 
     try:
-        _, _, persisted_path = do_train(config, data, path, project,
-                                        fixed_model_name, storage,
-                                        component_builder)
+        _, _, persisted_path = do_train(
+                config, data, path, project, fixed_model_name, storage,
+                component_builder, warm_start_from,
+                training_data_cache_dir=training_data_cache_dir)
         return persisted_path
     except Exception as e:
         logger.exception("Failed to train project '{}'.".format(project))
         raise TrainingException(project, e)
 
 
+def do_train_job_in_worker(config,  # type: RasaNLUModelConfig
+                           data,  # type: Text
+                           path,  # type: Text
+                           project=None,  # type: Optional[Text]
+                           warm_start_from=None,  # type: Optional[Text]
+                           training_data_cache_dir=None  # type: Optional[Text]
+                           ):
+    # type: (...) -> Tuple[Text, Optional[int]]
+    """Runs a training in a worker and measures its memory usage.
+
+    Returns the path of the trained model and the peak resident set size of
+    the worker during the training in bytes. Where the peak can not be
+    reset, it includes previous jobs of the same worker."""
+
+    utils.reset_peak_memory()
+    persisted_path = do_train_in_worker(config, data, path, project,
+                                        warm_start_from=warm_start_from,
+                                        training_data_cache_dir=(
+                                            training_data_cache_dir))
+    return persisted_path, utils.peak_memory()
+
+
 def do_train(cfg,  # type: RasaNLUModelConfig
              data,  # type: Text
              path=None,  # type: Text
@@ -125,17 +166,32 @@ def do_train(cfg,  # type: RasaNLUModelConfig
              fixed_model_name=None,  # type: Optional[Text]
              storage=None,  # type: Text
              component_builder=None,  # type: Optional[ComponentBuilder]
+             warm_start_from=None,  # type: Optional[Text]
+             cache_training_data=False,  # type: bool
+             training_data_cache_dir=None,  # type: Optional[Text]
              **kwargs   # type: Any
              ):
     # type: (...) -> Tuple[Trainer, Interpreter, Text]
-    """Loads the trainer and the data and runs the training of the model."""
+    """Loads the trainer and the data and runs the training of the model.
+
+    If `warm_start_from` is the directory of a previously trained model,
+    the components continue from the state of that model. If
+    `cache_training_data` is set or a `training_data_cache_dir` is given,
+    the parsed training data is compiled and reused by later trainings on
+    the same data (see `load_data`)."""
 
     # Ensure we are training a model that we can save in the end
     # WARN: there is still a race condition if a model with the same name is
     # trained in another subprocess
     trainer = Trainer(cfg, component_builder)
+    if warm_start_from:
+        trainer.warm_start(warm_start_from, component_builder)
     persistor = create_persistor(storage)
-    training_data = load_data(data, cfg.language)
+    # multiple training data files are parsed in parallel
+    training_data = load_data(data, cfg.language,
+                              num_processes=kwargs.get("num_threads") or 1,
+                              use_cache=cache_training_data,
+                              cache_dir=training_data_cache_dir)
     interpreter = trainer.train(training_data, **kwargs)
 
     if path:
@@ -160,5 +216,7 @@ if __name__ == '__main__':
              cmdline_args.project,
              cmdline_args.fixed_model_name,
              cmdline_args.storage,
+             warm_start_from=cmdline_args.warm_start_from,
+             cache_training_data=cmdline_args.cache_training_data,
              num_threads=cmdline_args.num_threads)
     logger.info("Finished training")
@@ -0,0 +1,301 @@
+from __future__ import absolute_import
+from __future__ import division
+from __future__ import print_function
+from __future__ import unicode_literals
+
+import hashlib
+import io
+import json
+import logging
+import os
+import tempfile
+
+from builtins import str
+from typing import Any, Dict, List, Optional, Text, Tuple
+
+import numpy as np
+
+from rasa_nlu import utils
+from rasa_nlu.training_data import Message
+from rasa_nlu.training_data import TrainingData
+from rasa_nlu.version import __version__
+
+logger = logging.getLogger(__name__)
+
+# increase whenever the layout of the compiled arrays changes, caches of
+# other versions are ignored and compiled again
+COMPILED_FORMAT_VERSION = 1
+
+# compiled files are never read as training data themselves
+COMPILED_FILE_SUFFIX = ".rasa_nlu_cache.npz"
+
+_ENTITY_KEYS = {"start", "end", "value", "entity"}
+
+
+def is_compiled_file(filename):
+    # type: (Text) -> bool
+    return filename.endswith(COMPILED_FILE_SUFFIX)
+
+
+def source_hash(files, language):
+    # type: (List[Text], Optional[Text]) -> Text
+    """Hashes the contents of the training data files.
+
+    The names of multiple files are part of the hash, as they decide the
+    order of the examples and - e.g. for dialogflow - how a file is read.
+    The name of a single file is not, so the same data stored in different
+    (e.g. temporary) files has the same hash. The rasa_nlu version is, as
+    other versions might read the same files differently."""
+
+    sha = hashlib.sha1()
+    sha.update("{}\n{}\n{}\n".format(COMPILED_FORMAT_VERSION,
+                                     __version__,
+                                     language).encode("utf-8"))
+    for filename in files:
+        if len(files) > 1:
+            sha.update(os.path.basename(filename).encode("utf-8") + b"\n")
+        with io.open(filename, "rb") as f:
+            for chunk in iter(lambda: f.read(1024 * 1024), b""):
+                sha.update(chunk)
+        sha.update(b"\n")
+    return sha.hexdigest()
+
+
+def compiled_file_name(resource_name, content_hash, cache_dir=None):
+    # type: (Text, Text, Optional[Text]) -> Text
+    """Location of the compiled training data of a file or directory.
+
+    Without a `cache_dir` the compiled data is stored next to the training
+    data. A `cache_dir` is content addressed, i.e. it also works for
+    training data whose files change their location."""
+
+    if cache_dir:
+        return os.path.join(cache_dir, content_hash + COMPILED_FILE_SUFFIX)
+    elif os.path.isdir(resource_name):
+        return os.path.join(resource_name, COMPILED_FILE_SUFFIX)
+    else:
+        return resource_name + COMPILED_FILE_SUFFIX
+
+
+def _pack_strings(strings):
+    # type: (List[Text]) -> Tuple[np.ndarray, np.ndarray]
+    """Stores strings as one utf-8 byte array and the offsets of the
+    strings in it."""
+
+    encoded = [s.encode("utf-8") for s in strings]
+    offsets = np.zeros(len(encoded) + 1, dtype=np.int64)
+    offsets[1:] = np.cumsum([len(e) for e in encoded], dtype=np.int64)
+    data = np.frombuffer(b"".join(encoded), dtype=np.uint8)
+    return offsets, data
+
+
+def _unpack_strings(offsets, data):
+    # type: (np.ndarray, np.ndarray) -> List[Text]
+
+    raw = data.tobytes()
+    bounds = offsets.tolist()
+    return [raw[bounds[i]:bounds[i + 1]].decode("utf-8")
+            for i in range(len(bounds) - 1)]
+
+
+def _is_columnar(example):
+    # type: (Message) -> bool
+    """Whether an example is described completely by its text, intent
+    and entity spans. Other examples are stored as json."""
+
+    if set(example.data) - {"intent", "entities"}:
+        return False
+    if "intent" in example.data and not isinstance(example.data["intent"],
+                                                   str):
+        return False
+    if "entities" in example.data:
+        entities = example.data["entities"]
+        if not isinstance(entities, list) or not entities:
+            return False
+        for entity in entities:
+            if (not isinstance(entity, dict) or
+                    set(entity) != _ENTITY_KEYS or
+                    not isinstance(entity["entity"], str) or
+                    not isinstance(entity["value"], str) or
+                    type(entity["start"]) is not int or
+                    type(entity["end"]) is not int):
+                return False
+    return isinstance(example.text, str)
+
+
+def write_compiled(training_data, filename, content_hash):
+    # type: (TrainingData, Text, Text) -> None
+    """Stores the training data as columnar arrays.
+
+    The arrays hold the texts, intent ids and the entity spans of the
+    examples. Synonyms, regex features and lookup tables are stored as
+    json."""
+
+    examples = training_data.training_examples
+
+    texts = []
+    intent_names = []  # type: List[Text]
+    intent_index = {}  # type: Dict[Text, int]
+    intent_ids = np.full(len(examples), -1, dtype=np.int32)
+    entity_names = []  # type: List[Text]
+    entity_index = {}  # type: Dict[Text, int]
+    entity_offsets = np.zeros(len(examples) + 1, dtype=np.int64)
+    spans = []
+    entity_types = []
+    entity_values = []
+    # examples which do not fit into the columns, by their index
+    irregular = {}  # type: Dict[Text, Dict[Text, Any]]
+
+    for i, example in enumerate(examples):
+        if not _is_columnar(example):
+            irregular[str(i)] = example.as_dict()
+            texts.append("")
+            entity_offsets[i + 1] = len(spans)
+            continue
+
+        texts.append(example.text)
+        intent = example.data.get("intent")
+        if intent is not None:
+            if intent not in intent_index:
+                intent_index[intent] = len(intent_names)
+                intent_names.append(intent)
+            intent_ids[i] = intent_index[intent]
+
+        for entity in example.data.get("entities", []):
+            if entity["entity"] not in entity_index:
+                entity_index[entity["entity"]] = len(entity_names)
+                entity_names.append(entity["entity"])
+            spans.append((entity["start"], entity["end"]))
+            entity_types.append(entity_index[entity["entity"]])
+            entity_values.append(entity["value"])
+        entity_offsets[i + 1] = len(spans)
+
+    text_offsets, text_data = _pack_strings(texts)
+    value_offsets, value_data = _pack_strings(entity_values)
+    meta = {"intent_names": intent_names,
+            "entity_names": entity_names,
+            "irregular_examples": irregular,
+            "entity_synonyms": training_data.entity_synonyms,
+            "regex_features": training_data.regex_features,
+            "lookup_tables": training_data.lookup_tables}
+    meta_data = np.frombuffer(json.dumps(meta).encode("utf-8"),
+                              dtype=np.uint8)
+
+    utils.create_dir_for_file(filename)
+    # write to a temporary file first, concurrent trainings must never
+    # read partially written data
+    fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(filename) or ".")
+    with io.open(fd, "wb") as f:
+        np.savez(f,
+                 version=np.array(COMPILED_FORMAT_VERSION),
+                 source_hash=np.frombuffer(content_hash.encode("utf-8"),
+                                           dtype=np.uint8),
+                 text_offsets=text_offsets,
+                 text_data=text_data,
+                 intent_ids=intent_ids,
+                 entity_offsets=entity_offsets,
+                 entity_spans=np.array(spans,
+                                       dtype=np.int64).reshape(-1, 2),
+                 entity_types=np.array(entity_types, dtype=np.int32),
+                 value_offsets=value_offsets,
+                 value_data=value_data,
+                 meta=meta_data)
+    os.rename(tmp_path, filename)
+
+
+def read_compiled(filename, content_hash):
+    # type: (Text, Text) -> Optional[TrainingData]
+    """Loads compiled training data.
+
+    Returns `None` if there is no compiled data for `content_hash`, e.g.
+    because the training data changed since it was compiled."""
+
+    if not os.path.isfile(filename):
+        return None
+
+    try:
+        with np.load(filename, allow_pickle=False) as arrays:
+            if (int(arrays["version"]) != COMPILED_FORMAT_VERSION or
+                    arrays["source_hash"].tobytes().decode("utf-8") !=
+                    content_hash):
+                return None
+            columns = {name: arrays[name] for name in arrays.files}
+    except Exception as e:
+        logger.warning("Failed to read compiled training data '{}': {}"
+                       "".format(filename, e))
+        return None
+
+    try:
+        # the least recently used files are pruned first
+        os.utime(filename, None)
+    except OSError:
+        pass
+
+    meta = json.loads(columns["meta"].tobytes().decode("utf-8"))
+    texts = _unpack_strings(columns["text_offsets"], columns["text_data"])
+    values = _unpack_strings(columns["value_offsets"], columns["value_data"])
+    intent_names = meta["intent_names"]
+    entity_names = meta["entity_names"]
+    irregular = meta["irregular_examples"]
+
+    intent_ids = columns["intent_ids"].tolist()
+    entity_offsets = columns["entity_offsets"].tolist()
+    spans = columns["entity_spans"].tolist()
+    entity_types = columns["entity_types"].tolist()
+
+    examples = []
+    for i, text in enumerate(texts):
+        if str(i) in irregular:
+            data = irregular[str(i)]
+            examples.append(Message(data.pop("text"), data))
+            continue
+
+        data = {}
+        if intent_ids[i] >= 0:
+            data["intent"] = intent_names[intent_ids[i]]
+        entities = [{"start": spans[j][0],
+                     "end": spans[j][1],
+                     "value": values[j],
+                     "entity": entity_names[entity_types[j]]}
+                    for j in range(entity_offsets[i], entity_offsets[i + 1])]
+        if entities:
+            data["entities"] = entities
+        examples.append(Message(text, data))
+
+    return TrainingData(examples,
+                        meta["entity_synonyms"],
+                        meta["regex_features"],
+                        meta["lookup_tables"])
+
+
+def prune_cache_dir(cache_dir, max_size):
+    # type: (Text, int) -> int
+    """Removes the least recently used compiled files from `cache_dir`
+    until the remaining files take at most `max_size` bytes.
+
+    Returns the number of removed files."""
+
+    files = []
+    for filename in os.listdir(cache_dir):
+        path = os.path.join(cache_dir, filename)
+        if not is_compiled_file(filename):
+            continue
+        try:
+            stat = os.stat(path)
+        except OSError:
+            # removed by another process in the meantime
+            continue
+        files.append((stat.st_mtime, stat.st_size, path))
+
+    total_size = sum(size for _, size, _ in files)
+    removed = 0
+    for _, size, path in sorted(files):
+        if total_size <= max_size:
+            break
+        try:
+            os.remove(path)
+            removed += 1
+        except OSError:
+            pass
+        total_size -= size
+    return removed
@@ -28,6 +28,7 @@ class DialogflowReader(TrainingDataReader):
 
         language = kwargs["language"]
         fformat = kwargs["fformat"]
+        validate = kwargs.get("validate", True)
 
         if fformat not in {DIALOGFLOW_INTENT, DIALOGFLOW_ENTITIES}:
             raise ValueError("fformat must be either {}, or {}".format(DIALOGFLOW_INTENT, DIALOGFLOW_ENTITIES))
@@ -37,13 +38,13 @@ class DialogflowReader(TrainingDataReader):
 
         if not examples_js:
             logger.warning("No training examples found for dialogflow file {}!".format(fn))
-            return TrainingData()
+            return TrainingData(validate=validate)
         elif fformat == DIALOGFLOW_INTENT:
-            return self._read_intent(root_js, examples_js)
+            return self._read_intent(root_js, examples_js, validate)
         elif fformat == DIALOGFLOW_ENTITIES:
-            return self._read_entities(examples_js)
+            return self._read_entities(examples_js, validate)
 
-    def _read_intent(self, intent_js, examples_js):
+    def _read_intent(self, intent_js, examples_js, validate=True):
         """Reads the intent and examples from respective jsons."""
         intent = intent_js.get("name")
 
@@ -52,7 +53,7 @@ class DialogflowReader(TrainingDataReader):
             text, entities = self._join_text_chunks(ex['data'])
             training_examples.append(Message.build(text, intent, entities))
 
-        return TrainingData(training_examples)
+        return TrainingData(training_examples, validate=validate)
 
     def _join_text_chunks(self, chunks):
         """Combines text chunks and extracts entities."""
@@ -79,9 +80,9 @@ class DialogflowReader(TrainingDataReader):
 
         return entity
 
-    def _read_entities(self, examples_js):
+    def _read_entities(self, examples_js, validate=True):
         entity_synonyms = transform_entity_synonyms(examples_js)
-        return TrainingData([], entity_synonyms)
+        return TrainingData([], entity_synonyms, validate=validate)
 
     def _read_examples_js(self, fn, language, fformat):
         """Infer and load the example file based on the root filename and root format."""
@@ -48,4 +48,5 @@ class LuisReader(JsonTrainingDataReader):
             if intent:
                 data["intent"] = intent
             training_examples.append(Message(text, data))
-        return TrainingData(training_examples, regex_features=regex_features)
+        return TrainingData(training_examples, regex_features=regex_features,
+                            validate=kwargs.get("validate", True))
@@ -3,6 +3,7 @@ from __future__ import division
 from __future__ import print_function
 from __future__ import unicode_literals
 
+import io
 import re
 import logging
 
@@ -15,13 +16,16 @@ from rasa_nlu.training_data.formats.readerwriter import TrainingDataReader, Trai
 INTENT = "intent"
 SYNONYM = "synonym"
 REGEX = "regex"
-available_sections = [INTENT, SYNONYM, REGEX]
+LOOKUP = "lookup"
+available_sections = [INTENT, SYNONYM, REGEX, LOOKUP]
 ent_regex = re.compile(r'\[(?P<entity_text>[^\]]+)'
                        r'\]\((?P<entity>\w*?)'
                        r'(?:\:(?P<value>[^)]+))?\)')  # [entity_text](entity_type(:entity_synonym)?)
 
 item_regex = re.compile(r'\s*[-\*+]\s*(.+)')
 comment_regex = re.compile(r'<!--[\s\S]*?--!*>', re.MULTILINE)
+comment_start_regex = re.compile(r'<!--')
+comment_end_regex = re.compile(r'--!*>')
 
 logger = logging.getLogger(__name__)
 
@@ -35,13 +39,21 @@ class MarkdownReader(TrainingDataReader):
         self.training_examples = []
         self.entity_synonyms = {}
         self.regex_features = []
+        self.lookup_tables = []
         self.section_regexes = self._create_section_regexes(available_sections)
 
+    def read(self, filename, **kwargs):
+        """Read markdown file line by line and create TrainingData object"""
+        with io.open(filename, encoding="utf-8-sig") as f:
+            return self._read_lines(f, kwargs.get("validate", True))
+
     def reads(self, s, **kwargs):
         """Read markdown string and create TrainingData object"""
+        return self._read_lines(s.splitlines(), kwargs.get("validate", True))
+
+    def _read_lines(self, lines, validate=True):
         self.__init__()
-        s = self._strip_comments(s)
-        for line in s.splitlines():
+        for line in self._strip_comments_from_lines(lines):
             line = line.strip()
             header = self._find_section_header(line)
             if header:
@@ -49,12 +61,54 @@ class MarkdownReader(TrainingDataReader):
             else:
                 self._parse_item(line)
 
-        return TrainingData(self.training_examples, self.entity_synonyms, self.regex_features)
+        return TrainingData(self.training_examples, self.entity_synonyms,
+                            self.regex_features, self.lookup_tables,
+                            validate=validate)
 
     @staticmethod
-    def _strip_comments(text):
-        """ Removes comments defined by `comment_regex` from `text`. """
-        return re.sub(comment_regex, '', text)
+    def _strip_comments_from_lines(lines):
+        """Removes comments defined by `comment_regex` from a sequence of
+        lines.
+
+        The text before a comment spanning multiple lines and the text
+        after it are joined to one line."""
+
+        prefix = None  # text before the comment that is still open
+        commented = []  # lines of the open comment
+        for line in lines:
+            line = line.rstrip("\r\n")
+            if prefix is not None:
+                end = comment_end_regex.search(line)
+                if end is None:
+                    commented.append(line)
+                    continue
+                line = prefix + line[end.end():]
+                prefix = None
+                commented = []
+
+            parts = []
+            while True:
+                start = comment_start_regex.search(line)
+                if start is None:
+                    parts.append(line)
+                    break
+                parts.append(line[:start.start()])
+                end = comment_end_regex.search(line, start.end())
+                if end is None:
+                    prefix = "".join(parts)
+                    commented = [line[start.start():]]
+                    break
+                line = line[end.end():]
+
+            if prefix is None:
+                yield "".join(parts)
+
+        if prefix is not None:
+            # `comment_regex` does not match comments which are never
+            # closed, they are kept
+            commented[0] = prefix + commented[0]
+            for line in commented:
+                yield line
 
     @staticmethod
     def _create_section_regexes(section_names):
@@ -81,8 +135,21 @@ class MarkdownReader(TrainingDataReader):
                 self.training_examples.append(parsed)
             elif self.current_section == SYNONYM:
                 self._add_synonym(item, self.current_title)
+            elif self.current_section == LOOKUP:
+                self._add_lookup_element(item)
             else:
                 self.regex_features.append({"name": self.current_title, "pattern": item})
+        elif line and self.current_section == LOOKUP:
+            # a lookup table can reference a file with one element per line
+            self.lookup_tables.append({"name": self.current_title, "elements": line})
+
+    def _add_lookup_element(self, element):
+        """Adds an element to the lookup table of the current section."""
+        if (not self.lookup_tables or
+                self.lookup_tables[-1]["name"] != self.current_title or
+                not isinstance(self.lookup_tables[-1]["elements"], list)):
+            self.lookup_tables.append({"name": self.current_title, "elements": []})
+        self.lookup_tables[-1]["elements"].append(element)
 
     def _find_entities_in_training_example(self, example):
         """Extracts entities from a markdown intent example."""
@@ -141,6 +208,7 @@ class MarkdownWriter(TrainingDataWriter):
         md += self._generate_training_examples_md(training_data)
         md += self._generate_synonyms_md(training_data)
         md += self._generate_regex_features_md(training_data)
+        md += self._generate_lookup_tables_md(training_data)
 
         return md
 
@@ -183,6 +251,20 @@ class MarkdownWriter(TrainingDataWriter):
 
         return md
 
+    def _generate_lookup_tables_md(self, training_data):
+        """generates markdown for lookup tables."""
+        md = u''
+        for lookup_table in training_data.lookup_tables:
+            md += self._generate_section_header_md(LOOKUP, lookup_table["name"])
+            elements = lookup_table["elements"]
+            if isinstance(elements, list):
+                for element in elements:
+                    md += self._generate_item_md(element)
+            else:
+                md += "{}\n".format(elements)
+
+        return md
+
     def _generate_section_header_md(self, section_type, title, prepend_newline=True):
         """generates markdown section header."""
         prefix = "\n" if prepend_newline else ""
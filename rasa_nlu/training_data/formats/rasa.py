@@ -3,11 +3,13 @@ from __future__ import division
 from __future__ import print_function
 from __future__ import unicode_literals
 
+import io
 import logging
 from collections import defaultdict
 
 from rasa_nlu.training_data import Message, TrainingData
 from rasa_nlu.training_data.formats.readerwriter import (
+    JsonStream,
     JsonTrainingDataReader,
     TrainingDataWriter)
 from rasa_nlu.training_data.util import transform_entity_synonyms
@@ -16,21 +18,74 @@ from rasa_nlu.utils import json_to_string
 logger = logging.getLogger(__name__)
 
 
+# sections of the rasa NLU data format containing training examples
+EXAMPLE_SECTIONS = ["common_examples", "intent_examples", "entity_examples"]
+
+
 class RasaReader(JsonTrainingDataReader):
+    def read(self, filename, **kwargs):
+        """Loads training data from a file in the rasa NLU data format.
+
+        The file is decoded example by example, the json document is never
+        loaded into memory as a whole."""
+
+        with io.open(filename, encoding="utf-8-sig") as f:
+            return self.read_from_stream(JsonStream(f),
+                                         kwargs.get("validate", True))
+
+    def read_from_stream(self, stream, validate=True):
+        # type: (JsonStream, bool) -> TrainingData
+        """Loads training data from a stream of json."""
+
+        if stream.peek() != "{":
+            # not an object - the validation describes the problem
+            validate_rasa_nlu_data(stream.read_value())
+
+        examples = {section: [] for section in EXAMPLE_SECTIONS}
+        data = {}
+        example_validator = _training_example_validator()
+
+        for key in stream.iter_object():
+            if key != "rasa_nlu_data" or stream.peek() != "{":
+                validate_rasa_nlu_data({key: stream.read_value()})
+                continue
+
+            for section in stream.iter_object():
+                if section not in EXAMPLE_SECTIONS or stream.peek() != "[":
+                    data[section] = stream.read_value()
+                    continue
+
+                for ex in stream.iter_array():
+                    _with_documentation_hint(example_validator.validate, ex)
+                    examples[section].append(self._build_message(ex))
+
+        validate_rasa_nlu_data({"rasa_nlu_data": data})
+        return self._training_data(examples, data, validate)
+
     def read_from_json(self, js, **kwargs):
         """Loads training data stored in the rasa NLU data format."""
         validate_rasa_nlu_data(js)
 
         data = js['rasa_nlu_data']
-        common_examples = data.get("common_examples", [])
-        intent_examples = data.get("intent_examples", [])
-        entity_examples = data.get("entity_examples", [])
+        examples = {section: [self._build_message(ex)
+                              for ex in data.get(section, [])]
+                    for section in EXAMPLE_SECTIONS}
+        return self._training_data(examples, data,
+                                   kwargs.get("validate", True))
+
+    @staticmethod
+    def _build_message(ex):
+        return Message.build(ex['text'], ex.get("intent"), ex.get("entities"))
+
+    @staticmethod
+    def _training_data(examples, data, validate=True):
         entity_synonyms = data.get("entity_synonyms", [])
         regex_features = data.get("regex_features", [])
+        lookup_tables = data.get("lookup_tables", [])
 
         entity_synonyms = transform_entity_synonyms(entity_synonyms)
 
-        if intent_examples or entity_examples:
+        if examples["intent_examples"] or examples["entity_examples"]:
             logger.warn("DEPRECATION warning: your rasa data "
                         "contains 'intent_examples' "
                         "or 'entity_examples' which will be "
@@ -38,14 +93,12 @@ class RasaReader(JsonTrainingDataReader):
                         "putting all your examples "
                         "into the 'common_examples' section.")
 
-        all_examples = common_examples + intent_examples + entity_examples
-        training_examples = []
-        for ex in all_examples:
-            msg = Message.build(ex['text'], ex.get("intent"),
-                                ex.get("entities"))
-            training_examples.append(msg)
+        training_examples = [ex
+                             for section in EXAMPLE_SECTIONS
+                             for ex in examples[section]]
 
-        return TrainingData(training_examples, entity_synonyms, regex_features)
+        return TrainingData(training_examples, entity_synonyms, regex_features,
+                            lookup_tables, validate)
 
 
 class RasaWriter(TrainingDataWriter):
@@ -66,6 +119,7 @@ class RasaWriter(TrainingDataWriter):
             "rasa_nlu_data": {
                 "common_examples": formatted_examples,
                 "regex_features": training_data.regex_features,
+                "lookup_tables": training_data.lookup_tables,
                 "entity_synonyms": formatted_synonyms
             }
         }, **kwargs)
@@ -77,10 +131,16 @@ def validate_rasa_nlu_data(data):
 
     Raises exception on failure."""
     from jsonschema import validate
+
+    _with_documentation_hint(validate, data, _rasa_nlu_data_schema())
+
+
+def _with_documentation_hint(validate, *args):
+    """Runs the validation, adding a hint to the documentation to errors."""
     from jsonschema import ValidationError
 
     try:
-        validate(data, _rasa_nlu_data_schema())
+        validate(*args)
     except ValidationError as e:
         e.message += (". Failed to validate training data, make sure your data "
                       "is valid. For more information about the format visit "
@@ -88,8 +148,16 @@ def validate_rasa_nlu_data(data):
         raise e
 
 
-def _rasa_nlu_data_schema():
-    training_example_schema = {
+def _training_example_validator():
+    """Creates the validator for single training examples once, instead of
+    for every example."""
+    from jsonschema import Draft4Validator
+
+    return Draft4Validator(_training_example_schema())
+
+
+def _training_example_schema():
+    return {
         "type": "object",
         "properties": {
             "text": {"type": "string", "minLength": 1},
@@ -111,6 +179,10 @@ def _rasa_nlu_data_schema():
         "required": ["text"]
     }
 
+
+def _rasa_nlu_data_schema():
+    training_example_schema = _training_example_schema()
+
     regex_feature_schema = {
         "type": "object",
         "properties": {
@@ -119,6 +191,20 @@ def _rasa_nlu_data_schema():
         }
     }
 
+    lookup_table_schema = {
+        "type": "object",
+        "properties": {
+            "name": {"type": "string"},
+            "elements": {
+                "oneOf": [
+                    {"type": "array", "items": {"type": "string"}},
+                    {"type": "string"}
+                ]
+            }
+        },
+        "required": ["name", "elements"]
+    }
+
     return {
         "type": "object",
         "properties": {
@@ -129,6 +215,10 @@ def _rasa_nlu_data_schema():
                         "type": "array",
                         "items": regex_feature_schema
                     },
+                    "lookup_tables": {
+                        "type": "array",
+                        "items": lookup_table_schema
+                    },
                     "common_examples": {
                         "type": "array",
                         "items": training_example_schema
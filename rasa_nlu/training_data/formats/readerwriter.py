@@ -4,8 +4,14 @@ from __future__ import print_function
 from __future__ import unicode_literals
 
 import json
+import re
+
+from builtins import object
+
 from rasa_nlu import utils
 
+_whitespace = re.compile(r'[ \t\n\r]*')
+
 
 class TrainingDataReader(object):
     def read(self, filename, **kwargs):
@@ -37,3 +43,109 @@ class JsonTrainingDataReader(TrainingDataReader):
     def read_from_json(self, js, **kwargs):
         """Reads TrainingData from a json object."""
         raise NotImplementedError
+
+
+class JsonStream(object):
+    """Decodes a json document incrementally while reading it from a file.
+
+    Objects and arrays can be iterated with `iter_object` and `iter_array`,
+    any other value is decoded at once with `read_value`. Only the value
+    currently decoded and the next chunk of the file are kept in memory."""
+
+    def __init__(self, f, chunk_size=64 * 1024):
+        self._file = f
+        self._chunk_size = chunk_size
+        self._buffer = ""
+        self._pos = 0
+        self._eof = False
+        self._decoder = json.JSONDecoder()
+
+    def _fill(self):
+        # type: () -> bool
+        """Reads the next chunk, returns `False` at the end of the file."""
+
+        if self._eof:
+            return False
+
+        # values which do not fit into the buffer double its size, this
+        # keeps the number of decoding attempts for large values low
+        pending = len(self._buffer) - self._pos
+        chunk = self._file.read(max(self._chunk_size, pending))
+        if not chunk:
+            self._eof = True
+            return False
+
+        self._buffer = self._buffer[self._pos:] + chunk
+        self._pos = 0
+        return True
+
+    def peek(self):
+        """Returns the next character which is not a whitespace.
+
+        The character is not consumed, `None` is returned at the end of
+        the file."""
+
+        while True:
+            self._pos = _whitespace.match(self._buffer, self._pos).end()
+            if self._pos < len(self._buffer):
+                return self._buffer[self._pos]
+            if not self._fill():
+                return None
+
+    def _expect(self, expected):
+        found = self.peek()
+        if found is None or found not in expected:
+            raise ValueError("Invalid json: expected one of '{}' but found "
+                             "'{}'.".format(expected, found))
+        self._pos += 1
+        return found
+
+    def read_value(self):
+        """Decodes the next value."""
+
+        self.peek()
+        while True:
+            try:
+                value, end = self._decoder.raw_decode(self._buffer, self._pos)
+            except ValueError:
+                if not self._fill():
+                    raise
+                continue
+
+            # a number at the end of the buffer (e.g. `1` of `1.5`) might
+            # continue in the next chunk
+            if ((end < len(self._buffer) and
+                 self._buffer[end] not in "0123456789.eE+-") or
+                    not self._fill()):
+                self._pos = end
+                return value
+
+    def iter_object(self):
+        """Yields the keys of the next object.
+
+        The value of each key has to be read before iterating further."""
+
+        self._expect("{")
+        if self.peek() == "}":
+            self._pos += 1
+            return
+
+        while True:
+            key = self.read_value()
+            self._expect(":")
+            yield key
+            if self._expect(",}") == "}":
+                return
+
+    def iter_array(self):
+        """Yields the decoded elements of the next array."""
+
+        self._expect("[")
+        if self.peek() == "]":
+            self._pos += 1
+            return
+
+        while True:
+            yield self.read_value()
+            if self._expect(",]") == "]":
+                return
@@ -41,4 +41,5 @@ class WitReader(JsonTrainingDataReader):
             if entities is not None:
                 data["entities"] = entities
             training_examples.append(Message(text, data))
-        return TrainingData(training_examples)
+        return TrainingData(training_examples,
+                            validate=kwargs.get("validate", True))
@@ -3,13 +3,17 @@ from __future__ import division
 from __future__ import print_function
 from __future__ import unicode_literals
 
+import io
 import json
 import logging
+import re
 
-from typing import Text, Optional
+from concurrent.futures import ProcessPoolExecutor as ProcessPool
+from typing import List, Optional, Text
 
 from rasa_nlu import utils
 from rasa_nlu.training_data import TrainingData
+from rasa_nlu.training_data import compiled
 from rasa_nlu.training_data.formats import (
     MarkdownReader, WitReader, LuisReader,
     RasaReader, DialogflowReader)
@@ -32,6 +36,9 @@ DIALOGFLOW_RELEVANT = {DIALOGFLOW_ENTITIES, DIALOGFLOW_INTENT}
 
 _markdown_section_markers = ["## {}:".format(s)
                              for s in markdown.available_sections]
+# number of characters read to guess the format of a file
+_format_prefix_length = 64 * 1024
+_rasa_prefix_regex = re.compile(r'\s*\{\s*"rasa_nlu_data"\s*:')
 _json_format_heuristics = {
     WIT: lambda js, fn: "data" in js and isinstance(js.get("data"), list),
     LUIS: lambda js, fn: "luis_schema_version" in js,
@@ -45,21 +52,83 @@ _json_format_heuristics = {
 }
 
 
-def load_data(resource_name, language='en'):
-    # type: (Text, Optional[Text]) -> TrainingData
-    """Load training data from disk. Merges them if multiple files are found."""
+def load_data(resource_name,
+              language='en',
+              num_processes=1,
+              use_cache=False,
+              cache_dir=None):
+    # type: (Text, Optional[Text], int, bool, Optional[Text]) -> TrainingData
+    """Load training data from disk. Merges them if multiple files are found.
+
+    Multiple files are parsed by `num_processes` worker processes. The
+    merged data is validated once, not every single file.
+
+    If `use_cache` is set, the parsed data is compiled into a binary file
+    next to the training data (or into `cache_dir`, if it is set) and
+    loaded from there as long as the training data does not change."""
+
+    files = [f
+             for f in utils.list_files(resource_name)
+             if not compiled.is_compiled_file(f)]
+
+    if not (use_cache or cache_dir) or not files:
+        return _load_data(files, language, num_processes)
+
+    content_hash = compiled.source_hash(files, language)
+    compiled_file = compiled.compiled_file_name(resource_name, content_hash,
+                                                cache_dir)
+    training_data = compiled.read_compiled(compiled_file, content_hash)
+    if training_data is not None:
+        logger.info("Loaded compiled training data from {}"
+                    "".format(compiled_file))
+        return training_data
+
+    training_data = _load_data(files, language, num_processes)
+    try:
+        compiled.write_compiled(training_data, compiled_file, content_hash)
+    except Exception as e:
+        # e.g. read only training data, the next load parses it again
+        logger.warning("Failed to store compiled training data in {}: {}"
+                       "".format(compiled_file, e))
+    return training_data
+
+
+def _load_data(files, language='en', num_processes=1):
+    # type: (List[Text], Optional[Text], int) -> TrainingData
+    """Parses and merges the training data files."""
+
+    if len(files) == 1:
+        return _load(files[0], language) or TrainingData()
+
+    if num_processes > 1 and len(files) > 1:
+        # send the files in chunks to reduce the overhead per file
+        chunk_size = -(-len(files) // (num_processes * 4))
+        chunks = [files[i:i + chunk_size]
+                  for i in range(0, len(files), chunk_size)]
+        with ProcessPool(min(num_processes, len(chunks))) as pool:
+            data_sets = [ds
+                         for chunk in pool.map(_load_files,
+                                               chunks,
+                                               [language] * len(chunks))
+                         for ds in chunk]
+    else:
+        data_sets = _load_files(files, language)
 
-    files = utils.list_files(resource_name)
-    data_sets = [_load(f, language) for f in files]
     data_sets = [ds for ds in data_sets if ds]
     if len(data_sets) == 0:
         return TrainingData()
-    elif len(data_sets) == 1:
-        return data_sets[0]
     else:
         return data_sets[0].merge(*data_sets[1:])
 
 
+def _load_files(files, language='en'):
+    # type: (List[Text], Optional[Text]) -> List[Optional[TrainingData]]
+    """Loads multiple files without validating each single file, their
+    merged data is validated once."""
+
+    return [_load(f, language, validate=False) for f in files]
+
+
 def _reader_factory(fformat):
     """Generates the appropriate reader class based on the file format."""
     reader = None
@@ -76,7 +145,7 @@ def _reader_factory(fformat):
     return reader
 
 
-def _load(filename, language='en'):
+def _load(filename, language='en', validate=True):
     """Loads a single training data file from disk."""
 
     fformat = _guess_format(filename)
@@ -87,16 +156,34 @@ def _load(filename, language='en'):
     reader = _reader_factory(fformat)
 
     if reader:
-        return reader.read(filename, language=language, fformat=fformat)
+        return reader.read(filename, language=language, fformat=fformat,
+                           validate=validate)
     else:
         return None
 
 
 def _guess_format(filename):
     # type: (Text) -> Text
-    """Applies heuristics to guess the data format of a file."""
+    """Applies heuristics to guess the data format of a file.
+
+    The rasa NLU and markdown formats are recognized from the beginning of
+    the file, other files are read completely."""
+
+    with io.open(filename, encoding="utf-8-sig") as f:
+        content = f.read(_format_prefix_length)
+        complete = not f.read(1)
+
+    if _rasa_prefix_regex.match(content):
+        return RASA
+
+    if not complete:
+        if (not content.lstrip().startswith(("{", "[")) and
+                any([marker in content
+                     for marker in _markdown_section_markers])):
+            return MARKDOWN
+        content = utils.read_file(filename)
+
     guess = UNK
-    content = utils.read_file(filename)
     try:
         js = json.loads(content)
     except ValueError:
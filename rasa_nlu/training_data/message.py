@@ -27,6 +27,17 @@ class Message(object):
     def get(self, prop, default=None):
         return self.data.get(prop, default)
 
+    def overlay(self):
+        # type: () -> Message
+        """Returns a message whose changes are not visible in this one.
+
+        The attribute values are shared between both messages, setting an
+        attribute of the overlay only changes the overlay. Hence, shared
+        values must not be modified in place."""
+
+        return Message(self.text, dict(self.data),
+                       set(self.output_properties), self.time)
+
     def as_dict(self, only_output_properties=False):
         if only_output_properties:
             d = {key: value
@@ -9,12 +9,13 @@ import logging
 import os
 import warnings
 
-from copy import deepcopy
+import copy
 from builtins import object, str
 from rasa_nlu.training_data import Message
 
 from typing import Any
 from typing import Dict
+from typing import Iterable
 from typing import List
 from typing import Optional
 from typing import Text
@@ -38,30 +39,40 @@ class TrainingData(object):
     def __init__(self,
                  training_examples=None,
                  entity_synonyms=None,
-                 regex_features=None):
+                 regex_features=None,
+                 lookup_tables=None,
+                 validate=True):
         # type: (Optional[List[Message]], Optional[Dict[Text, Text]]) -> None
+        """With `validate=False`, the data is neither validated nor are its
+        statistics logged, e.g. for parts of the data that get merged and
+        validated as a whole afterwards."""
 
-        if training_examples:
-            self.training_examples = self.sanitize_examples(training_examples)
-        else:
-            self.training_examples = []
+        self.training_examples = self._index_examples(training_examples or [])
         self.entity_synonyms = entity_synonyms if entity_synonyms else {}
         self.regex_features = regex_features if regex_features else []
         self.sort_regex_features()
+        self.lookup_tables = lookup_tables if lookup_tables else []
 
-        self.validate()
-        self.print_stats()
+        if validate:
+            self.validate()
+            self.print_stats()
 
     def merge(self, *others):
-        """Return merged instance of this data with other training data."""
+        """Return merged instance of this data with other training data.
 
-        training_examples = deepcopy(self.training_examples)
+        The examples are not copied, the merged data contains overlays of
+        them (see `Message.overlay`)."""
+
+        training_examples = [ex.overlay() for ex in self.training_examples]
         entity_synonyms = self.entity_synonyms.copy()
-        regex_features = deepcopy(self.regex_features)
+        regex_features = list(self.regex_features)
+        lookup_tables = list(self.lookup_tables)
 
         for o in others:
-            training_examples.extend(deepcopy(o.training_examples))
-            regex_features.extend(deepcopy(o.regex_features))
+            training_examples.extend(ex.overlay()
+                                     for ex in o.training_examples)
+            regex_features.extend(o.regex_features)
+            lookup_tables.extend(o.lookup_tables)
 
             for text, syn in o.entity_synonyms.items():
                 check_duplicate_synonym(entity_synonyms, text, syn,
@@ -69,7 +80,66 @@ class TrainingData(object):
 
             entity_synonyms.update(o.entity_synonyms)
 
-        return TrainingData(training_examples, entity_synonyms, regex_features)
+        return TrainingData(training_examples, entity_synonyms, regex_features,
+                            lookup_tables)
+
+    def overlay(self):
+        # type: () -> TrainingData
+        """Returns a copy of this data whose examples can be changed
+        without changing the examples of this data.
+
+        Training components set attributes of the examples (e.g. `tokens`
+        or `text_features`), these only end up in the overlays of the
+        examples. In contrast to a deep copy, the loaded attributes are
+        shared, so the copy needs little memory and time."""
+
+        data = copy.copy(self)
+        # lazy properties refer to the examples of this data
+        for name in list(vars(data)):
+            if name.startswith("_lazy_"):
+                delattr(data, name)
+
+        data.training_examples = [ex.overlay()
+                                  for ex in self.training_examples]
+        data.entity_synonyms = dict(self.entity_synonyms)
+        data.regex_features = list(self.regex_features)
+        data.lookup_tables = list(self.lookup_tables)
+        return data
+
+    def _index_examples(self, examples):
+        # type: (Iterable[Message]) -> List[Message]
+        """Sanitizes the examples and computes the statistics used by
+        `validate` and `print_stats` in a single pass over them."""
+
+        training_examples = []
+        intent_examples = []
+        entity_examples = []
+        examples_per_intent = Counter()
+        examples_per_entity = Counter()
+
+        for ex in examples:
+            intent = ex.get("intent")
+            if intent:
+                intent = intent.strip()
+                ex.set("intent", intent)
+                if intent:
+                    intent_examples.append(ex)
+            entities = ex.get("entities")
+            if entities:
+                entity_examples.append(ex)
+                examples_per_entity.update(e.get("entity") for e in entities)
+
+            examples_per_intent[intent] += 1
+            training_examples.append(ex)
+
+        # store the statistics for the lazy properties computing them
+        self._lazy_intent_examples = intent_examples
+        self._lazy_entity_examples = entity_examples
+        self._lazy_examples_per_intent = dict(examples_per_intent)
+        self._lazy_intents = set(examples_per_intent) - {None}
+        self._lazy_examples_per_entity = dict(examples_per_entity)
+        self._lazy_entities = set(examples_per_entity)
+        return training_examples
 
     @staticmethod
     def sanitize_examples(examples):
@@ -5,6 +5,7 @@ from __future__ import division
 from __future__ import print_function
 from __future__ import unicode_literals
 
+import io
 import logging
 
 logger = logging.getLogger(__name__)
@@ -24,3 +25,20 @@ def check_duplicate_synonym(entity_synonyms, text, syn, context_str=""):
     if text in entity_synonyms and entity_synonyms[text] != syn:
         logger.warning("Found inconsistent entity synonyms while {0}, overwriting {1}->{2}"
                        "with {1}->{2} during merge".format(context_str, text, entity_synonyms[text], syn))
+
+
+def lookup_table_elements(lookup_table):
+    """Yields the elements of a lookup table.
+
+    The elements are either listed in the table itself or are read from
+    the file the table references, one element per line."""
+    elements = lookup_table["elements"]
+    if isinstance(elements, list):
+        for element in elements:
+            yield element
+    else:
+        with io.open(elements, encoding="utf-8") as f:
+            for line in f:
+                element = line.strip()
+                if element:
+                    yield element
@@ -0,0 +1,310 @@
+from __future__ import absolute_import
+from __future__ import division
+from __future__ import print_function
+from __future__ import unicode_literals
+
+import logging
+import time
+import uuid
+
+from builtins import object
+from collections import OrderedDict
+from twisted.internet.defer import Deferred, fail, maybeDeferred, succeed
+from twisted.python.failure import Failure
+from typing import Any, Callable, Dict, List, Optional, Text
+
+from rasa_nlu.admission import AdmissionRejected
+
+logger = logging.getLogger(__name__)
+
+
+class TrainingJobCancelled(Exception):
+    """Raised to the requests waiting for a job that got cancelled."""
+
+    def __init__(self, job_id):
+        self.message = "Training job '{}' was cancelled.".format(job_id)
+
+    def __str__(self):
+        return self.message
+
+
+class TrainingJob(object):
+    """A training requested for a project.
+
+    Jobs are `queued` until the scheduler starts them, `running` jobs end up
+    `finished`, `failed` or - if they were cancelled while waiting -
+    `cancelled`."""
+
+    QUEUED = "queued"
+    RUNNING = "running"
+    FINISHED = "finished"
+    FAILED = "failed"
+    CANCELLED = "cancelled"
+
+    def __init__(self, project, arguments, priority=0):
+        # type: (Text, Dict[Text, Any], int) -> None
+
+        self.job_id = uuid.uuid4().hex
+        self.project = project
+        # passed on to the function running the job
+        self.arguments = arguments
+        self.priority = priority
+
+        self.status = self.QUEUED
+        self.submitted = time.time()
+        self.started = None  # type: Optional[float]
+        self.finished = None  # type: Optional[float]
+        self.model = None  # type: Optional[Text]
+        self.error = None  # type: Optional[Text]
+        self.peak_rss = None  # type: Optional[int]
+
+        self._failure = None
+        self._waiting = []  # type: List[Deferred]
+
+    @property
+    def done(self):
+        # type: () -> bool
+        return self.status in {self.FINISHED, self.FAILED, self.CANCELLED}
+
+    @property
+    def queue_time(self):
+        # type: () -> float
+        """Seconds the job waited (or is still waiting) to be started."""
+
+        end = self.started or self.finished or time.time()
+        return end - self.submitted
+
+    @property
+    def run_time(self):
+        # type: () -> Optional[float]
+        if self.started is None:
+            return None
+        return (self.finished or time.time()) - self.started
+
+    def wait(self):
+        # type: () -> Deferred
+        """Returns a deferred firing with the trained model once the job is
+        done. It fails if the job fails or gets cancelled."""
+
+        if self.status == self.FINISHED:
+            return succeed(self.model)
+        elif self.done:
+            return fail(self._failure)
+
+        d = Deferred()
+        self._waiting.append(d)
+        return d
+
+    def _finish(self, status, model=None, failure=None):
+        self.status = status
+        self.finished = time.time()
+        self.model = model
+        if failure is not None:
+            self._failure = failure
+            self.error = "{}".format(failure.value)
+
+        waiting, self._waiting = self._waiting, []
+        for d in waiting:
+            if failure is None:
+                d.callback(model)
+            else:
+                d.errback(failure)
+
+    def as_dict(self):
+        # type: () -> Dict[Text, Any]
+        return {"job_id": self.job_id,
+                "project": self.project,
+                "priority": self.priority,
+                "status": self.status,
+                "model": self.model,
+                "error": self.error,
+                "queue_time": self.queue_time,
+                "run_time": self.run_time,
+                "peak_rss": self.peak_rss}
+
+
+class TrainingScheduler(object):
+    """Queues training jobs and runs them once there is capacity.
+
+    `run_job` is a function taking a job and returning a deferred of the
+    tuple `(trained model, peak resident set size in bytes)`. At most
+    `max_running` jobs run at the same time and at most
+    `max_running_per_project` of them for the same project.
+
+    Jobs with a higher priority are started first. Among jobs of the same
+    priority, the project whose last job was started the longest time ago
+    goes first, so a burst of trainings for one project does not starve
+    the other projects. Queue limits of `0` mean unlimited, submissions
+    exceeding them are rejected with `AdmissionRejected`.
+
+    All methods have to be called from the reactor thread."""
+
+    def __init__(self,
+                 run_job,  # type: Callable[[TrainingJob], Deferred]
+                 max_running=1,  # type: int
+                 max_running_per_project=1,  # type: int
+                 max_queued=0,  # type: int
+                 max_queued_per_project=0,  # type: int
+                 max_finished=100,  # type: int
+                 retry_after=30  # type: int
+                 ):
+        # type: (...) -> None
+
+        self.run_job = run_job
+        self.max_running = max(max_running, 1)
+        self.max_running_per_project = max(max_running_per_project, 1)
+        self.max_queued = max_queued
+        self.max_queued_per_project = max_queued_per_project
+        self.max_finished = max_finished
+        self.retry_after = retry_after
+
+        self.submitted = 0
+        self.rejected = 0
+        self._queued = []  # type: List[TrainingJob]
+        self._running = OrderedDict()  # job id -> job
+        # the latest finished jobs, oldest first
+        self._finished = OrderedDict()  # job id -> job
+        self._running_per_project = {}  # type: Dict[Text, int]
+        # sequence number of the latest started job of each project
+        self._last_started = {}  # type: Dict[Text, int]
+        self._started = 0
+
+    def _queued_for(self, project):
+        return sum(1 for job in self._queued if job.project == project)
+
+    def _reject(self, message, status_code):
+        self.rejected += 1
+        logger.warning("Rejected training: {}".format(message))
+        raise AdmissionRejected(message, status_code, self.retry_after)
+
+    def submit(self, project, arguments, priority=0):
+        # type: (Text, Dict[Text, Any], int) -> TrainingJob
+        """Queues a new job and starts it if there is capacity."""
+
+        # queued jobs of other projects do not delay jobs which can start
+        starts_now = (len(self._running) < self.max_running and
+                      self._can_run(project) and
+                      not self._queued_for(project))
+
+        if not starts_now:
+            if (self.max_queued_per_project and
+                    self._queued_for(project) >=
+                    self.max_queued_per_project):
+                self._reject("Too many trainings queued for project '{}'."
+                             "".format(project), 429)
+            if self.max_queued and len(self._queued) >= self.max_queued:
+                self._reject("Too many trainings queued.", 503)
+
+        job = TrainingJob(project, arguments, priority)
+        self._queued.append(job)
+        self.submitted += 1
+        logger.debug("Queued training job '{}' for project '{}'."
+                     "".format(job.job_id, project))
+        self._schedule()
+        return job
+
+    def get(self, job_id):
+        # type: (Text) -> Optional[TrainingJob]
+
+        for job in self._queued:
+            if job.job_id == job_id:
+                return job
+        return self._running.get(job_id) or self._finished.get(job_id)
+
+    def cancel(self, job_id):
+        # type: (Text) -> Optional[TrainingJob]
+        """Removes a job from the queue.
+
+        Returns the cancelled job, `None` if the job does not exist. Jobs
+        which are not queued anymore are returned unchanged."""
+
+        job = self.get(job_id)
+        if job is None or job.status != TrainingJob.QUEUED:
+            return job
+
+        self._queued.remove(job)
+        self._remember_finished(job)
+        job._finish(TrainingJob.CANCELLED,
+                    failure=Failure(TrainingJobCancelled(job_id)))
+        return job
+
+    def _can_run(self, project):
+        return (self._running_per_project.get(project, 0) <
+                self.max_running_per_project)
+
+    def _next_job(self):
+        # type: () -> Optional[TrainingJob]
+
+        candidates = [job
+                      for job in self._queued
+                      if self._can_run(job.project)]
+        if not candidates:
+            return None
+
+        # `min` returns the first job among equal ones, i.e. the one
+        # submitted first
+        return min(candidates,
+                   key=lambda job: (-job.priority,
+                                    self._last_started.get(job.project, -1)))
+
+    def _schedule(self):
+        while len(self._running) < self.max_running:
+            job = self._next_job()
+            if job is None:
+                return
+            self._start(job)
+
+    def _start(self, job):
+        # type: (TrainingJob) -> None
+
+        self._queued.remove(job)
+        self._running[job.job_id] = job
+        self._running_per_project[job.project] = (
+            self._running_per_project.get(job.project, 0) + 1)
+        self._last_started[job.project] = self._started
+        self._started += 1
+
+        job.status = TrainingJob.RUNNING
+        job.started = time.time()
+        logger.info("Starting training job '{}' for project '{}' after {:.1f}"
+                    " seconds in the queue.".format(job.job_id, job.project,
+                                                    job.queue_time))
+
+        def finished(result):
+            model, job.peak_rss = result
+            job._finish(TrainingJob.FINISHED, model=model)
+            self._stopped(job)
+
+        def failed(failure):
+            job._finish(TrainingJob.FAILED, failure=failure)
+            self._stopped(job)
+
+        d = maybeDeferred(self.run_job, job)
+        d.addCallbacks(finished, failed)
+
+    def _stopped(self, job):
+        # type: (TrainingJob) -> None
+
+        del self._running[job.job_id]
+        self._running_per_project[job.project] -= 1
+        if not self._running_per_project[job.project]:
+            del self._running_per_project[job.project]
+        self._remember_finished(job)
+        self._schedule()
+
+    def _remember_finished(self, job):
+        self._finished[job.job_id] = job
+        while len(self._finished) > self.max_finished:
+            self._finished.popitem(last=False)
+
+    def as_dict(self):
+        # type: () -> Dict[Text, Any]
+        return {"running": [job.as_dict() for job in self._running.values()],
+                "queued": [job.as_dict() for job in self._queued],
+                "submitted": self.submitted,
+                "rejected": self.rejected,
+                "limits": {
+                    "max_running": self.max_running,
+                    "max_running_per_project": self.max_running_per_project,
+                    "max_queued": self.max_queued,
+                    "max_queued_per_project": self.max_queued_per_project}}
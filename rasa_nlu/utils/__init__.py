@@ -336,3 +336,43 @@ def create_temporary_file(data, suffix=""):
 
     f.close()
     return f.name
+
+
+def reset_peak_memory():
+    # type: () -> bool
+    """Resets the peak resident set size of this process.
+
+    Only supported on linux, returns whether the reset succeeded."""
+
+    try:
+        with io.open("/proc/self/clear_refs", "w") as f:
+            f.write("5")
+        return True
+    except (IOError, OSError):
+        return False
+
+
+def peak_memory():
+    # type: () -> Optional[int]
+    """Returns the peak resident set size of this process in bytes."""
+
+    try:
+        with io.open("/proc/self/status") as f:
+            for line in f:
+                if line.startswith("VmHWM:"):
+                    return int(line.split()[1]) * 1024
+    except (IOError, OSError):
+        pass
+
+    try:
+        import resource
+        import sys
+    except ImportError:
+        return None
+
+    max_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # macOS reports bytes, other systems kilobytes
+    if sys.platform == "darwin":
+        return max_rss
+    else:
+        return max_rss * 1024
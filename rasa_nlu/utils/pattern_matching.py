@@ -0,0 +1,287 @@
+from __future__ import absolute_import
+from __future__ import division
+from __future__ import print_function
+from __future__ import unicode_literals
+
+import bisect
+import io
+import os
+import re
+from builtins import object, range
+from collections import deque
+
+import numpy as np
+from typing import Dict, Iterable, Iterator, List, Optional, Text, Tuple
+
+# characters with a special meaning in regular expressions, patterns
+# without them match their literal text
+REGEX_SPECIAL_CHARACTERS = set("\\.^$*+?{}[]|()")
+
+
+def is_literal_pattern(pattern):
+    # type: (Text) -> bool
+    """Checks if a regex pattern only matches its literal text."""
+
+    return bool(pattern) and not any(c in REGEX_SPECIAL_CHARACTERS
+                                     for c in pattern)
+
+
+class AhoCorasickAutomaton(object):
+    """Finds all occurrences of a set of strings with one pass over a text.
+
+    States are numbered, state `0` is the root. For each state the
+    automaton stores its transitions, its failure transition and the ids of
+    the strings ending in that state (including the ones reached over
+    failure transitions)."""
+
+    def __init__(self, strings):
+        # type: (List[Text]) -> None
+
+        self.transitions = [{}]  # type: List[Dict[Text, int]]
+        self.outputs = [[]]  # type: List[List[int]]
+        self.lengths = [len(s) for s in strings]
+
+        for string_id, string in enumerate(strings):
+            state = 0
+            for c in string:
+                next_state = self.transitions[state].get(c)
+                if next_state is None:
+                    next_state = len(self.transitions)
+                    self.transitions[state][c] = next_state
+                    self.transitions.append({})
+                    self.outputs.append([])
+                state = next_state
+            self.outputs[state].append(string_id)
+
+        self.failures = self._build_failure_transitions()
+
+    def _build_failure_transitions(self):
+        # type: () -> List[int]
+
+        failures = [0] * len(self.transitions)
+        queue = deque(self.transitions[0].values())
+        while queue:
+            state = queue.popleft()
+            for c, next_state in self.transitions[state].items():
+                queue.append(next_state)
+                failure = failures[state]
+                while failure and c not in self.transitions[failure]:
+                    failure = failures[failure]
+                failure = self.transitions[failure].get(c, 0)
+                if failure == next_state:
+                    failure = 0
+                failures[next_state] = failure
+                # states are visited breadth first, so the outputs of the
+                # failure state are already complete
+                self.outputs[next_state] = (self.outputs[next_state] +
+                                            self.outputs[failure])
+        return failures
+
+    def iter_matches(self, text):
+        """Yields `(string id, start, end)` for every occurrence.
+
+        Occurrences are yielded ordered by their end."""
+
+        transitions = self.transitions
+        failures = self.failures
+        outputs = self.outputs
+        state = 0
+        for i, c in enumerate(text):
+            while state and c not in transitions[state]:
+                state = failures[state]
+            state = transitions[state].get(c, 0)
+            for string_id in outputs[state]:
+                yield string_id, i + 1 - self.lengths[string_id], i + 1
+
+
+class LookupIndex(object):
+    """Finds the elements of lookup tables in a text.
+
+    This is an Aho-Corasick automaton stored in flat integer arrays instead
+    of python objects, so even tables with millions of elements can be
+    persisted compactly and memory-mapped when a model is loaded.
+
+    Transitions are stored as sorted keys `state << 21 | code point` (21 bits
+    suffice for every unicode code point) with the target states aligned to
+    them. States ending a string point to the string ids (including the ones
+    reached over failure transitions), string ids point to the tables
+    containing that string. The root state `0` is never a target, so `0`
+    doubles as "no transition"."""
+
+    ARRAYS = ["keys", "targets", "failures", "output_offsets",
+              "output_strings", "string_lengths", "table_offsets",
+              "string_tables"]
+
+    def __init__(self, arrays):
+        # type: (Dict[Text, np.ndarray]) -> None
+
+        for name in self.ARRAYS:
+            # views of memory-maps keep using the mapped memory but avoid the
+            # overhead of the `np.memmap` subclass on every lookup
+            setattr(self, name, arrays[name].view(np.ndarray))
+
+    @classmethod
+    def build(cls, tables):
+        # type: (List[Iterable[Text]]) -> LookupIndex
+        """Builds the index of the elements of each table.
+
+        The same element may be part of several tables."""
+
+        string_ids = {}  # type: Dict[Text, int]
+        tables_of_string = []  # type: List[List[int]]
+        for table_id, elements in enumerate(tables):
+            for element in elements:
+                if not element:
+                    continue
+                string_id = string_ids.setdefault(element, len(string_ids))
+                if string_id == len(tables_of_string):
+                    tables_of_string.append([])
+                if table_id not in tables_of_string[string_id]:
+                    tables_of_string[string_id].append(table_id)
+
+        strings = sorted(string_ids, key=string_ids.get)
+        automaton = AhoCorasickAutomaton(strings)
+
+        keys = [(state << 21 | ord(c), target)
+                for state, transitions in enumerate(automaton.transitions)
+                for c, target in transitions.items()]
+        keys.sort()
+
+        return cls({
+            "keys": np.array([k for k, _ in keys], dtype=np.int64),
+            "targets": np.array([t for _, t in keys], dtype=np.int32),
+            "failures": np.array(automaton.failures, dtype=np.int32),
+            "output_offsets": cls._offsets(automaton.outputs),
+            "output_strings": cls._flatten(automaton.outputs),
+            "string_lengths": np.array(automaton.lengths, dtype=np.int32),
+            "table_offsets": cls._offsets(tables_of_string),
+            "string_tables": cls._flatten(tables_of_string)})
+
+    @staticmethod
+    def _offsets(lists):
+        offsets = np.zeros(len(lists) + 1, dtype=np.int64)
+        np.cumsum([len(l) for l in lists], out=offsets[1:])
+        return offsets
+
+    @staticmethod
+    def _flatten(lists):
+        return np.array([x for l in lists for x in l], dtype=np.int32)
+
+    def persist(self, index_dir):
+        # type: (Text) -> None
+        """Writes one `.npy` file per array into the directory."""
+
+        if not os.path.exists(index_dir):
+            os.makedirs(index_dir)
+        for name in self.ARRAYS:
+            with io.open(os.path.join(index_dir, name + ".npy"), "wb") as f:
+                np.save(f, getattr(self, name))
+
+    @classmethod
+    def load(cls, index_dir, mmap=True):
+        # type: (Text, bool) -> LookupIndex
+        """Loads a persisted index, memory-mapping its arrays by default."""
+
+        mmap_mode = "r" if mmap else None
+        return cls({name: np.load(os.path.join(index_dir, name + ".npy"),
+                                  mmap_mode=mmap_mode)
+                    for name in cls.ARRAYS})
+
+    def _transition(self, state, code):
+        # type: (int, int) -> int
+
+        key = state << 21 | code
+        i = int(self.keys.searchsorted(key))
+        if i < len(self.keys) and self.keys[i] == key:
+            return int(self.targets[i])
+        return 0
+
+    def iter_matches(self, text):
+        # type: (Text) -> Iterator[Tuple[int, int, int]]
+        """Yields `(table id, start, end)` for every element occurrence.
+
+        Occurrences are yielded ordered by their end."""
+
+        failures = self.failures
+        output_offsets = self.output_offsets
+        table_offsets = self.table_offsets
+        state = 0
+        for i, c in enumerate(text):
+            code = ord(c)
+            target = self._transition(state, code)
+            while not target and state:
+                state = int(failures[state])
+                target = self._transition(state, code)
+            state = target
+
+            for j in range(output_offsets[state], output_offsets[state + 1]):
+                string_id = self.output_strings[j]
+                start = i + 1 - int(self.string_lengths[string_id])
+                for k in range(table_offsets[string_id],
+                               table_offsets[string_id + 1]):
+                    yield int(self.string_tables[k]), start, i + 1
+
+
+class PatternMatcher(object):
+    """Searches a text for a list of regex patterns.
+
+    The result is the same as calling `re.search` for every pattern, but
+    literal patterns (the common case for lookup tables) are all found
+    with a single pass of an Aho-Corasick automaton and the other patterns
+    are compiled once up front."""
+
+    def __init__(self, patterns):
+        # type: (List[Text]) -> None
+
+        self.num_patterns = len(patterns)
+
+        literal_ids = [i
+                       for i, p in enumerate(patterns)
+                       if is_literal_pattern(p)]
+        self._literal_ids = literal_ids
+        self._automaton = AhoCorasickAutomaton([patterns[i]
+                                                for i in literal_ids])
+        self._compiled = [(i, re.compile(p))
+                          for i, p in enumerate(patterns)
+                          if not is_literal_pattern(p)]
+
+    def search(self, text):
+        # type: (Text) -> List[Optional[Tuple[int, int]]]
+        """Returns the span of the first match of each pattern.
+
+        Patterns without a match have a span of `None`."""
+
+        spans = [None] * self.num_patterns  # type: List[Optional[Tuple]]
+
+        # for a literal the first occurrence ending is also the first one
+        # starting, which is the occurrence `re.search` returns
+        for literal_id, start, end in self._automaton.iter_matches(text):
+            pattern_id = self._literal_ids[literal_id]
+            if spans[pattern_id] is None:
+                spans[pattern_id] = (start, end)
+
+        for pattern_id, regex in self._compiled:
+            match = regex.search(text)
+            if match is not None:
+                spans[pattern_id] = match.span()
+
+        return spans
+
+
+class TokenIndex(object):
+    """Maps character spans to the tokens overlapping them.
+
+    Uses binary search on the token offsets, hence the tokens must not
+    overlap."""
+
+    def __init__(self, tokens):
+        self.tokens = sorted(tokens, key=lambda t: t.offset)
+        self._offsets = [t.offset for t in self.tokens]
+        self._ends = [t.end for t in self.tokens]
+
+    def overlapping(self, start, end):
+        """Returns the tokens overlapping with the span `[start, end)`."""
+
+        first = bisect.bisect_right(self._ends, start)
+        last = bisect.bisect_left(self._offsets, end)
+        return [self.tokens[i] for i in range(first, last)]
@@ -3,7 +3,13 @@ from __future__ import division
 from __future__ import print_function
 from __future__ import unicode_literals
 
+import hashlib
+import io
 import logging
+import os
+import tempfile
+from collections import OrderedDict
+from threading import Lock
 
 import typing
 from typing import Any
@@ -11,7 +17,9 @@ from typing import Dict
 from typing import List
 from typing import Optional
 from typing import Text
+from typing import Tuple
 
+from rasa_nlu import utils
 from rasa_nlu.components import Component
 from rasa_nlu.config import RasaNLUModelConfig
 from rasa_nlu.training_data import Message
@@ -21,9 +29,131 @@ logger = logging.getLogger(__name__)
 
 if typing.TYPE_CHECKING:
     from spacy.language import Language
+    from spacy.tokens import Doc
+    from spacy.vocab import Vocab
     from rasa_nlu.model import Metadata
 
 
+class SpacyDocCache(object):
+    """Content addressed cache for parsed spacy docs.
+
+    Docs are stored under a hash of the model they were parsed with, the
+    casing option and their text, so training on the same sentences again
+    (e.g. when retraining or in cross validation folds) does not need to
+    parse them again. Recently used docs are kept in memory (a `max_size`
+    of `0` disables the memory cache), if a `cache_dir` is set all docs are
+    additionally stored there in spacy's binary format."""
+
+    def __init__(self, model_id, max_size=0, cache_dir=None):
+        # type: (Text, int, Optional[Text]) -> None
+
+        self.model_id = model_id
+        self.max_size = max_size
+        self.cache_dir = cache_dir
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()
+        self._lock = Lock()
+
+    def key(self, text, case_sensitive):
+        # type: (Text, bool) -> Text
+
+        content = "\n".join([self.model_id, str(case_sensitive), text])
+        return hashlib.sha1(content.encode("utf-8")).hexdigest()
+
+    def _path(self, key):
+        # spread the docs over subdirectories to keep directories small
+        return os.path.join(self.cache_dir, key[:2], key + ".bin")
+
+    def get(self, key, vocab):
+        # type: (Text, Vocab) -> Optional[Doc]
+        """Returns the cached doc or `None` on a miss."""
+
+        with self._lock:
+            doc = self._entries.pop(key, None)
+            if doc is not None:
+                # re-insert to mark the entry as most recently used
+                self._entries[key] = doc
+                self.hits += 1
+                return doc
+
+        if self.cache_dir and os.path.exists(self._path(key)):
+            from spacy.tokens import Doc
+
+            with io.open(self._path(key), "rb") as f:
+                doc = Doc(vocab).from_bytes(f.read())
+            self._remember(key, doc)
+            with self._lock:
+                self.hits += 1
+            return doc
+
+        with self._lock:
+            self.misses += 1
+        return None
+
+    def put(self, key, doc):
+        # type: (Text, Doc) -> None
+
+        self._remember(key, doc)
+
+        if self.cache_dir:
+            path = self._path(key)
+            utils.create_dir_for_file(path)
+            # write to a temporary file first, concurrent readers must
+            # never see a partially written doc
+            fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path))
+            with io.open(fd, "wb") as f:
+                f.write(doc.to_bytes())
+            os.rename(tmp_path, path)
+
+    def resize(self, max_size):
+        # type: (int) -> None
+        """Changes the number of docs kept in memory, evicting the least
+        recently used docs if there are too many."""
+
+        with self._lock:
+            self.max_size = max_size
+            self._evict()
+
+    def _remember(self, key, doc):
+        if self.max_size <= 0:
+            return
+
+        with self._lock:
+            self._entries.pop(key, None)
+            self._entries[key] = doc
+            self._evict()
+
+    def _evict(self):
+        while len(self._entries) > max(self.max_size, 0):
+            self._entries.popitem(last=False)
+
+    def __len__(self):
+        return len(self._entries)
+
+
+# the server creates new components for every training job, hence the doc
+# caches are kept per process and shared by all `SpacyNLP` instances
+_doc_caches = {}  # type: Dict[Tuple[Text, Optional[Text]], SpacyDocCache]
+_doc_caches_lock = Lock()
+
+
+def get_doc_cache(model_id, max_size=0, cache_dir=None):
+    # type: (Text, int, Optional[Text]) -> SpacyDocCache
+    """Returns the doc cache of this process for the spacy model.
+
+    The memory cache is resized to `max_size`, so the settings of the
+    component that used the cache last apply."""
+
+    with _doc_caches_lock:
+        cache = _doc_caches.get((model_id, cache_dir))
+        if cache is None:
+            cache = SpacyDocCache(model_id, max_size, cache_dir)
+            _doc_caches[(model_id, cache_dir)] = cache
+    cache.resize(max_size)
+    return cache
+
+
 class SpacyNLP(Component):
     name = "nlp_spacy"
 
@@ -41,12 +171,22 @@ class SpacyNLP(Component):
         # applications and models it makes sense to differentiate
         # between these two words, therefore setting this to `True`.
         "case_sensitive": False,
+
+        # number of parsed training examples to keep in memory, retraining
+        # on the same sentences reuses their docs instead of parsing them
+        # again. Set to `0` to disable the memory cache.
+        "doc_cache_size": 10000,
+
+        # directory to additionally store all parsed training examples in,
+        # e.g. to reuse them across training processes
+        "doc_cache_dir": None,
     }
 
     def __init__(self, component_config=None, nlp=None):
         # type: (Dict[Text, Any], Language) -> None
 
         self.nlp = nlp
+        self._doc_cache = None  # type: Optional[SpacyDocCache]
         super(SpacyNLP, self).__init__(component_config)
 
     @classmethod
@@ -97,17 +237,73 @@ class SpacyNLP(Component):
         else:
             return self.nlp(text.lower())
 
+    def docs_for_texts(self, texts):
+        """Parses all texts using spacy's multi document `pipe`."""
+
+        if not self.component_config.get("case_sensitive"):
+            texts = [text.lower() for text in texts]
+        return self.nlp.pipe(texts)
+
+    @property
+    def doc_cache(self):
+        # type: () -> SpacyDocCache
+
+        if self._doc_cache is None:
+            import spacy
+
+            meta = self.nlp.meta
+            model_id = "-".join([self.nlp.lang,
+                                 meta.get("name", ""),
+                                 meta.get("version", ""),
+                                 "spacy" + spacy.__version__])
+            self._doc_cache = get_doc_cache(
+                    model_id,
+                    self.component_config.get("doc_cache_size", 0),
+                    self.component_config.get("doc_cache_dir"))
+        return self._doc_cache
+
+    def cached_docs_for_texts(self, texts):
+        # type: (List[Text]) -> List[Doc]
+        """Parses all texts, docs of texts seen before are taken from the
+        doc cache."""
+
+        case_sensitive = self.component_config.get("case_sensitive")
+        cache = self.doc_cache
+
+        keys = [cache.key(text, case_sensitive) for text in texts]
+        docs = [cache.get(key, self.nlp.vocab) for key in keys]
+
+        missing = [i for i, doc in enumerate(docs) if doc is None]
+        parsed = self.docs_for_texts([texts[i] for i in missing])
+        for i, doc in zip(missing, parsed):
+            cache.put(keys[i], doc)
+            docs[i] = doc
+
+        if missing:
+            logger.debug("Parsed {} of {} texts, the other docs were "
+                         "cached.".format(len(missing), len(texts)))
+        return docs
+
     def train(self, training_data, config, **kwargs):
         # type: (TrainingData, RasaNLUModelConfig, **Any) -> None
 
-        for example in training_data.training_examples:
-            example.set("spacy_doc", self.doc_for_text(example.text))
+        examples = training_data.training_examples
+        docs = self.cached_docs_for_texts([e.text for e in examples])
+        for example, doc in zip(examples, docs):
+            example.set("spacy_doc", doc)
 
     def process(self, message, **kwargs):
         # type: (Message, **Any) -> None
 
         message.set("spacy_doc", self.doc_for_text(message.text))
 
+    def process_batch(self, messages, **kwargs):
+        # type: (List[Message], **Any) -> None
+
+        docs = self.docs_for_texts([message.text for message in messages])
+        for message, doc in zip(messages, docs):
+            message.set("spacy_doc", doc)
+
     @classmethod
     def load(cls,
              model_dir=None,
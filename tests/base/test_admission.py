@@ -0,0 +1,56 @@
+from __future__ import absolute_import
+from __future__ import division
+from __future__ import print_function
+from __future__ import unicode_literals
+
+from rasa_nlu.admission import AdmissionController, AdmissionRejected
+
+
+def test_requests_wait_for_free_slot():
+    admission = AdmissionController(max_concurrent=1)
+
+    first = []
+    second = []
+    admission.acquire("default").addCallback(first.append)
+    admission.acquire("default").addCallback(second.append)
+
+    assert first == [None] and second == []
+    assert admission.running == 1 and admission.queued == 1
+
+    admission.release("default")
+    assert second == [None]
+    assert admission.running == 1 and admission.queued == 0
+
+
+def test_requests_are_rejected_if_queue_is_full():
+    admission = AdmissionController(max_concurrent=1, max_queued=1,
+                                    retry_after=5)
+
+    admission.acquire("default")
+    admission.acquire("default")
+
+    errors = []
+    admission.acquire("other").addErrback(errors.append)
+
+    assert len(errors) == 1
+    assert errors[0].check(AdmissionRejected)
+    assert errors[0].value.status_code == 503
+    assert errors[0].value.retry_after == 5
+    assert admission.as_dict()["rejected"] == 1
+
+
+def test_project_limits_do_not_block_other_projects():
+    admission = AdmissionController(max_concurrent_per_project=1,
+                                    max_queued_per_project=1)
+
+    started = []
+    admission.acquire("busy").addCallback(started.append)
+    admission.acquire("busy")
+    admission.acquire("other").addCallback(started.append)
+
+    errors = []
+    admission.acquire("busy").addErrback(errors.append)
+
+    assert started == [None, None]
+    assert errors[0].value.status_code == 429
+    assert admission.as_dict()["queued_per_project"] == {"busy": 1}
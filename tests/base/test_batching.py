@@ -0,0 +1,86 @@
+from __future__ import absolute_import
+from __future__ import division
+from __future__ import print_function
+from __future__ import unicode_literals
+
+from twisted.internet.defer import Deferred
+from twisted.internet.task import Clock
+
+from rasa_nlu.batching import MicroBatcher
+
+
+class BatchRecorder(object):
+    def __init__(self):
+        self.batches = []
+        self.results = []
+
+    def __call__(self, data):
+        self.batches.append([d["text"] for d in data])
+        result = Deferred()
+        self.results.append(result)
+        return result
+
+    def finish(self, i):
+        self.results[i].callback(
+                [{"text": text} for text in self.batches[i]])
+
+
+def test_requests_of_same_iteration_are_batched():
+    clock = Clock()
+    recorder = BatchRecorder()
+    batcher = MicroBatcher(recorder, max_batch_size=10, max_wait=5,
+                           clock=clock)
+
+    responses = []
+    for text in ["hello", "bye"]:
+        batcher.parse({"text": text}).addCallback(responses.append)
+    batcher.parse({"text": "hi", "project": "other"})
+
+    clock.advance(0)
+    assert recorder.batches == [["hello", "bye"], ["hi"]]
+
+    recorder.finish(0)
+    assert responses == [{"text": "hello"}, {"text": "bye"}]
+
+
+def test_requests_wait_for_running_batch():
+    clock = Clock()
+    recorder = BatchRecorder()
+    batcher = MicroBatcher(recorder, max_batch_size=10, max_wait=5,
+                           clock=clock)
+
+    batcher.parse({"text": "first"})
+    clock.advance(0)
+    batcher.parse({"text": "second"})
+    batcher.parse({"text": "third"})
+    clock.advance(0.001)
+    assert recorder.batches == [["first"]]
+
+    # finishing the running batch flushes the waiting requests
+    recorder.finish(0)
+    assert recorder.batches == [["first"], ["second", "third"]]
+
+
+def test_full_batch_is_parsed_without_waiting():
+    clock = Clock()
+    recorder = BatchRecorder()
+    batcher = MicroBatcher(recorder, max_batch_size=2, max_wait=5,
+                           clock=clock)
+
+    batcher.parse({"text": "first"})
+    batcher.parse({"text": "second"})
+    assert recorder.batches == [["first", "second"]]
+    assert not clock.getDelayedCalls()
+
+
+def test_batch_errors_are_passed_to_all_requests():
+    clock = Clock()
+    batcher = MicroBatcher(lambda data: 1 / 0, max_batch_size=2,
+                           clock=clock)
+
+    errors = []
+    for text in ["hello", "bye"]:
+        batcher.parse({"text": text}).addErrback(errors.append)
+
+    assert [e.type for e in errors] == [ZeroDivisionError,
+                                        ZeroDivisionError]
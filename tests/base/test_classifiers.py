@@ -0,0 +1,167 @@
+from __future__ import absolute_import
+from __future__ import division
+from __future__ import print_function
+from __future__ import unicode_literals
+
+import numpy as np
+import pytest
+
+from rasa_nlu.classifiers import top_k
+from rasa_nlu.classifiers.embedding_intent_classifier import (
+    l2_normalize, numpy_embed, prefetch, sample_negatives,
+    warm_start_input_rows)
+from rasa_nlu.classifiers.linear_intent_classifier import (
+    LinearIntentClassifier)
+from rasa_nlu.training_data import Message, TrainingData
+
+
+def test_numpy_embed_applies_relu_to_hidden_layers():
+    layers = [(np.array([[1., -1.], [0., 1.]]), np.array([0., 0.5])),
+              (np.array([[2.], [1.]]), np.array([-1.]))]
+    x = np.array([[1., 2.], [1., 0.]])
+
+    # hidden layer: [[1, 1.5], [1, -0.5]] -> relu -> [[1, 1.5], [1, 0]]
+    assert np.allclose(numpy_embed(x, layers), [[2.5], [1.]])
+
+
+def test_l2_normalize():
+    normalized = l2_normalize(np.array([[3., 4.], [0., 0.]]))
+    assert np.allclose(normalized, [[0.6, 0.8], [0., 0.]])
+
+
+def test_sampled_negatives_are_never_the_correct_intent():
+    np.random.seed(42)
+    intent_ids = np.random.randint(5, size=1000)
+
+    negs = sample_negatives(intent_ids, 5, 4)
+
+    assert negs.shape == (1000, 4)
+    assert not np.any(negs == intent_ids[:, np.newaxis])
+    assert negs.min() == 0 and negs.max() == 4
+    # the wrong intents are sampled uniformly
+    counts = np.bincount(negs[intent_ids == 2].ravel(), minlength=5)
+    assert counts[2] == 0
+    expected = counts.sum() / 4.
+    assert np.allclose(np.delete(counts, 2), expected, rtol=0.2)
+
+
+def test_warm_start_moves_features_after_the_bag_of_words():
+    # 3 known words and 2 regex features
+    old_kernel = np.array([[1.], [2.], [3.], [10.], [11.]])
+    # a new word got added to the bag of words
+    kernel = np.zeros((6, 1))
+
+    rows = warm_start_input_rows(kernel, old_kernel, 4, 3)
+    assert rows.ravel().tolist() == [1., 2., 3., 0., 10., 11.]
+
+    # a new regex feature, its old weights can not be matched up
+    rows = warm_start_input_rows(np.zeros((7, 1)), old_kernel, 4, 3)
+    assert rows.ravel().tolist() == [1., 2., 3., 0., 0., 0., 0.]
+
+    # without a bag of words, only unchanged inputs are reused
+    assert np.all(warm_start_input_rows(kernel[:5], old_kernel,
+                                        None, None) == old_kernel)
+    assert np.all(warm_start_input_rows(kernel, old_kernel,
+                                        None, None) == 0.)
+
+
+def test_top_k_sorts_the_largest_values():
+    sim = np.array([[0.1, 0.7, 0.3, 0.9],
+                    [0.5, 0.2, 0.8, 0.4]])
+
+    ids, values = top_k(sim, 2)
+    assert ids.tolist() == [[3, 1], [2, 0]]
+    assert np.allclose(values, [[0.9, 0.7], [0.8, 0.5]])
+
+    ids, values = top_k(sim, 10)
+    assert ids.tolist() == [[3, 1, 2, 0], [2, 0, 3, 1]]
+
+
+def test_prefetch_yields_all_items_in_order():
+    assert list(prefetch(iter(range(10)), buffer_size=2)) == list(range(10))
+
+
+def test_prefetch_raises_errors_of_the_producer():
+    def items():
+        yield 1
+        raise ValueError("broken batch")
+
+    prefetched = prefetch(items())
+    assert next(prefetched) == 1
+    with pytest.raises(ValueError):
+        next(prefetched)
+
+
+def test_prefetch_stops_producer_if_consumer_stops():
+    produced = []
+
+    def items():
+        for i in range(100):
+            produced.append(i)
+            yield i
+
+    prefetched = prefetch(items(), buffer_size=1)
+    assert next(prefetched) == 0
+    prefetched.close()
+    assert len(produced) < 100
+
+
+def _linear_training_data(num_intents):
+    rng = np.random.RandomState(42)
+    examples = []
+    for i in range(30 * num_intents):
+        intent = i % num_intents
+        features = rng.binomial(1, 0.2, size=10).astype(float)
+        features[intent] = 1.
+        examples.append(Message("example {}".format(i),
+                                {"intent": "intent_{}".format(intent),
+                                 "text_features": features}))
+    return TrainingData(training_examples=examples)
+
+
+@pytest.mark.parametrize("num_intents", [2, 3])
+def test_linear_classifier_probabilities_match_sklearn(num_intents):
+    from sklearn.linear_model import LogisticRegression
+
+    training_data = _linear_training_data(num_intents)
+    classifier = LinearIntentClassifier({"C": [1],
+                                         "max_cross_validation_folds": 2,
+                                         "max_iterations": 200})
+    classifier.train(training_data, None)
+
+    X = np.stack([e.get("text_features")
+                  for e in training_data.intent_examples])
+    y = [e.get("intent") for e in training_data.intent_examples]
+    expected = LogisticRegression(C=1, max_iter=200).fit(X, y)
+
+    assert np.allclose(classifier.predict_prob(X),
+                       expected.predict_proba(X), atol=1e-2)
+
+    message = training_data.intent_examples[0]
+    classifier.process(message)
+    ranking = message.get("intent_ranking")
+    assert message.get("intent") == ranking[0]
+    assert len(ranking) == num_intents
+    assert np.isclose(sum(r["confidence"] for r in ranking), 1.)
+
+
+def test_linear_classifier_accepts_sparse_features():
+    import scipy.sparse
+
+    training_data = _linear_training_data(3)
+    dense = LinearIntentClassifier({"C": [1]})
+    dense.train(training_data, None)
+
+    for example in training_data.intent_examples:
+        example.set("text_features",
+                    scipy.sparse.csr_matrix(example.get("text_features")))
+    sparse = LinearIntentClassifier({"C": [1]})
+    sparse.train(training_data, None)
+
+    messages = [Message(e.text, {"text_features": e.get("text_features")})
+                for e in training_data.intent_examples]
+    sparse.process_batch(messages)
+    for message, example in zip(messages, training_data.intent_examples):
+        dense.process(example)
+        assert (message.get("intent")["name"] ==
+                example.get("intent")["name"])
@@ -3,10 +3,19 @@ from __future__ import division
 from __future__ import print_function
 from __future__ import unicode_literals
 
+import io
+import json
+import os
+
 import mock
+from concurrent.futures import Future
+from twisted.internet.defer import succeed
 
 from rasa_nlu import data_router
 from rasa_nlu import persistor
+from rasa_nlu import utils
+from rasa_nlu.project import Project
+from rasa_nlu.training_data import compiled
 
 
 def test_list_projects_in_cloud_method():
@@ -30,3 +39,177 @@ def test_list_projects_in_cloud_method():
                            mocked_get_persistor):
         return_value = data_router.DataRouter()._list_projects_in_cloud()
     assert isinstance(return_value[0], UniqueValue)
+
+
+def test_preload_models(tmpdir):
+    router = data_router.DataRouter(tmpdir.strpath)
+
+    with mock.patch.object(router.project_store["default"], "warm_up",
+                           return_value="fallback") as warm_up:
+        loaded = router.preload("latest", ["hello"])
+
+    warm_up.assert_called_once_with(None, ["hello"])
+    assert loaded == ["default/fallback"]
+
+
+def test_preload_skips_models_which_can_not_be_forked(tmpdir):
+    classifier = {"name": "intent_classifier_tensorflow_embedding",
+                  "classifier_file": "classifier.ckpt"}
+    numpy_classifier = dict(classifier,
+                            numpy_inference=True,
+                            numpy_weights_file="weights.npz")
+    for project, component in [("tf", classifier),
+                               ("numpy", numpy_classifier)]:
+        tmpdir.join(project, "model_20180101-000000", "metadata.json").write(
+                json.dumps({"pipeline": [component]}), ensure=True)
+    router = data_router.DataRouter(tmpdir.strpath)
+
+    with mock.patch.object(Project, "warm_up", autospec=True,
+                           return_value="model_20180101-000000"):
+        loaded = router.preload(["tf", "numpy"], fork_safe_only=True)
+
+    assert loaded == ["numpy/model_20180101-000000"]
+
+
+def test_training_processes_are_started_on_first_use(tmpdir):
+    router = data_router.DataRouter(tmpdir.strpath)
+    router.get_status()
+
+    assert router._pool is None
+    assert router.training_scheduler.as_dict()["submitted"] == 0
+
+
+def test_preload_unknown_project(tmpdir):
+    router = data_router.DataRouter(tmpdir.strpath)
+
+    assert router.preload(["unknown/model_a"]) == []
+
+
+def test_parse_in_worker_process_function(tmpdir):
+    config = {"project_dir": tmpdir.strpath}
+
+    responses, model = data_router.do_parse_in_worker(
+            config, "default", "fallback", ["hello", "bye"], [None, None])
+
+    assert model == "fallback"
+    assert [r["intent"]["name"] for r in responses] == ["greet", "goodbye"]
+
+    # the worker keeps its router between requests
+    router = data_router._worker_router
+    data_router.do_parse_in_worker(config, "default", "fallback",
+                                   ["hello"], [None])
+    assert data_router._worker_router is router
+    data_router._worker_router = None
+
+
+def test_parse_with_worker_processes(tmpdir):
+    router = data_router.DataRouter(tmpdir.strpath, parse_processes=1)
+
+    with mock.patch.object(data_router, "DEFERRED_RUN_IN_REACTOR_THREAD",
+                           False):
+        results = []
+        router.parse_in_worker({"text": "hello"}).addCallback(
+                results.append)
+        router.parse_batch_in_worker([{"text": "bye"}]).addCallback(
+                results.append)
+        router.parse_pool.shutdown(wait=True)
+
+    assert results[0]["intent"]["name"] == "greet"
+    assert results[1][0]["intent"]["name"] == "goodbye"
+
+
+def test_unloading_a_model_restarts_the_parse_workers(tmpdir):
+    router = data_router.DataRouter(tmpdir.strpath, parse_processes=1)
+    router._worker_config["preload"] = {"preload": "latest"}
+    old_pool = router.parse_pool
+
+    with mock.patch.object(old_pool, "shutdown",
+                           wraps=old_pool.shutdown) as shutdown:
+        assert router.unload_model("default", "fallback") == "fallback"
+
+    shutdown.assert_called_once_with(wait=False)
+    assert router.parse_pool is not old_pool
+    # the new workers don't preload the model again
+    assert router._worker_config["preload"]["exclude"] == ["default/fallback"]
+    router.shutdown()
+
+
+def test_parse_workers_keep_the_model_budget(tmpdir):
+    keyword = {"name": "intent_classifier_keyword",
+               "class": "rasa_nlu.classifiers.keyword_intent_classifier."
+                        "KeywordIntentClassifier"}
+    models = ["model_20180101-000000", "model_20180102-000000"]
+    for model in models:
+        tmpdir.join("test", model, "metadata.json").write(
+                json.dumps({"pipeline": [keyword]}), ensure=True)
+    config = {"project_dir": tmpdir.strpath, "max_loaded_models": 1}
+
+    for model in models:
+        data_router.do_parse_in_worker(config, "test", model,
+                                       ["hello"], [None])
+
+    router = data_router._worker_router
+    assert router.project_store["test"]._list_loaded_models() == models[1:]
+    assert router.residency.evictions == 1
+    data_router._worker_router = None
+
+
+def test_preload_excludes_models(tmpdir):
+    router = data_router.DataRouter(tmpdir.strpath)
+
+    assert router.preload("latest", exclude=["default/fallback"]) == []
+    assert router.preload("latest") == ["default/fallback"]
+
+
+def test_parse_worker_preloads_once_before_handling_requests(tmpdir):
+    config = {"project_dir": tmpdir.strpath,
+              "preload": {"preload": "latest",
+                          "warmup_utterances": ["hello"],
+                          "num_threads": 1}}
+    try:
+        assert data_router.do_preload_in_worker(config) == ["default/fallback"]
+
+        with mock.patch.object(data_router.DataRouter, "preload") as preload:
+            data_router.do_parse_in_worker(config, "default", "fallback",
+                                           ["hello"], [None])
+            data_router.do_preload_in_worker(config)
+        preload.assert_not_called()
+    finally:
+        data_router._worker_router = None
+        data_router._worker_preloaded = None
+
+
+def test_parse_worker_model_is_resolved_outside_of_the_reactor(tmpdir):
+    router = data_router.DataRouter(tmpdir.strpath, parse_processes=1)
+    resolved_in_thread = []
+
+    def defer_to_thread(f, *args, **kwargs):
+        resolved_in_thread.append(f)
+        return succeed(f(*args, **kwargs))
+
+    with mock.patch.object(data_router, "DEFERRED_RUN_IN_REACTOR_THREAD",
+                           True), \
+            mock.patch.object(data_router.threads, "deferToThread",
+                              defer_to_thread), \
+            mock.patch.object(router, "_parse_pool") as pool:
+        pool.submit.return_value = Future()
+        router.parse_in_worker({"text": "hello"})
+
+    assert len(resolved_in_thread) == 1
+    assert pool.submit.call_args[0][3] == "fallback"
+
+
+def test_training_data_cache_keeps_its_size_limit(tmpdir):
+    cache_dir = tmpdir.join("cache")
+    router = data_router.DataRouter(tmpdir.strpath,
+                                    training_data_cache_dir=cache_dir.strpath,
+                                    training_data_cache_size=1)
+    for content_hash in ["a", "b"]:
+        filename = compiled.compiled_file_name("data", content_hash,
+                                               cache_dir.strpath)
+        utils.create_dir_for_file(filename)
+        with io.open(filename, "wb") as f:
+            f.write(b"0" * 768 * 1024)
+
+    assert router._prune_training_data_cache("result") == "result"
+    assert len(os.listdir(cache_dir.strpath)) == 1
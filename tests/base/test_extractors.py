@@ -58,6 +58,43 @@ def test_crf_extractor(spacy_nlp):
     }, 'Original examples are not mutated'
 
 
+def test_crf_sentence_to_features():
+    from rasa_nlu.extractors.crf_entity_extractor import CRFEntityExtractor
+    ext = CRFEntityExtractor(component_config={
+        "features": [["low"], ["title", "pattern"], ["low", "digit"]]})
+    sentence = [("Berlin", "NNP", "N/A", 1), ("at", "IN", "N/A", None),
+                ("12", "CD", "N/A", None)]
+
+    assert ext._sentence_to_features(sentence) == [
+        {"BOS": True, "0:title": True, "0:pattern": "1",
+         "1:low": "at", "1:digit": False},
+        {"-1:low": "berlin", "0:title": False, "0:pattern": "N/A",
+         "1:low": "12", "1:digit": True},
+        {"-1:low": "at", "0:title": False, "0:pattern": "N/A",
+         "EOS": True}]
+
+
+def test_crf_hyperparameter_search():
+    from rasa_nlu.extractors.crf_entity_extractor import CRFEntityExtractor
+    ext = CRFEntityExtractor(component_config={
+        "features": [["low"], ["low", "title"], ["low"]],
+        "L1_c": [0.01, 0.1], "L2_c": [0.001, 0.01], "max_iterations": 20,
+        "max_cross_validation_folds": 2})
+    dataset = [[("to", "IN", "O", None), (city, "NNP", "U-city", None)]
+               for city in ["berlin", "paris", "rome", "oslo"]] * 2
+
+    ext._train_model(dataset, num_threads=2)
+
+    report = ext.search_report
+    assert len(report["candidates"]) == 4
+    assert report["best_params"]["max_iterations"] == 20
+    assert report["best_params"] in [c["params"]
+                                     for c in report["candidates"]]
+    features = ext._sentence_to_features([("to", "IN", "O", None),
+                                          ("rome", "NNP", "O", None)])
+    assert ext.ent_tagger.predict_single(features) == ["O", "U-city"]
+
+
 def test_crf_json_from_BILOU(spacy_nlp):
     from rasa_nlu.extractors.crf_entity_extractor import CRFEntityExtractor
     ext = CRFEntityExtractor()
@@ -6,10 +6,12 @@ from __future__ import unicode_literals
 import os
 
 import numpy as np
+import scipy.sparse
 import pytest
 
 from rasa_nlu import training_data, config
 from rasa_nlu.config import RasaNLUModelConfig
+from rasa_nlu.featurizers import Featurizer, stack_text_features
 from rasa_nlu.tokenizers.mitie_tokenizer import MitieTokenizer
 from rasa_nlu.tokenizers.spacy_tokenizer import SpacyTokenizer
 from rasa_nlu.training_data import Message
@@ -101,6 +103,31 @@ def test_regex_featurizer(sentence, expected, labeled_tokens, spacy_nlp):
             assert token.get("pattern") is None
 
 
+def test_regex_featurizer_lookup_tables(tmpdir):
+    from rasa_nlu.featurizers.regex_featurizer import RegexFeaturizer
+    from rasa_nlu.model import Metadata
+    from rasa_nlu.tokenizers.whitespace_tokenizer import WhitespaceTokenizer
+
+    td = training_data.load_data("data/test/lookup_tables/lookup_tables.md")
+    td.regex_features = [{"name": "number", "pattern": "[0-9]+"}]
+    ftr = RegexFeaturizer()
+    ftr.train(td, RasaNLUModelConfig())
+
+    meta = ftr.persist(tmpdir.strpath)
+    meta["name"] = ftr.name
+    loaded = RegexFeaturizer.load(tmpdir.strpath,
+                                  Metadata({"pipeline": [meta]}, None))
+
+    for featurizer in [ftr, loaded]:
+        message = Message("I want Mapo Tofu in Berlin, not beefsteak")
+        WhitespaceTokenizer().process(message)
+        result = featurizer.features_for_patterns(message)
+        assert np.all(result == [0.0, 1.0, 1.0])
+        patterns = [t.get("pattern") for t in message.get("tokens")]
+        # patterns and lookup tables are numbered in this order
+        assert patterns == [None, None, 2, 2, None, 1, None, None]
+
+
 def test_spacy_featurizer_casing(spacy_nlp):
     from rasa_nlu.featurizers import spacy_featurizer
 
@@ -140,4 +167,42 @@ def test_count_vector_featurizer(sentence, expected):
     ftr.train(data)
     ftr.process(message)
 
-    assert np.all(message.get("text_features")[0] == expected)
+    assert scipy.sparse.issparse(message.get("text_features"))
+    assert np.all(message.get("text_features").toarray()[0] == expected)
+
+
+def test_count_vector_featurizer_process_batch():
+    from rasa_nlu.featurizers.count_vectors_featurizer import \
+        CountVectorsFeaturizer
+
+    ftr = CountVectorsFeaturizer({"token_pattern": r'(?u)\b\w+\b'})
+    sentences = ["hello goodbye hello", "a b c", "hello a 1 2"]
+    data = TrainingData([Message(s, {"intent": "bla"}) for s in sentences])
+    # hello, goodbye, a, b, c and the numbers replaced by NUMBER
+    assert ftr.train(data) == {"bag_of_words_size": 6}
+
+    single = [Message(s) for s in sentences]
+    for message in single:
+        ftr.process(message)
+    batch = [Message(s) for s in sentences]
+    ftr.process_batch(batch)
+
+    for m_single, m_batch in zip(single, batch):
+        assert np.all(m_single.get("text_features").toarray() ==
+                      m_batch.get("text_features").toarray())
+
+
+def test_combine_sparse_with_dense_text_features():
+    message = Message("hello")
+    message.set("text_features", scipy.sparse.csr_matrix([[0, 1, 0]]))
+
+    combined = Featurizer._combine_with_existing_text_features(
+            message, np.array([1, 0]))
+
+    assert scipy.sparse.issparse(combined)
+    assert np.all(combined.toarray() == [[0, 1, 0, 1, 0]])
+
+    message.set("text_features", combined)
+    stacked = stack_text_features([message, message])
+    assert scipy.sparse.issparse(stacked)
+    assert stacked.shape == (2, 5)
@@ -8,7 +8,10 @@ import rasa_nlu
 import pytest
 
 from rasa_nlu import registry, training_data
-from rasa_nlu.model import Interpreter
+from rasa_nlu.classifiers.keyword_intent_classifier import \
+    KeywordIntentClassifier
+from rasa_nlu.config import RasaNLUModelConfig
+from rasa_nlu.model import Interpreter, Trainer
 from tests import utilities
 
 
@@ -56,3 +59,28 @@ def test_model_not_compatible(metadata):
 def test_model_is_compatible(metadata):
     # should not raise an exception
     assert Interpreter.ensure_model_compatibility(metadata) is None
+
+
+def test_interpreter_parse_batch():
+    interpreter = Interpreter([KeywordIntentClassifier()], {})
+    texts = ["hello", "", "good bye", "i am looking for an indian spot"]
+
+    results = interpreter.parse_batch(texts)
+
+    assert results == [interpreter.parse(text) for text in texts]
+
+
+def test_persisted_model_is_moved_in_place_when_complete(tmpdir):
+    trainer = Trainer(RasaNLUModelConfig(
+            {"pipeline": [{"name": "intent_classifier_keyword"}]}))
+    trainer.train(training_data.load_data(
+            "data/examples/rasa/demo-rasa.json"))
+
+    for _ in range(2):
+        # a model with a fixed name replaces the previous one
+        model_dir = trainer.persist(tmpdir.strpath, project_name="test",
+                                    fixed_model_name="model_fixed")
+
+    assert tmpdir.join("test").listdir() == [tmpdir.join("test",
+                                                         "model_fixed")]
+    assert Interpreter.load(model_dir).parse("hello")["intent"]["name"]
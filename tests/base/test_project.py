@@ -3,9 +3,13 @@ from __future__ import division
 from __future__ import print_function
 from __future__ import unicode_literals
 
+import os
+import threading
+import time
+
 import mock
 
-from rasa_nlu.project import Project
+from rasa_nlu.project import Project, ParseCache, ModelResidency
 
 
 def test_dynamic_load_model_with_exists_model():
@@ -86,7 +90,171 @@ def test_dynamic_load_model_with_model_is_none():
                 project = Project()
 
                 project._models = ()
+                project._path = None
+                project._path_mtime = None
 
                 result = project._dynamic_load_model(None)
 
                 assert result == LATEST_MODEL_NAME
+
+
+def test_models_trained_by_other_processes_are_noticed(tmpdir):
+    tmpdir.join("test", "model_20180101-000000").ensure(dir=True)
+    project = Project(project="test", project_dir=tmpdir.strpath)
+
+    assert project._dynamic_load_model(None) == "model_20180101-000000"
+
+    # e.g. moved in place by the training process of the server
+    tmpdir.join("test", "model_20180202-000000").ensure(dir=True)
+    later = time.time() + 10
+    os.utime(tmpdir.join("test").strpath, (later, later))
+
+    assert project._dynamic_load_model(None) == "model_20180202-000000"
+
+
+def test_parse_cache_evicts_least_recently_used():
+    cache = ParseCache(max_size=2)
+
+    first = cache.key("default", "model", "hello", 0)
+    second = cache.key("default", "model", "bye", 0)
+    third = cache.key("default", "model", "thanks", 0)
+
+    cache.put(first, {"text": "hello"})
+    cache.put(second, {"text": "bye"})
+    assert cache.get(first) == {"text": "hello"}
+
+    cache.put(third, {"text": "thanks"})
+    assert cache.get(second) is None
+    assert cache.get(first) == {"text": "hello"}
+    assert cache.get(third) == {"text": "thanks"}
+    assert cache.as_dict()["size"] == 2
+    assert cache.hits == 3 and cache.misses == 1
+
+
+def test_parse_cache_invalidate_model():
+    cache = ParseCache(max_size=10)
+
+    old = cache.key("default", "model_a", "hello", 0)
+    other = cache.key("default", "model_b", "hello", 0)
+    cache.put(old, {"text": "hello"})
+    cache.put(other, {"text": "hello"})
+
+    cache.invalidate("default", "model_a")
+
+    assert cache.get(old) is None
+    assert cache.get(other) == {"text": "hello"}
+
+
+def test_parse_cache_disabled_and_time_buckets():
+    assert ParseCache().get(("default", "model", "hello", 0)) is None
+
+    cache = ParseCache(max_size=10, time_bucket=60)
+    assert (cache.key("default", "model", "hi", 1000) ==
+            cache.key("default", "model", "hi", 59000))
+    assert (cache.key("default", "model", "hi", 1000) !=
+            cache.key("default", "model", "hi", 61000))
+    assert (cache.key("default", "model", "hi", 1000) !=
+            cache.key("default", "model", "Hi", 1000))
+
+
+def test_parse_not_blocked_by_loading_other_model():
+    loading_started = threading.Event()
+    finish_loading = threading.Event()
+    loaded = mock.Mock()
+    loaded.parse.return_value = {"text": "hello"}
+
+    def mocked_interpreter_for_model(self, model_name):
+        loading_started.set()
+        finish_loading.wait(10)
+        return mock.Mock()
+
+    with mock.patch.object(Project, "_search_for_models", lambda self: None):
+        project = Project(project="default")
+    project._models = {"model_loaded": loaded, "model_cold": None}
+
+    with mock.patch.object(Project, "_interpreter_for_model",
+                           mocked_interpreter_for_model):
+        loader = threading.Thread(target=project.parse,
+                                  args=("hello", None, "model_cold"))
+        loader.start()
+        assert loading_started.wait(10)
+
+        # the cold model is still loading, parsing with a loaded
+        # model must not wait for it
+        response, model = project.parse("hello", None, "model_loaded")
+        assert model == "model_loaded"
+        assert response == {"text": "hello"}
+        assert project._models["model_cold"] is None
+
+        finish_loading.set()
+        loader.join(10)
+
+    assert project._models["model_cold"] is not None
+    assert sorted(project._list_loaded_models()) == ["model_cold",
+                                                     "model_loaded"]
+
+
+def test_concurrent_requests_load_model_once():
+    calls = []
+    release = threading.Event()
+
+    def mocked_interpreter_for_model(self, model_name):
+        calls.append(model_name)
+        release.wait(10)
+        return mock.Mock()
+
+    with mock.patch.object(Project, "_search_for_models", lambda self: None):
+        project = Project(project="default")
+    project._models = {"model_cold": None}
+
+    with mock.patch.object(Project, "_interpreter_for_model",
+                           mocked_interpreter_for_model):
+        results = []
+        threads = [threading.Thread(
+                target=lambda: results.append(
+                        project._ensure_model_loaded("model_cold")))
+                   for _ in range(4)]
+        for t in threads:
+            t.start()
+        release.set()
+        for t in threads:
+            t.join(10)
+
+    assert calls == ["model_cold"]
+    assert len(results) == 4 and all(r is results[0] for r in results)
+
+
+def test_model_residency_evicts_least_recently_used():
+    residency = ModelResidency(max_models=2)
+
+    with mock.patch.object(Project, "_search_for_models", lambda self: None):
+        project = Project(project="default", residency=residency)
+    project._models = {"model_a": None, "model_b": None, "model_c": None}
+
+    with mock.patch.object(Project, "_interpreter_for_model",
+                           lambda self, name: mock.Mock(model_metadata=None)):
+        project._ensure_model_loaded("model_a")
+        project._ensure_model_loaded("model_b")
+        # using `model_a` makes `model_b` the least recently used model
+        project._ensure_model_loaded("model_a")
+        project._ensure_model_loaded("model_c")
+
+    assert sorted(project._list_loaded_models()) == ["model_a", "model_c"]
+
+    status = residency.as_dict()
+    assert [r["model"] for r in status["resident"]] == ["model_a", "model_c"]
+    assert status["evictions"] == 1
+    assert status["recently_evicted"] == [{"project": "default",
+                                           "model": "model_b"}]
+
+
+def test_model_residency_memory_budget():
+    residency = ModelResidency(max_memory=100)
+    project = mock.Mock()
+    project.name = "default"
+
+    residency.loaded(project, "model_a", 60)
+    residency.loaded(project, "model_b", 60)
+
+    project.evict.assert_called_once_with("model_a")
+    assert residency.memory == 60
@@ -6,17 +6,26 @@ from __future__ import unicode_literals
 
 import io
 import json
+import os
+import signal
+import socket
+import subprocess
+import sys
 import tempfile
 import time
 
+import mock
 import pytest
+import requests
 import yaml
 from treq.testing import StubTreq
 
 from rasa_nlu import utils
+from rasa_nlu.admission import AdmissionController, AdmissionRejected
 from rasa_nlu.config import RasaNLUModelConfig
 from rasa_nlu.data_router import DataRouter
-from rasa_nlu.server import RasaNLU
+from rasa_nlu.server import RasaNLU, create_argument_parser, \
+    dump_to_data_file, validate_worker_arguments
 from tests import utilities
 from tests.utilities import ResponseTest
 
@@ -39,6 +48,18 @@ def app(tmpdir_factory):
     return StubTreq(rasa.app.resource())
 
 
+@pytest.fixture
+def overloaded_app(tmpdir_factory):
+    router = DataRouter(tmpdir_factory.mktemp("projects").strpath)
+    admission = AdmissionController(max_concurrent=1, max_queued=1,
+                                    retry_after=3)
+    # one running and one waiting request
+    admission.acquire("default")
+    admission.acquire("default")
+    rasa = RasaNLU(router, testing=True, parse_admission=admission)
+    return StubTreq(rasa.app.resource())
+
+
 @pytest.fixture
 def rasa_default_train_data():
     with io.open('data/examples/rasa/demo-rasa.json',
@@ -59,6 +80,9 @@ def test_status(app):
     rjs = yield response.json()
     assert response.code == 200 and "available_projects" in rjs
     assert "default" in rjs["available_projects"]
+    assert "parse_cache" in rjs
+    assert "model_residency" in rjs
+    assert rjs["admission"]["parse"]["running"] == 0
 
 
 @pytest.inlineCallbacks
@@ -136,6 +160,35 @@ def test_post_parse(app, response_test):
                ['entities', 'intent', '_text', 'confidence'])
 
 
+@pytest.inlineCallbacks
+def test_post_parse_batch(app):
+    response = yield app.post("http://dummy-uri/parse/batch",
+                              json={"q": ["hello", "bye", ""]})
+    rjs = yield response.json()
+    assert response.code == 200
+    assert len(rjs) == 3
+    assert [r[0]["_text"] for r in rjs] == ["hello", "bye", ""]
+    assert [r[0]["intent"] for r in rjs] == ["greet", "goodbye", ""]
+
+
+@pytest.inlineCallbacks
+def test_parse_rejected_if_overloaded(overloaded_app):
+    response = yield overloaded_app.get("http://dummy-uri/parse?q=hello")
+    rjs = yield response.json()
+    assert response.code == 503
+    assert response.headers.getRawHeaders("Retry-After") == ["3"]
+    assert "error" in rjs
+
+
+@pytest.inlineCallbacks
+def test_post_parse_batch_invalid_parameter(app):
+    response = yield app.post("http://dummy-uri/parse/batch",
+                              json={"q": "hello"})
+    rjs = yield response.json()
+    assert response.code == 404
+    assert "error" in rjs
+
+
 @utilities.slowtest
 @pytest.inlineCallbacks
 def test_post_train(app, rasa_default_train_data):
@@ -181,6 +234,65 @@ def test_model_hot_reloading(app, rasa_default_train_data):
     assert response.code == 200, "Project should now exist after it got trained"
 
 
+@pytest.inlineCallbacks
+def test_async_training_job(app, rasa_default_train_data):
+    train_u = "http://dummy-uri/train?project=my_async_model&async=true"
+    model_config = {"pipeline": "keyword", "data": rasa_default_train_data}
+    model_str = yaml.safe_dump(model_config, default_flow_style=False,
+                               allow_unicode=True)
+    response = yield app.post(train_u,
+                              headers={b"Content-Type": b"application/x-yml"},
+                              data=model_str)
+    assert response.code == 202, "The training should run in the background"
+    job = yield response.json()
+    assert job["project"] == "my_async_model"
+
+    time.sleep(3)
+    app.flush()
+    response = yield app.get("http://dummy-uri/train/" + job["job_id"])
+    assert response.code == 200
+    rjs = yield response.json()
+    assert rjs["status"] == "finished"
+    assert rjs["model"].startswith("model_")
+    assert rjs["run_time"] > 0
+
+
+@pytest.inlineCallbacks
+def test_rejected_training_removes_its_data(tmpdir_factory,
+                                            rasa_default_train_data):
+    router = DataRouter(tmpdir_factory.mktemp("projects").strpath)
+    app = StubTreq(RasaNLU(router, testing=True).app.resource())
+    data_files = []
+
+    def dump(data):
+        data_files.append(dump_to_data_file(data))
+        return data_files[-1]
+
+    with mock.patch("rasa_nlu.server.dump_to_data_file", side_effect=dump):
+        # the project is missing
+        response = yield app.post("http://dummy-uri/train",
+                                  json=rasa_default_train_data)
+        assert response.code == 404
+
+        rejection = AdmissionRejected("Too many trainings", 429, 3)
+        with mock.patch.object(router, "submit_training_job",
+                               side_effect=rejection):
+            response = yield app.post("http://dummy-uri/train?project=test",
+                                      json=rasa_default_train_data)
+        assert response.code == 429
+
+    assert len(data_files) == 2
+    assert not any(os.path.exists(f) for f in data_files)
+
+
+@pytest.inlineCallbacks
+def test_unknown_training_job(app):
+    response = yield app.get("http://dummy-uri/train/unknown")
+    assert response.code == 404
+    response = yield app.delete("http://dummy-uri/train/unknown")
+    assert response.code == 404
+
+
 @pytest.inlineCallbacks
 def test_evaluate_invalid_project_error(app, rasa_default_train_data):
     response = app.post("http://dummy-uri/evaluate",
@@ -247,3 +359,109 @@ def test_unload_fallback(app):
     rjs = yield response.json()
     assert response.code == 200, "Fallback model unloaded"
     assert rjs == "fallback"
+
+
+def test_workers_can_not_be_combined_with_parse_processes():
+    parser = create_argument_parser()
+
+    cmdline_args = parser.parse_args(["--path", "projects",
+                                      "--workers", "2",
+                                      "--parse_processes", "2"])
+    with pytest.raises(SystemExit):
+        validate_worker_arguments(parser, cmdline_args)
+
+    cmdline_args = parser.parse_args(["--path", "projects",
+                                      "--workers", "2"])
+    validate_worker_arguments(parser, cmdline_args)
+
+
+def _free_port():
+    s = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+    s.bind(("localhost", 0))
+    port = s.getsockname()[1]
+    s.close()
+    return port
+
+
+def _wait_for(condition, timeout=60):
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        try:
+            result = condition()
+            if result:
+                return result
+        except requests.ConnectionError:
+            pass
+        time.sleep(0.2)
+    raise AssertionError("Condition not met within {}s".format(timeout))
+
+
+@pytest.mark.skipif(not hasattr(os, "fork"), reason="requires os.fork")
+def test_forked_workers_share_the_training_process(tmpdir):
+    port = _free_port()
+    url = "http://localhost:{}".format(port)
+    server = subprocess.Popen([sys.executable, "-m", "rasa_nlu.server",
+                               "--path", tmpdir.strpath,
+                               "--port", str(port),
+                               "--workers", "2"])
+
+    def train(greeting):
+        train_request = yaml.safe_dump({
+            "language": "en",
+            "pipeline": [{"name": "tokenizer_whitespace"},
+                         {"name": "intent_featurizer_count_vectors"},
+                         {"name": "intent_classifier_linear"}],
+            "data": "## intent:{}\n- hello\n- hello there\n"
+                    "## intent:goodbye\n- bye\n- bye bye\n"
+                    "".format(greeting)})
+        response = requests.post(url + "/train?project=test&async=true",
+                                 data=train_request,
+                                 headers={"Content-Type": "application/x-yml"})
+        assert response.status_code == 202
+        job_id = response.json()["job_id"]
+
+        # every request uses a new connection and might be handled by
+        # another worker, all of them know the job
+        def finished_job():
+            response = requests.get(url + "/train/" + job_id)
+            assert response.status_code == 200
+            job = response.json()
+            assert job["status"] in {"queued", "running", "finished"}
+            return job if job["status"] == "finished" else None
+
+        return _wait_for(finished_job)
+
+    def parsed_intents():
+        return {requests.get(url + "/parse?q=hello&project=test").json()[
+                    "intent"]["name"] for _ in range(8)}
+
+    try:
+        _wait_for(lambda: requests.get(url).status_code == 200)
+
+        first_job = train("greet")
+        for _ in range(4):
+            status = requests.get(url + "/status").json()
+            assert status["training_jobs"]["submitted"] == 1
+            assert status["available_projects"]["test"]["status"] == "ready"
+        assert parsed_intents() == {"greet"}
+
+        # model names have a resolution of one second
+        time.sleep(1.1)
+        second_job = train("welcome")
+
+        # all workers parse with the new model, not only the one which
+        # forwarded the training
+        assert second_job["model"] != first_job["model"]
+        assert parsed_intents() == {"welcome"}
+
+        # the model is unloaded by every worker
+        response = requests.delete(url + "/models?project=test&model=" +
+                                   second_job["model"])
+        assert response.status_code == 200
+        for _ in range(8):
+            status = requests.get(url + "/status").json()
+            project = status["available_projects"]["test"]
+            assert second_job["model"] not in project["loaded_models"]
+    finally:
+        server.send_signal(signal.SIGTERM)
+        assert server.wait(timeout=30) == 0
@@ -4,6 +4,10 @@ from __future__ import division
 from __future__ import print_function
 from __future__ import unicode_literals
 
+import io
+import os
+import re
+import shutil
 import tempfile
 
 import pytest
@@ -14,7 +18,12 @@ from rasa_nlu import utils
 from rasa_nlu.convert import convert_training_data
 from rasa_nlu.extractors.mitie_entity_extractor import MitieEntityExtractor
 from rasa_nlu.tokenizers.whitespace_tokenizer import WhitespaceTokenizer
-from rasa_nlu.training_data.formats.rasa import validate_rasa_nlu_data
+from rasa_nlu.training_data import Message, TrainingData, compiled, loading
+from rasa_nlu.training_data.formats.markdown import (
+    MarkdownReader, comment_regex)
+from rasa_nlu.training_data.formats.rasa import (
+    RasaReader, validate_rasa_nlu_data)
+from rasa_nlu.training_data.formats.readerwriter import JsonStream
 
 
 def test_example_training_data_is_valid():
@@ -41,6 +50,66 @@ def test_validation_is_throwing_exceptions(invalid_data):
         validate_rasa_nlu_data(invalid_data)
 
 
+@pytest.mark.parametrize("invalid_data", [
+    {"wrong_top_level": []},
+    ["this is not a toplevel dict"],
+    {"rasa_nlu_data": {
+        "common_examples": [{
+            "intent": "some example without text"}]}},
+    {"rasa_nlu_data": {"regex_features": "not a list"}},
+])
+def test_streaming_validation_is_throwing_exceptions(invalid_data):
+    stream = JsonStream(io.StringIO(utils.json_to_string(invalid_data)))
+    with pytest.raises(ValidationError):
+        RasaReader().read_from_stream(stream)
+
+
+@pytest.mark.parametrize("chunk_size", [1, 7, 64 * 1024])
+def test_streaming_rasa_reader(chunk_size):
+    filename = 'data/examples/rasa/demo-rasa.json'
+    expected = RasaReader().read_from_json(utils.read_json_file(filename))
+
+    with io.open(filename, encoding="utf-8-sig") as f:
+        td = RasaReader().read_from_stream(JsonStream(f, chunk_size))
+
+    assert td.training_examples == expected.training_examples
+    assert td.entity_synonyms == expected.entity_synonyms
+    assert td.regex_features == expected.regex_features
+
+
+def test_json_stream_decodes_values_split_across_chunks():
+    stream = JsonStream(io.StringIO('{"a": [1, 23456, -1.5e3, "x\\"y"], '
+                                    '"b": {"c": null}}'), chunk_size=2)
+    values = {}
+    for key in stream.iter_object():
+        if key == "a":
+            values[key] = list(stream.iter_array())
+        else:
+            values[key] = stream.read_value()
+    assert values == {"a": [1, 23456, -1500.0, 'x"y'], "b": {"c": None}}
+
+
+@pytest.mark.parametrize("text", [
+    "a<!-- x -->b\nc",
+    "a <!-- x\ny\nz --> b\nc<!--q-->d<!--r\n-->e",
+    "a<!--b-->c<!--never\nclosed",
+])
+def test_markdown_comments_are_stripped_line_by_line(text):
+    expected = re.sub(comment_regex, '', text).splitlines()
+    lines = MarkdownReader._strip_comments_from_lines(text.splitlines())
+    assert list(lines) == expected
+
+
+def test_format_of_large_files_is_guessed_from_prefix(tmpdir):
+    td = training_data.load_data('data/examples/rasa/demo-rasa.json')
+    examples = td.training_examples * 500
+    f = tmpdir.join("large.json")
+    f.write(TrainingData(examples).as_json(), ensure=True)
+
+    assert loading._guess_format(f.strpath) == loading.RASA
+    assert len(loading.load_data(f.strpath).training_examples) == 21000
+
+
 def test_luis_data():
     td = training_data.load_data('data/examples/luis/demo-restaurants.json')
     assert len(td.entity_examples) == 8
@@ -107,6 +176,161 @@ def test_data_merging(files):
     assert td.regex_features == td_reference.regex_features
 
 
+def test_multiple_files_are_validated_once(monkeypatch):
+    validated = []
+    monkeypatch.setattr(TrainingData, "validate",
+                        lambda self: validated.append(self))
+
+    td = training_data.load_data('data/test/multiple_files_markdown')
+    assert validated == [td]
+
+
+def test_training_data_overlay_keeps_examples_unchanged():
+    td = training_data.load_data('data/examples/rasa/demo-rasa.json')
+    examples = [(ex.text, dict(ex.data)) for ex in td.training_examples]
+    num_intent_examples = len(td.intent_examples)
+
+    overlay = td.overlay()
+    for ex in overlay.training_examples:
+        ex.set("tokens", ex.text.split())
+        ex.set("intent", "changed")
+
+    assert [(ex.text, ex.data) for ex in td.training_examples] == examples
+    assert len(overlay.intent_examples) == num_intent_examples
+    # attributes which were not changed are shared
+    assert (overlay.entity_examples[0].get("entities") is
+            td.entity_examples[0].get("entities"))
+
+
+def test_parallel_loading_keeps_order_of_files():
+    td = training_data.load_data('data/examples/dialogflow')
+    td_parallel = training_data.load_data('data/examples/dialogflow',
+                                          num_processes=2)
+
+    assert td_parallel.training_examples == td.training_examples
+    assert td_parallel.entity_synonyms == td.entity_synonyms
+
+
+def test_data_merging_keeps_examples_unchanged():
+    td = training_data.load_data('data/examples/rasa/demo-rasa.json')
+    other = training_data.load_data('data/examples/rasa/demo-rasa.md')
+    merged = td.merge(other)
+
+    for ex in merged.training_examples:
+        ex.set("intent", "changed")
+
+    assert len(merged.training_examples) == 2 * len(td.training_examples)
+    assert all(ex.get("intent") != "changed"
+               for ex in td.training_examples + other.training_examples)
+
+
+@pytest.mark.parametrize("resource", [
+    "data/examples/rasa",
+    "data/examples/wit/demo-flights.json",
+    "data/examples/luis/demo-restaurants.json",
+    "data/examples/dialogflow"])
+def test_compiled_training_data_equals_parsed_data(tmpdir, resource):
+    copy = tmpdir.join("data").strpath
+    if os.path.isdir(resource):
+        shutil.copytree(resource, copy)
+    else:
+        shutil.copy(resource, copy)
+
+    parsed = training_data.load_data(copy, use_cache=True)
+    files = [f for f in utils.list_files(copy)
+             if not compiled.is_compiled_file(f)]
+    content_hash = compiled.source_hash(files, "en")
+    compiled_file = compiled.compiled_file_name(copy, content_hash)
+    assert os.path.isfile(compiled_file)
+
+    td = compiled.read_compiled(compiled_file, content_hash)
+    assert td.training_examples == parsed.training_examples
+    assert td.entity_synonyms == parsed.entity_synonyms
+    assert td.regex_features == parsed.regex_features
+    assert td.lookup_tables == parsed.lookup_tables
+
+    # the compiled file is not read as training data
+    assert (training_data.load_data(copy, use_cache=True).training_examples ==
+            parsed.training_examples)
+
+
+def test_compiled_training_data_is_updated_with_its_source(tmpdir):
+    f = tmpdir.join("data.md")
+    f.write("## intent:greet\n- hello\n- hi\n")
+    assert len(training_data.load_data(f.strpath,
+                                       use_cache=True).training_examples) == 2
+
+    f.write("## intent:greet\n- hello\n- hi\n- hey\n")
+    td = training_data.load_data(f.strpath, use_cache=True)
+    assert [e.text for e in td.training_examples] == ["hello", "hi", "hey"]
+
+
+def test_compiled_training_data_in_cache_dir(tmpdir):
+    cache_dir = tmpdir.join("cache").strpath
+    for name in ["a.md", "b.md"]:
+        tmpdir.join(name).write("## intent:greet\n- hello\n- hi\n")
+        training_data.load_data(tmpdir.join(name).strpath,
+                                cache_dir=cache_dir)
+
+    # both files have the same content
+    assert len(os.listdir(cache_dir)) == 1
+    assert not tmpdir.join("a.md" + compiled.COMPILED_FILE_SUFFIX).exists()
+
+
+def test_compiled_training_data_of_other_versions_is_ignored(tmpdir):
+    td = training_data.load_data("data/examples/rasa/demo-rasa.md")
+    filename = tmpdir.join("data" + compiled.COMPILED_FILE_SUFFIX).strpath
+    compiled.write_compiled(td, filename, "a")
+
+    assert compiled.read_compiled(filename, "b") is None
+    assert compiled.read_compiled(filename, "a") is not None
+
+
+def test_compiled_training_data_depends_on_rasa_nlu_version(tmpdir,
+                                                            monkeypatch):
+    f = tmpdir.join("data.md")
+    f.write("## intent:greet\n- hello\n")
+    content_hash = compiled.source_hash([f.strpath], "en")
+
+    monkeypatch.setattr(compiled, "__version__", "0.0.0")
+    assert compiled.source_hash([f.strpath], "en") != content_hash
+
+
+def test_compiled_training_data_cache_dir_is_pruned(tmpdir):
+    td = training_data.load_data("data/examples/rasa/demo-rasa.md")
+    cache_dir = tmpdir.join("cache")
+    filenames = [compiled.compiled_file_name("data", content_hash,
+                                             cache_dir.strpath)
+                 for content_hash in ["a", "b", "c"]]
+    for i, filename in enumerate(filenames):
+        compiled.write_compiled(td, filename, "x")
+        os.utime(filename, (i, i))
+    cache_dir.join("other.json").write("{}")
+    file_size = os.path.getsize(filenames[0])
+
+    # reading marks a file as recently used
+    assert compiled.read_compiled(filenames[0], "x") is not None
+    assert compiled.prune_cache_dir(cache_dir.strpath, 2 * file_size) == 1
+
+    assert sorted(os.listdir(cache_dir.strpath)) == sorted(
+            [os.path.basename(filenames[0]), os.path.basename(filenames[2]),
+             "other.json"])
+    assert compiled.prune_cache_dir(cache_dir.strpath, 2 * file_size) == 0
+
+
+def test_compiled_training_data_keeps_other_attributes(tmpdir):
+    examples = [Message("hello", {"intent": "greet"}),
+                Message("hi", {"intent": "greet", "extra": [1, 2]}),
+                Message("2 beers", {"entities": [{"start": 0, "end": 1,
+                                                  "value": 2,
+                                                  "entity": "number"}]})]
+    filename = tmpdir.join("data" + compiled.COMPILED_FILE_SUFFIX).strpath
+    compiled.write_compiled(TrainingData(examples), filename, "a")
+
+    td = compiled.read_compiled(filename, "a")
+    assert td.training_examples == examples
+
+
 def test_markdown_single_sections():
     td_regex_only = training_data.load_data('data/test/markdown_single_sections/regex_only.md')
     assert td_regex_only.regex_features == [{"name": "greet", "pattern": "hey[^\s]*"}]
@@ -116,6 +340,25 @@ def test_markdown_single_sections():
                                            'Chinese': 'chinese'}
 
 
+def test_lookup_tables_markdown(tmpdir):
+    td = training_data.load_data('data/test/lookup_tables/lookup_tables.md')
+    assert td.lookup_tables == [
+        {"name": "city", "elements": ["new york", "berlin"]},
+        {"name": "plates",
+         "elements": "data/test/lookup_tables/plates.txt"}]
+
+    # lookup tables survive a round trip through the json format
+    json_file = tmpdir.join("lookup_tables.json")
+    json_file.write(td.as_json())
+    assert training_data.load_data(json_file.strpath).lookup_tables == \
+        td.lookup_tables
+
+    md_file = tmpdir.join("lookup_tables.md")
+    md_file.write(td.as_markdown())
+    assert training_data.load_data(md_file.strpath).lookup_tables == \
+        td.lookup_tables
+
+
 def test_repeated_entities():
     data = """
 {
@@ -0,0 +1,131 @@
+from __future__ import absolute_import
+from __future__ import division
+from __future__ import print_function
+from __future__ import unicode_literals
+
+import pytest
+from twisted.internet.defer import Deferred
+
+from rasa_nlu.admission import AdmissionRejected
+from rasa_nlu.training_jobs import (
+    TrainingJob, TrainingJobCancelled, TrainingScheduler)
+
+
+class JobRecorder(object):
+    def __init__(self):
+        self.started = []
+        self.results = {}
+
+    def __call__(self, job):
+        self.started.append(job.arguments["name"])
+        result = Deferred()
+        self.results[job.arguments["name"]] = result
+        return result
+
+    def finish(self, name):
+        self.results[name].callback(("model_" + name, 1024))
+
+
+def submit(scheduler, project, name, priority=0):
+    return scheduler.submit(project, {"name": name}, priority)
+
+
+def test_jobs_of_a_project_run_one_after_another():
+    recorder = JobRecorder()
+    scheduler = TrainingScheduler(recorder, max_running=2)
+
+    first = submit(scheduler, "a", "a1")
+    second = submit(scheduler, "a", "a2")
+    assert recorder.started == ["a1"]
+    assert second.status == TrainingJob.QUEUED
+
+    models = []
+    second.wait().addCallback(models.append)
+    recorder.finish("a1")
+
+    assert first.status == TrainingJob.FINISHED
+    assert first.model == "model_a1" and first.peak_rss == 1024
+    assert recorder.started == ["a1", "a2"]
+
+    recorder.finish("a2")
+    assert models == ["model_a2"]
+
+
+def test_projects_are_scheduled_fairly():
+    recorder = JobRecorder()
+    scheduler = TrainingScheduler(recorder, max_running=1,
+                                  max_running_per_project=3)
+
+    for name in ["a1", "a2", "a3"]:
+        submit(scheduler, "a", name)
+    submit(scheduler, "b", "b1")
+
+    recorder.finish("a1")
+    recorder.finish("b1")
+    recorder.finish("a2")
+    assert recorder.started == ["a1", "b1", "a2", "a3"]
+
+
+def test_jobs_with_higher_priority_are_started_first():
+    recorder = JobRecorder()
+    scheduler = TrainingScheduler(recorder, max_running=1)
+
+    submit(scheduler, "a", "a1")
+    submit(scheduler, "b", "b1")
+    submit(scheduler, "c", "c1", priority=5)
+
+    recorder.finish("a1")
+    assert recorder.started == ["a1", "c1"]
+
+
+def test_queued_jobs_can_be_cancelled():
+    recorder = JobRecorder()
+    scheduler = TrainingScheduler(recorder)
+
+    running = submit(scheduler, "a", "a1")
+    queued = submit(scheduler, "a", "a2")
+
+    errors = []
+    queued.wait().addErrback(errors.append)
+    assert scheduler.cancel(queued.job_id).status == TrainingJob.CANCELLED
+    assert errors[0].check(TrainingJobCancelled)
+
+    # running jobs can not be cancelled
+    assert scheduler.cancel(running.job_id).status == TrainingJob.RUNNING
+    assert scheduler.cancel("unknown") is None
+
+    recorder.finish("a1")
+    assert recorder.started == ["a1"]
+    assert scheduler.get(queued.job_id) is queued
+
+
+def test_failed_jobs_report_their_error():
+    scheduler = TrainingScheduler(lambda job: 1 / 0)
+
+    job = submit(scheduler, "a", "a1")
+    errors = []
+    job.wait().addErrback(errors.append)
+
+    assert job.status == TrainingJob.FAILED
+    assert "division" in job.error
+    assert errors[0].check(ZeroDivisionError)
+
+
+def test_jobs_are_rejected_if_queue_is_full():
+    scheduler = TrainingScheduler(JobRecorder(), max_running=2,
+                                  max_queued=1, max_queued_per_project=1)
+
+    submit(scheduler, "a", "a1")
+    submit(scheduler, "a", "a2")
+
+    with pytest.raises(AdmissionRejected) as e:
+        submit(scheduler, "a", "a3")
+    assert e.value.status_code == 429
+
+    # a job which can start right away is never rejected
+    submit(scheduler, "b", "b1")
+
+    with pytest.raises(AdmissionRejected) as e:
+        submit(scheduler, "c", "c1")
+    assert e.value.status_code == 503
+    assert scheduler.as_dict()["rejected"] == 2
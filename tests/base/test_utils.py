@@ -6,6 +6,7 @@ from __future__ import unicode_literals
 import io
 import os
 import pickle
+import re
 import tempfile
 
 import pytest
@@ -15,6 +16,10 @@ from rasa_nlu.utils import (
     relative_normpath,
     create_dir,
     ordered, is_model_dir, remove_model, write_json_to_file, write_to_file)
+from rasa_nlu.tokenizers import Token
+from rasa_nlu.utils.pattern_matching import (
+    PatternMatcher, TokenIndex, is_literal_pattern)
+from rasa_nlu.utils.spacy_utils import SpacyDocCache, get_doc_cache
 
 
 @pytest.fixture
@@ -104,3 +109,90 @@ def test_remove_model_invalid(empty_model_dir):
         remove_model(empty_model_dir)
 
     os.remove(test_file_path)
+
+
+def test_is_literal_pattern():
+    assert is_literal_pattern("new york")
+    assert not is_literal_pattern("[0-9]{5}")
+    assert not is_literal_pattern("hey.*")
+    assert not is_literal_pattern("")
+
+
+@pytest.mark.parametrize("text", [
+    "i live in new york city",
+    "she said hershey's are her favourite",
+    "the zipcode is 10115, not 10117",
+    "nothing to see here",
+])
+def test_pattern_matcher_matches_like_re_search(text):
+    patterns = ["he", "she", "his", "hers", "new york", "york city",
+                "[0-9]{5}", "\\bher\\b", "here$", "e"]
+    matcher = PatternMatcher(patterns)
+
+    expected = []
+    for pattern in patterns:
+        match = re.search(pattern, text)
+        expected.append(match.span() if match else None)
+
+    assert matcher.search(text) == expected
+
+
+def test_token_index_finds_overlapping_tokens():
+    tokens = [Token("new", 0), Token("york", 4), Token("city", 9)]
+    index = TokenIndex(tokens)
+
+    assert [t.text for t in index.overlapping(0, 8)] == ["new", "york"]
+    assert [t.text for t in index.overlapping(5, 6)] == ["york"]
+    assert [t.text for t in index.overlapping(3, 4)] == []
+    assert [t.text for t in index.overlapping(2, 10)] == ["new", "york",
+                                                          "city"]
+
+
+def test_spacy_doc_cache_evicts_least_recently_used_docs():
+    cache = SpacyDocCache("en-test", max_size=2)
+    keys = [cache.key(text, False) for text in ["a", "b", "c"]]
+
+    cache.put(keys[0], "doc a")
+    cache.put(keys[1], "doc b")
+    assert cache.get(keys[0], None) == "doc a"
+    cache.put(keys[2], "doc c")
+
+    assert cache.get(keys[1], None) is None
+    assert cache.get(keys[0], None) == "doc a"
+    assert cache.get(keys[2], None) == "doc c"
+    assert (cache.hits, cache.misses) == (3, 1)
+
+
+def test_spacy_doc_cache_keys_depend_on_model_and_casing():
+    cache = SpacyDocCache("en-test")
+    other = SpacyDocCache("de-test")
+
+    assert cache.key("hello", False) == cache.key("hello", False)
+    assert cache.key("hello", False) != cache.key("hello", True)
+    assert cache.key("hello", False) != other.key("hello", False)
+
+
+def test_spacy_doc_caches_are_shared_per_model():
+    cache = get_doc_cache("en-shared-test", max_size=3)
+    keys = [cache.key(text, False) for text in ["a", "b", "c"]]
+    for key in keys:
+        cache.put(key, key)
+
+    assert get_doc_cache("en-shared-test", max_size=3) is cache
+    assert get_doc_cache("de-shared-test", max_size=3) is not cache
+
+    # the settings of the latest user apply
+    assert get_doc_cache("en-shared-test", max_size=1) is cache
+    assert len(cache) == 1
+    assert cache.get(keys[2], None) == keys[2]
+
+
+def test_spacy_doc_cache_stores_docs_on_disk(spacy_nlp, tmpdir):
+    cache = SpacyDocCache("en-test", max_size=0, cache_dir=tmpdir.strpath)
+    key = cache.key("hello there", False)
+    cache.put(key, spacy_nlp("hello there"))
+
+    # a new cache reads the docs of the previous one
+    cache = SpacyDocCache("en-test", max_size=0, cache_dir=tmpdir.strpath)
+    doc = cache.get(key, spacy_nlp.vocab)
+    assert [t.text for t in doc] == ["hello", "there"]
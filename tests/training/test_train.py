@@ -13,7 +13,7 @@ from tests.conftest import DEFAULT_DATA_PATH
 from rasa_nlu import registry, train
 from rasa_nlu.model import Trainer, Interpreter
 from rasa_nlu.train import create_persistor
-from rasa_nlu.training_data import TrainingData
+from rasa_nlu.training_data import TrainingData, load_data
 from tests import utilities
 
 
@@ -46,6 +46,7 @@ def pipelines_for_tests():
                                "ner_synonyms",
                                "intent_classifier_keyword",
                                "intent_classifier_sklearn",
+                               "intent_classifier_linear",
                                "intent_classifier_mitie",
                                "intent_classifier_tensorflow_embedding"
                                )),
@@ -103,6 +104,94 @@ def test_train_model_on_test_pipelines(language, pipeline,
     assert loaded.parse("Hello today is Monday, again!") is not None
 
 
+@utilities.slowtest
+def test_embedding_numpy_inference(component_builder, tmpdir):
+    pipeline = [{"name": "intent_featurizer_count_vectors"},
+                {"name": "intent_classifier_tensorflow_embedding",
+                 "epochs": 10,
+                 "numpy_inference": True}]
+    _config = RasaNLUModelConfig({"pipeline": pipeline, "language": "en"})
+    (trained, _, persisted_path) = train.do_train(
+            _config,
+            path=tmpdir.strpath,
+            data=DEFAULT_DATA_PATH,
+            component_builder=component_builder)
+    loaded = Interpreter.load(persisted_path, component_builder)
+    classifier = loaded.pipeline[-1]
+    assert classifier.session is None
+    assert classifier.intent_embeddings is not None
+
+    for text in ["hello", "I am looking for an indian restaurant"]:
+        expected = trained.parse(text)
+        result = loaded.parse(text)
+        assert result["intent"]["name"] == expected["intent"]["name"]
+        assert result["intent"]["confidence"] == pytest.approx(
+                expected["intent"]["confidence"], abs=1e-5)
+
+
+def test_train_with_warm_start(component_builder, tmpdir):
+    pipeline = as_pipeline("intent_featurizer_count_vectors",
+                           "intent_classifier_sklearn")
+    _config = RasaNLUModelConfig({"pipeline": pipeline, "language": "en"})
+    (previous, _, previous_path) = train.do_train(
+            _config,
+            path=tmpdir.strpath,
+            data="data/test/demo-rasa-small.json",
+            component_builder=component_builder)
+
+    (trainer, interpreter, _) = train.do_train(
+            _config,
+            path=tmpdir.strpath,
+            data=DEFAULT_DATA_PATH,
+            component_builder=component_builder,
+            warm_start_from=previous_path)
+
+    old_vocabulary = previous.pipeline[0].vect.vocabulary_
+    vocabulary = trainer.pipeline[0].vect.vocabulary_
+    # known words keep their index
+    assert all(vocabulary[w] == i for w, i in old_vocabulary.items())
+    assert len(vocabulary) > len(old_vocabulary)
+    assert sorted(vocabulary.values()) == list(range(len(vocabulary)))
+
+    # the svm parameters are reused instead of cross validated again
+    clf = trainer.pipeline[1].clf
+    assert clf.get_params()["C"] == previous.pipeline[1].clf.best_params_["C"]
+    assert interpreter.parse("hello")["intent"]["name"] is not None
+
+
+def test_train_twice_reuses_spacy_docs():
+    pipeline = as_pipeline("nlp_spacy",
+                           "intent_featurizer_spacy",
+                           "intent_classifier_sklearn")
+    _config = RasaNLUModelConfig({"pipeline": pipeline, "language": "en"})
+    # no component builder, just like the server every training creates
+    # new components
+    (first, _, _) = train.do_train(_config, data=DEFAULT_DATA_PATH)
+    cache = first.pipeline[0].doc_cache
+    hits = cache.hits
+
+    (second, _, _) = train.do_train(_config, data=DEFAULT_DATA_PATH)
+
+    assert second.pipeline[0] is not first.pipeline[0]
+    assert second.pipeline[0].doc_cache is cache
+    num_examples = len(load_data(DEFAULT_DATA_PATH).training_examples)
+    assert cache.hits - hits == num_examples
+
+
+def test_train_does_not_change_training_data(component_builder):
+    pipeline = as_pipeline("tokenizer_whitespace",
+                           "intent_featurizer_count_vectors",
+                           "intent_classifier_sklearn")
+    _config = RasaNLUModelConfig({"pipeline": pipeline, "language": "en"})
+    trainer = Trainer(_config, component_builder)
+    data = load_data(DEFAULT_DATA_PATH)
+    examples = [(ex.text, dict(ex.data)) for ex in data.training_examples]
+
+    trainer.train(data)
+
+    assert [(ex.text, ex.data) for ex in data.training_examples] == examples
+
+
 @utilities.slowtest
 @pytest.mark.parametrize("language, pipeline", pipelines_for_tests())
 def test_train_model_noents(language, pipeline, component_builder, tmpdir):